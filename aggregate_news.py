@@ -1,13 +1,13 @@
-import feedparser
-from newspaper import Article
-from GoogleNews import GoogleNews
-import pandas as pd
 import json
-import urllib.robotparser
 import time
 import logging
 import argparse
+import os
 from unique_id_util import generate_unique_id
+import metrics
+import categorizer
+import newsapi_source
+import robots_cache
 
 
 # --- LEGAL & ETHICAL SAFEGUARDS ---
@@ -16,25 +16,15 @@ DISCLAIMER = (
     "Please visit the original source for the full article. All copyrights belong to the respective publishers. "
     "We respect robots.txt and Terms of Service of all sources."
 )
-print(DISCLAIMER)
 
-# robots.txt checker
-robots_cache = {}
+# Root for all_news.json/all_news.csv (overridable, e.g. by the benchmarks)
+BASE_DIR = os.path.abspath(os.path.dirname(__file__))
+# date_published is stored in UTC ISO 8601, the format NewsAPI's publishedAt uses
+DATE_FORMAT = '%Y-%m-%dT%H:%M:%SZ'
+
+# robots.txt checker (cached on disk across runs, see robots_cache.py)
 def can_fetch(url, user_agent='*'):
-    from urllib.parse import urlparse
-    domain = urlparse(url).scheme + '://' + urlparse(url).netloc
-    if domain not in robots_cache:
-        rp = urllib.robotparser.RobotFileParser()
-        rp.set_url(domain + '/robots.txt')
-        try:
-            rp.read()
-            robots_cache[domain] = rp
-        except Exception:
-            robots_cache[domain] = None
-    rp = robots_cache[domain]
-    if rp:
-        return rp.can_fetch(user_agent, url)
-    return True  # If robots.txt can't be read, default to allow
+    return robots_cache.can_fetch(url, user_agent)
 
 # 1. RSS Feeds
 rss_urls = [
@@ -51,12 +41,39 @@ def setup_logging():
         handlers=[logging.StreamHandler()]
     )
 
-def fetch_rss_news(rss_urls, max_per_feed=5, default_category='general'):
+def fetch_rss_news(rss_urls, max_per_feed=5, default_category='general', scheduler=None):
+    """
+    Fetch the latest entries from each RSS feed. With a FeedScheduler, only feeds
+    that are due are polled, conditional requests (ETag/Last-Modified) are used and
+    only entries not seen on earlier polls are returned.
+    """
+    import calendar
+    import feedparser
     news_list = []
+    if scheduler:
+        rss_urls = scheduler.due_sources(rss_urls)
+        robots_cache.prefetch(rss_urls)
+        for url in rss_urls:
+            scheduler.set_crawl_delay(url, robots_cache.crawl_delay(url))
     for url in rss_urls:
         try:
-            feed = feedparser.parse(url)
-            for entry in feed.entries[:max_per_feed]:
+            with metrics.timer('feed_fetch_seconds', 'Time to fetch and parse a source', source='rss'):
+                if scheduler:
+                    feed = feedparser.parse(url, **scheduler.conditional_headers(url))
+                else:
+                    feed = feedparser.parse(url)
+            status = getattr(feed, 'status', 200)
+            metrics.counter('feed_fetch_total', 'Source polls by outcome').inc(source='rss', status=status)
+            if status >= 400 or (feed.get('bozo') and not feed.entries and status != 304):
+                raise RuntimeError(f"HTTP {status}" if status >= 400 else feed.get('bozo_exception'))
+            entries = feed.entries[:max_per_feed]
+            if scheduler:
+                keys = [entry.get('id') or entry.get('link') for entry in entries]
+                stamps = [calendar.timegm(entry.published_parsed) for entry in entries if entry.get('published_parsed')]
+                entries = [entry for entry, key in zip(entries, keys) if scheduler.is_new(url, key)]
+                scheduler.record_success(url, keys, stamps, not_modified=(status == 304),
+                                         etag=feed.get('etag'), modified=feed.get('modified'))
+            for entry in entries:
                 # Try to extract category from entry, else use default_category
                 category = None
                 if 'tags' in entry and entry.tags:
@@ -71,19 +88,34 @@ def fetch_rss_news(rss_urls, max_per_feed=5, default_category='general'):
                     'heading': entry.title,
                     'summary': entry.summary if 'summary' in entry else '',
                     'link': entry.link,
-                    'category': category
+                    'category': category,
+                    'date_published': time.strftime(DATE_FORMAT, entry.published_parsed) if entry.get('published_parsed') else '',
                 }
                 news_list.append(news_item)
         except Exception as e:
             logging.error(f"RSS error for {url}: {e}")
+            metrics.counter('feed_errors_total', 'Source polls that failed').inc(source='rss')
+            if scheduler:
+                scheduler.record_failure(url)
     return news_list
 
-def fetch_google_news(topic='technology', max_results=5):
+def fetch_google_news(topic='technology', max_results=5, scheduler=None):
     news_list = []
+    source = f'googlenews:{topic}'
+    if max_results <= 0 or (scheduler and not scheduler.is_due(source)):
+        return news_list
     try:
-        googlenews = GoogleNews(period='1d')
-        googlenews.search(topic)
-        for result in googlenews.results()[:max_results]:
+        with metrics.timer('feed_fetch_seconds', 'Time to fetch and parse a source', source='google'):
+            from GoogleNews import GoogleNews
+            googlenews = GoogleNews(period='1d')
+            googlenews.search(topic)
+            results = googlenews.results()[:max_results]
+        metrics.counter('feed_fetch_total', 'Source polls by outcome').inc(source='google', status=200)
+        if scheduler:
+            keys = [result.get('link', '') for result in results]
+            results = [result for result, key in zip(results, keys) if scheduler.is_new(source, key)]
+            scheduler.record_success(source, keys)
+        for result in results:
             news_item = {
                 'news_id': generate_unique_id(),
                 'source': result.get('media', ''),
@@ -95,24 +127,35 @@ def fetch_google_news(topic='technology', max_results=5):
             news_list.append(news_item)
     except Exception as e:
         logging.error(f"GoogleNews error: {e}")
+        metrics.counter('feed_errors_total', 'Source polls that failed').inc(source='google')
+        if scheduler:
+            scheduler.record_failure(source)
     return news_list
 
 def enrich_with_article_text(news_list):
+    from newspaper import Article
+    # One concurrent robots.txt round for the whole batch instead of a blocking fetch per new domain
+    robots_cache.prefetch([news.get('link', '') for news in news_list])
     for news in news_list:
         link = news.get('link', '')
         if link and can_fetch(link):
             try:
-                article = Article(link)
-                article.download()
-                article.parse()
+                robots_cache.throttle(link)
+                with metrics.timer('article_extract_seconds', 'newspaper download and parse time'):
+                    article = Article(link)
+                    article.download()
+                    article.parse()
                 news['full_text'] = article.text
+                metrics.counter('article_extract_total', 'Article extractions by outcome').inc(outcome='ok')
                 if not news['full_text']:
                     logging.warning(f"[aggregate_news] Empty article text for {link}")
             except Exception as e:
                 news['full_text'] = ''
                 logging.warning(f"Article extraction failed for {link}: {e}")
+                metrics.counter('article_extract_total', 'Article extractions by outcome').inc(outcome='error')
         else:
             news['full_text'] = ''
+    robots_cache.save()
     return news_list
 
 def save_news(news_list, json_path='all_news.json', csv_path='all_news.csv'):
@@ -135,13 +178,16 @@ def save_news(news_list, json_path='all_news.json', csv_path='all_news.csv'):
             all_news[item['news_id']] = item
     merged_news = list(all_news.values())
     # Save merged news
-    with open(json_path, 'w', encoding='utf-8') as f:
-        json.dump(merged_news, f, ensure_ascii=False, indent=2)
-    pd.DataFrame(merged_news).to_csv(csv_path, index=False, encoding='utf-8')
+    with metrics.timer('disk_write_seconds', 'Time spent writing JSON/CSV output', stage='aggregate'):
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump(merged_news, f, ensure_ascii=False, indent=2)
+        pd.DataFrame(merged_news).to_csv(csv_path, index=False, encoding='utf-8')
+    metrics.counter('articles_aggregated_total', 'New articles saved by the aggregator').inc(len(news_list))
     logging.info(f"Aggregated {len(news_list)} new articles, {len(merged_news)} total. Saved to {json_path} and {csv_path}.")
 
 def main():
     setup_logging()
+    print(DISCLAIMER)
     # Load .env if present
     import os
     from dotenv import load_dotenv
@@ -161,62 +207,85 @@ def main():
     parser.add_argument('--gemini_enhance', action='store_true', help='Run Gemini enhancer on each category after aggregation')
     parser.add_argument('--gemini_key', type=str, default=default_gemini_key, help='Gemini API key (optional)')
     parser.add_argument('--unsplash_key', type=str, default=default_unsplash_key, help='Unsplash API key (optional)')
+    parser.add_argument('--newsapi_key', type=str, default=os.getenv('NEWSAPI_KEY'), help='NewsAPI key (optional)')
+    parser.add_argument('--newsapi_countries', nargs='+', default=['us'], help='NewsAPI country codes')
+    parser.add_argument('--newsapi_categories', nargs='+', default=[None],
+                        help=f"NewsAPI categories ({', '.join(newsapi_source.CATEGORIES)}; default: all)")
     args = parser.parse_args()
 
+    run_aggregation(args.rss, args.topic, args.max_per_feed, args.max_google,
+                    gemini_enhance=args.gemini_enhance, gemini_key=args.gemini_key, unsplash_key=args.unsplash_key,
+                    newsapi_key=args.newsapi_key, newsapi_countries=args.newsapi_countries,
+                    newsapi_categories=args.newsapi_categories)
+
+def run_aggregation(rss_urls, topic='technology', max_per_feed=5, max_google=5, gemini_enhance=False, gemini_key=None, unsplash_key=None, scheduler=None,
+                    newsapi_key=None, newsapi_countries=('us',), newsapi_categories=(None,)):
+    """
+    Fetch, enrich and save news to all_news.json and per-category files in 'news bucket'.
+    Articles are fetched and extracted once and reused for both outputs.
+    With a FeedScheduler only due sources are polled and only unseen entries kept.
+    With a NewsAPI key, top headlines for each country/category are added too.
+    Returns a dict of category -> bucket JSON path.
+    """
+    import os
+    import re
+    from collections import defaultdict
     # Fetch news
-    rss_news = fetch_rss_news(args.rss, args.max_per_feed)
-    google_news = fetch_google_news(args.topic, args.max_google)
-    all_news = rss_news + google_news
+    rss_news = fetch_rss_news(rss_urls, max_per_feed, default_category=topic, scheduler=scheduler)
+    google_news = fetch_google_news(topic, max_google, scheduler=scheduler)
+    newsapi_news = newsapi_source.fetch_newsapi_news(newsapi_key, newsapi_countries, newsapi_categories, scheduler=scheduler)
+    all_news = rss_news + google_news + newsapi_news
+    if scheduler:
+        scheduler.save()
+    if not all_news:
+        logging.info("No new articles from due sources.")
+        return {}
+    # Sources without a publication time are dated at ingest, so /api/search date filters still apply
+    ingested_at = time.strftime(DATE_FORMAT, time.gmtime())
+    for news in all_news:
+        news['date_published'] = news.get('date_published') or ingested_at
     all_news = enrich_with_article_text(all_news)
+    # Classify the whole batch once at ingest; the feed's own category is kept as source_category
+    for news in all_news:
+        news['source_category'] = news.get('category')
+    categorizer.categorize_articles(all_news)
 
     # Force output to all_news.json and all_news.csv at project root
-    json_path = os.path.abspath(os.path.join(os.path.dirname(__file__), 'all_news.json'))
-    csv_path = os.path.abspath(os.path.join(os.path.dirname(__file__), 'all_news.csv'))
+    json_path = os.path.join(BASE_DIR, 'all_news.json')
+    csv_path = os.path.join(BASE_DIR, 'all_news.csv')
     save_news(all_news, json_path=json_path, csv_path=csv_path)
 
-    rss_news = fetch_rss_news(args.rss, args.max_per_feed, default_category=args.topic)
-    google_news = fetch_google_news(args.topic, args.max_google)
-    all_news = rss_news + google_news
-
-    # Process and save each news item one by one
-    import os
-    import csv
-    from collections import defaultdict
-    import re
-    import subprocess
     category_dict = defaultdict(list)
     for news in all_news:
-        enriched = enrich_with_article_text([news])[0]
-        category = enriched.get('category', 'general')
-        category_dict[category].append(enriched)
+        category = news.get('category', 'general')
+        category_dict[category].append(news)
 
     # Create 'news bucket' directory if it doesn't exist
     bucket_dir = os.path.join(os.getcwd(), 'news bucket')
     if not os.path.exists(bucket_dir):
         os.makedirs(bucket_dir)
+    bucket_paths = {}
     for category, items in category_dict.items():
         # Clean category name for filename
         safe_category = re.sub(r'[^A-Za-z0-9_\-]', '_', category.lower())
         json_path = os.path.join(bucket_dir, f'news_{safe_category}.json')
         csv_path = os.path.join(bucket_dir, f'news_{safe_category}.csv')
         save_news(items, json_path, csv_path)
-        # Optionally run Gemini enhancer
-        if args.gemini_enhance:
-            gemini_args = [
-                'python', 'gemini_news_enhancer.py',
-                '--news_json', json_path,
-                '--output_json', os.path.join(bucket_dir, f'news_{safe_category}_gemini.json'),
-                '--output_csv', os.path.join(bucket_dir, f'news_{safe_category}_gemini.csv')
-            ]
-            if args.gemini_key:
-                gemini_args += ['--gemini_key', args.gemini_key]
-            if args.unsplash_key:
-                gemini_args += ['--unsplash_key', args.unsplash_key]
+        bucket_paths[category] = json_path
+        # Optionally run Gemini enhancer (in-process, sharing its warm clients and caches)
+        if gemini_enhance:
+            from gemini_news_enhancer import enhance_news_file
             logging.info(f"Running Gemini enhancer for {json_path} ...")
             try:
-                subprocess.run(gemini_args, check=True)
+                enhance_news_file(
+                    json_path,
+                    os.path.join(bucket_dir, f'news_{safe_category}_gemini.json'),
+                    os.path.join(bucket_dir, f'news_{safe_category}_gemini.csv'),
+                    gemini_key, unsplash_key,
+                )
             except Exception as e:
                 logging.error(f"Gemini enhancer failed for {json_path}: {e}")
+    return bucket_paths
 
 if __name__ == "__main__":
     main()
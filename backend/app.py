@@ -1,16 +1,85 @@
-from flask import Flask, jsonify, send_from_directory, abort, request
+from flask import Flask, jsonify, send_from_directory, abort, request, g, Response
 from flask_cors import CORS
 import os
-import json
-import subprocess
+import sys
+import time
+
+# Shared pipeline modules (metrics, ...) live in the project root
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import metrics
+import article_store
+import search_index
+import update_jobs
 
 app = Flask(__name__)
 CORS(app)
 
-NEWS_BUCKET_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '../news bucket'))
-IMAGES_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '../images'))
+NEWS_BUCKET_DIR = os.path.abspath(os.environ.get('PEN_NEWS_BUCKET_DIR') or os.path.join(os.path.dirname(__file__), '../news bucket'))
+IMAGES_DIR = os.path.abspath(os.environ.get('PEN_IMAGES_DIR') or os.path.join(os.path.dirname(__file__), '../images'))
 DEFAULT_IMAGE = os.path.join(IMAGES_DIR, 'default.png')
 
+# Optional per-request profiling: PEN_PROFILE=cprofile|pyinstrument, sampled at
+# PEN_PROFILE_SAMPLE (fraction of requests), results written to PEN_PROFILE_DIR
+PROFILE_MODE = os.environ.get('PEN_PROFILE', '').lower()
+PROFILE_SAMPLE = float(os.environ.get('PEN_PROFILE_SAMPLE', '1.0'))
+PROFILE_DIR = os.environ.get('PEN_PROFILE_DIR', os.path.join(os.path.dirname(__file__), 'profiles'))
+
+def start_profiler():
+    import random
+    if not PROFILE_MODE or random.random() >= PROFILE_SAMPLE:
+        return None
+    if PROFILE_MODE == 'pyinstrument':
+        from pyinstrument import Profiler
+        profiler = Profiler()
+        profiler.start()
+    else:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+    return profiler
+
+def stop_profiler(profiler, endpoint):
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    name = f"{endpoint.strip('/').replace('/', '_').replace('<', '').replace('>', '') or 'root'}_{time.time():.6f}"
+    if PROFILE_MODE == 'pyinstrument':
+        profiler.stop()
+        with open(os.path.join(PROFILE_DIR, name + '.html'), 'w', encoding='utf-8') as f:
+            f.write(profiler.output_html())
+    else:
+        profiler.disable()
+        profiler.dump_stats(os.path.join(PROFILE_DIR, name + '.prof'))
+
+@app.before_request
+def start_timer():
+    g.request_start = time.perf_counter()
+    g.profiler = start_profiler()
+
+@app.after_request
+def record_request_metrics(response):
+    start = getattr(g, 'request_start', None)
+    if start is not None:
+        endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+        profiler = getattr(g, 'profiler', None)
+        if profiler is not None:
+            # Streamed bodies (e.g. /api/news) are produced after this hook
+            # returns, so only stop profiling once the response is closed
+            response.call_on_close(lambda: stop_profiler(profiler, endpoint))
+        metrics.histogram('http_request_seconds', 'API request latency').observe(
+            time.perf_counter() - start, endpoint=endpoint, method=request.method)
+        metrics.counter('http_requests_total', 'API requests by status').inc(
+            endpoint=endpoint, method=request.method, status=response.status_code)
+    return response
+
+@app.route('/metrics')
+def prometheus_metrics():
+    # This process's metrics plus the last snapshot written by the pipeline
+    snapshots, sources = [metrics.snapshot()], ['backend']
+    pipeline = metrics.load_summary()
+    if pipeline and pipeline.get('snapshot'):
+        snapshots.append(pipeline['snapshot'])
+        sources.append('pipeline')
+    return Response(metrics.render_prometheus(snapshots, sources), mimetype='text/plain; version=0.0.4')
+
 @app.route('/images/<path:filename>')
 def serve_image(filename):
     import os
@@ -21,149 +90,133 @@ def serve_image(filename):
         # Serve default image if requested file is missing
         return send_from_directory(IMAGES_DIR, 'default.png')
 
-@app.route('/api/news', methods=['GET'])
-def get_news():
+# Streamed /api/news responses are flushed in chunks of about this size
+STREAM_CHUNK_BYTES = 64 * 1024
+
+def stream_articles(store, ndjson=False, full=False, category=None):
+    """Yield the archive as a JSON array (or NDJSON) built from the store's per-article fragments."""
+    start = time.perf_counter()
     try:
-        # Aggregate all news from all .json files in NEWS_BUCKET_DIR
-        news = []
-        import glob
-        for file in glob.glob(os.path.join(NEWS_BUCKET_DIR, '*.json')):
-            try:
-                with open(file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    if isinstance(data, list):
-                        news.extend(data)
-                    elif isinstance(data, dict):
-                        news.append(data)
-            except Exception as e:
-                continue  # Skip bad files
-        # Enhance news items with tags and category if missing
-        import re
-        def clean_text(text):
-            if not text:
-                return text
-            text = re.sub(r'\*\*', '', text)
-            # Remove non-ASCII and emoji characters
-            text = re.sub(r'[^\w\s.,!?\'\"-]', '', text)
-            text = re.sub(r'\s+', ' ', text).strip()
-            return text
-        categories = {
-            'sports': ['football', 'cricket', 'tennis', 'sports', 'game', 'match'],
-            'business': ['business', 'stock', 'market', 'finance', 'company'],
-            'technology': ['tech', 'ai', 'robot', 'software', 'hardware', 'technology'],
-            'science': ['science', 'research', 'study', 'scientist'],
-            'entertainment': ['movie', 'film', 'music', 'celebrity', 'entertainment'],
-            'world': ['world', 'international', 'global', 'war', 'country'],
-            'health': ['health', 'covid', 'virus', 'doctor', 'hospital'],
-            'politics': ['election', 'government', 'politics', 'minister', 'policy'],
-            'crime': ['crime', 'attack', 'police', 'court', 'arrest', 'murder'],
-            'environment': ['climate', 'environment', 'pollution', 'wildlife', 'nature'],
-            'sports:football': ['football', 'soccer', 'premier league', 'fifa'],
-            'sports:cricket': ['cricket', 'ipl', 'test match', 'odi'],
-            'business:markets': ['stock market', 'share', 'index', 'sensex', 'nifty'],
-        }
-        def infer_category_and_subcategory(item):
-            text = (item.get('seo_headline') or item.get('heading') or '').lower() + ' ' + (item.get('summary') or '')
-            for cat, keywords in categories.items():
-                if any(word in text for word in keywords):
-                    if ':' in cat:
-                        main_cat, sub_cat = cat.split(':', 1)
-                        return main_cat.capitalize(), sub_cat.capitalize()
-                    return cat.capitalize(), None
-            return 'General', None
-        def infer_tags(item):
-            import collections
-            if item.get('tags'):
-                return item['tags']
-            text = (item.get('seo_headline') or item.get('heading') or '') + ' ' + (item.get('summary') or '')
-            words = [w.strip('.,!?').capitalize() for w in text.split() if len(w) > 4]
-            common = [w for w, _ in collections.Counter(words).most_common(5)]
-            return common
-        def clean_tags(tags):
-            # Accepts either a list or a comma-separated string
-            if isinstance(tags, str):
-                tags = [t.strip() for t in tags.split(',')]
-            cleaned = []
-            for tag in tags:
-                if (
-                    isinstance(tag, str) and
-                    1 < len(tag) < 40 and
-                    not any(x in tag.lower() for x in [
-                        'here are', 'based on', 'tags for', 'summary:', 'headline', 'partial', 'news article'
-                    ]) and
-                    tag[0].isalpha()  # starts with a letter
-                ):
-                    cleaned.append(tag)
-            return cleaned
-        for item in news:
-            # Clean paraphrased fields
-            if item.get('seo_headline'):
-                item['seo_headline'] = clean_text(item['seo_headline'])
-            if item.get('rewritten_summary'):
-                item['rewritten_summary'] = clean_text(item['rewritten_summary'])
-            # Tags: always a list of strings, no weird objects
-            if not item.get('tags') or not isinstance(item['tags'], (list, str)):
-                item['tags'] = infer_tags(item)
-            item['tags'] = clean_tags(item['tags'])
-            # Remove any non-string tags
-            item['tags'] = [t for t in item['tags'] if isinstance(t, str)]
-            # Category and subcategory: always capitalized
-            cat, subcat = infer_category_and_subcategory(item)
-            item['category'] = cat
-            item['subcategory'] = subcat
-            # Date published (try to infer or set default)
-            if not item.get('date_published'):
-                item['date_published'] = item.get('date') or item.get('pubDate') or ''
-            # Image: only filename, not path, and must exist in images bucket/general
-            image_filename = os.path.basename(item.get('image', '').strip()) if item.get('image') else ''
-            image_path = os.path.join(IMAGES_DIR, image_filename) if image_filename else ''
-            # If explicit image field and file exists, use it
-            if image_filename and os.path.isfile(image_path):
-                item['image'] = image_filename
+        yield b'' if ndjson else b'['
+        chunk, size = [], 0
+        serialize = store.full_fragment if full else store.fragment
+        for n, index in enumerate(store.indices(category)):
+            fragment = serialize(index)
+            if ndjson:
+                chunk.append(fragment + b'\n')
             else:
-                # Try to find an image by UUID (news_id)
-                news_id = item.get('news_id', '').strip()
-                found_image = ''
-                for ext in ['.jpg', '.jpeg', '.png']:
-                    candidate = f"{news_id}{ext}"
-                    candidate_path = os.path.join(IMAGES_DIR, candidate)
-                    if news_id and os.path.isfile(candidate_path):
-                        found_image = candidate
-                        break
-                item['image'] = found_image  # Only set if real file exists, else ''
-            # Ensure required fields exist
-            for key in ['news_id','heading','summary','link','category','date_published','image']:
-                if key not in item:
-                    item[key] = ''
-        return jsonify(news)
-
+                chunk.append(b',' + fragment if n else fragment)
+            size += len(fragment)
+            if size >= STREAM_CHUNK_BYTES:
+                yield b''.join(chunk)
+                chunk, size = [], 0
+        if not ndjson:
+            chunk.append(b']')
+        if chunk:
+            yield b''.join(chunk)
+    finally:
+        metrics.histogram('news_phase_seconds', 'Time per /api/news phase').observe(
+            time.perf_counter() - start, phase='stream')
 
+@app.route('/api/news', methods=['GET'])
+def get_news():
+    """
+    All articles without their full text (?full=1 includes it), optionally
+    filtered by ?category=, or only those listed in ?ids=a,b (e.g. the ids
+    pushed by /api/update-content/events). Streamed by default as a JSON array, or as NDJSON
+    with ?format=ndjson; ?stream=0 builds the whole response in memory instead.
+    """
+    try:
+        phases = metrics.histogram('news_phase_seconds', 'Time per /api/news phase')
+        with phases.time(phase='refresh_check'):
+            store = article_store.get_store(NEWS_BUCKET_DIR, IMAGES_DIR)
+        full = request.args.get('full') == '1'
+        category = request.args.get('category')
+        if request.args.get('ids'):
+            items = (store.get(news_id, full) for news_id in request.args['ids'].split(','))
+            return jsonify([item for item in items if item is not None])
+        if request.args.get('stream', '1') == '0':
+            with phases.time(phase='serialize'):
+                response = jsonify([store.item(index, full) for index in store.indices(category)])
+            return response
+        if request.args.get('format') == 'ndjson':
+            return Response(stream_articles(store, True, full, category), mimetype='application/x-ndjson')
+        return Response(stream_articles(store, False, full, category), mimetype='application/json')
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/news/<news_id>', methods=['GET'])
 def get_news_item(news_id):
     try:
-        # Aggregate all news from all .json files in NEWS_BUCKET_DIR
-        news = []
-        import glob
-        for file in glob.glob(os.path.join(NEWS_BUCKET_DIR, '*.json')):
-            try:
-                with open(file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    if isinstance(data, list):
-                        news.extend(data)
-                    elif isinstance(data, dict):
-                        news.append(data)
-            except Exception:
-                continue
-        for item in news:
-            if str(item.get('news_id')) == str(news_id):
-                return jsonify(item)
+        item = article_store.get_store(NEWS_BUCKET_DIR, IMAGES_DIR).get(news_id)
+        if item is not None:
+            return jsonify(item)
         return jsonify({'error': 'News item not found'}), 404
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/search', methods=['GET'])
+def search_news():
+    try:
+        query = request.args.get('q', '').strip()
+        page = request.args.get('page', 1, type=int)
+        per_page = request.args.get('per_page', 20, type=int)
+        store = article_store.get_store(NEWS_BUCKET_DIR, IMAGES_DIR)
+        total, news_ids = search_index.search(
+            search_index.index_path(NEWS_BUCKET_DIR), query,
+            category=request.args.get('category'),
+            date_from=request.args.get('from'),
+            date_to=request.args.get('to'),
+            page=page, per_page=per_page,
+        )
+        results = []
+        for news_id in news_ids:
+            item = store.get(news_id, full=False)
+            if item is not None:
+                results.append(item)
+        return jsonify({'query': query, 'total': total, 'page': page, 'per_page': per_page, 'results': results})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/news/<news_id>/related', methods=['GET'])
+def get_related_news(news_id):
+    try:
+        limit = request.args.get('limit', 5, type=int)
+        store = article_store.get_store(NEWS_BUCKET_DIR, IMAGES_DIR)
+        if str(news_id) not in store.by_id:
+            return jsonify({'error': 'News item not found'}), 404
+        neighbours = article_store.get_related_index().get('related', {}).get(str(news_id), [])
+        results = []
+        for entry in neighbours[:max(0, limit)]:
+            item = store.get(entry['news_id'], full=False)
+            if item is not None:
+                item['similarity'] = entry['score']
+                results.append(item)
+        return jsonify({'news_id': news_id, 'results': results})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/trending', methods=['GET'])
+def get_trending():
+    try:
+        limit = request.args.get('limit', 10, type=int)
+        store = article_store.get_store(NEWS_BUCKET_DIR, IMAGES_DIR)
+        trending = article_store.get_related_index().get('trending', {})
+        articles = []
+        for news_id in trending.get('articles', []):
+            item = store.get(news_id, full=False)
+            if item is not None:
+                articles.append(item)
+            if len(articles) >= limit:
+                break
+        return jsonify({
+            'window_hours': trending.get('window_hours'),
+            'terms': trending.get('terms', [])[:limit],
+            'articles': articles,
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/images/<path:filename>', methods=['GET'])
 def get_image(filename):
     if os.path.exists(os.path.join(IMAGES_DIR, filename)):
@@ -174,20 +227,50 @@ def get_image(filename):
 # --- Secure update-content endpoint ---
 @app.route('/api/update-content', methods=['POST'])
 def update_content():
-    data = request.get_json(force=True)
+    """
+    Queue a pipeline run and return at once (202) with its job id. Only one
+    pipeline runs at a time; triggers while one runs are merged into a single
+    queued job. Follow it with /api/update-content/jobs/<id> or the event stream.
+    """
+    data = request.get_json(force=True, silent=True) or {}
     secret = data.get('secret')
     # Set your secret key here
     SECRET_KEY = os.environ.get('UPDATE_SECRET', 'pen_secret_123')
     if secret != SECRET_KEY:
         return jsonify({'error': 'Unauthorized'}), 401
     try:
-        result = subprocess.run(['python', '../update_content.py'], capture_output=True, text=True)
-        if result.returncode == 0:
-            return jsonify({'status': 'success', 'output': result.stdout})
-        else:
-            return jsonify({'status': 'error', 'output': result.stderr}), 500
+        job, coalesced = update_jobs.submit(NEWS_BUCKET_DIR)
     except Exception as e:
         return jsonify({'status': 'error', 'output': str(e)}), 500
+    response = jsonify({'job_id': job['id'], 'status': job['status'], 'coalesced': coalesced,
+                        'status_url': f"/api/update-content/jobs/{job['id']}",
+                        'events_url': f"/api/update-content/events?job_id={job['id']}"})
+    response.status_code = 202
+    response.headers['Location'] = f"/api/update-content/jobs/{job['id']}"
+    return response
+
+@app.route('/api/update-content/jobs/<job_id>', methods=['GET'])
+def update_content_status(job_id):
+    job = update_jobs.get_job(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job)
+
+@app.route('/api/update-content/events', methods=['GET'])
+def update_content_events():
+    """Server-Sent Events: 'job' status changes and 'articles' with newly enhanced ids (?job_id= for one job)."""
+    job_id = request.args.get('job_id')
+    if job_id and update_jobs.get_job(job_id) is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return Response(update_jobs.events(job_id), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+def preload():
+    """Load the article store up front (called by gunicorn before forking workers)."""
+    article_store.get_related_index()
+    return article_store.load_store(NEWS_BUCKET_DIR, IMAGES_DIR)
 
 if __name__ == '__main__':
-    app.run(debug=True)
+    # Development server; use gunicorn -c gunicorn.conf.py app:app in production
+    app.run(host=os.environ.get('HOST', '127.0.0.1'), port=int(os.environ.get('PORT', 5000)),
+            debug=os.environ.get('FLASK_ENV') != 'production')
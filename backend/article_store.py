@@ -0,0 +1,343 @@
+import os
+import re
+import glob
+import json
+import time
+import logging
+import sys
+import mmap
+import array
+import tempfile
+import collections
+import threading
+
+import metrics
+import categorizer
+import search_index
+
+# In-memory article store for the API. All bucket JSON files are loaded and
+# normalized once (at import/preload time under gunicorn, so forked workers
+# share the pages copy-on-write) and rebuilt only when a bucket file changes.
+AUTO_REFRESH = os.environ.get('ARTICLE_STORE_AUTO_REFRESH', '1') != '0'
+# Large text fields kept out of the in-memory records (see ArticleStore)
+HEAVY_FIELDS = ('full_text', 'rewritten_full_text', 'image_prompt')
+# Pipeline bookkeeping kept in the bucket files but never served to clients
+INTERNAL_FIELDS = ('category_version',)
+TEXT_BLOB_DIR = os.environ.get('PEN_TEXT_BLOB_DIR') or None
+# Related/trending lists precomputed offline by related_index.py
+RELATED_INDEX_PATH = os.environ.get('PEN_RELATED_INDEX') or os.path.abspath(
+    os.path.join(os.path.dirname(__file__), '..', 'related_index.json'))
+
+def clean_text(text):
+    if not text:
+        return text
+    text = re.sub(r'\*\*', '', text)
+    # Remove non-ASCII and emoji characters
+    text = re.sub(r'[^\w\s.,!?\'\"-]', '', text)
+    text = re.sub(r'\s+', ' ', text).strip()
+    return text
+
+categories = categorizer.CATEGORIES
+
+def infer_category_and_subcategory(item):
+    return categorizer.get_categorizer().classify(item)
+
+def infer_tags(item):
+    if item.get('tags'):
+        return item['tags']
+    text = (item.get('seo_headline') or item.get('heading') or '') + ' ' + (item.get('summary') or '')
+    words = [w.strip('.,!?').capitalize() for w in text.split() if len(w) > 4]
+    common = [w for w, _ in collections.Counter(words).most_common(5)]
+    return common
+
+def clean_tags(tags):
+    # Accepts either a list or a comma-separated string
+    if isinstance(tags, str):
+        tags = [t.strip() for t in tags.split(',')]
+    cleaned = []
+    for tag in tags:
+        if (
+            isinstance(tag, str) and
+            1 < len(tag) < 40 and
+            not any(x in tag.lower() for x in [
+                'here are', 'based on', 'tags for', 'summary:', 'headline', 'partial', 'news article'
+            ]) and
+            tag[0].isalpha()  # starts with a letter
+        ):
+            cleaned.append(tag)
+    return cleaned
+
+def resolve_image(item, images_dir):
+    # Image: only filename, not path, and must exist in images_dir
+    image_filename = os.path.basename(item.get('image', '').strip()) if item.get('image') else ''
+    image_path = os.path.join(images_dir, image_filename) if image_filename else ''
+    # If explicit image field and file exists, use it
+    if image_filename and os.path.isfile(image_path):
+        return image_filename
+    # Try to find an image by UUID (news_id)
+    news_id = item.get('news_id', '').strip()
+    for ext in ['.jpg', '.jpeg', '.png']:
+        candidate = f"{news_id}{ext}"
+        if news_id and os.path.isfile(os.path.join(images_dir, candidate)):
+            return candidate
+    return ''  # Only set if real file exists, else ''
+
+def normalize_article(item, images_dir):
+    # Clean paraphrased fields
+    if item.get('seo_headline'):
+        item['seo_headline'] = clean_text(item['seo_headline'])
+    if item.get('rewritten_summary'):
+        item['rewritten_summary'] = clean_text(item['rewritten_summary'])
+    # Tags: always a list of strings, no weird objects
+    if not item.get('tags') or not isinstance(item['tags'], (list, str)):
+        item['tags'] = infer_tags(item)
+    item['tags'] = clean_tags(item['tags'])
+    # Remove any non-string tags
+    item['tags'] = [t for t in item['tags'] if isinstance(t, str)]
+    # Category and subcategory are set in batch by the store (or at ingest)
+    item.setdefault('subcategory', None)
+    # Date published (try to infer or set default)
+    if not item.get('date_published'):
+        item['date_published'] = item.get('date') or item.get('pubDate') or ''
+    # Ensure required fields exist
+    for key in ['news_id','heading','summary','link','category','date_published','image']:
+        if key not in item:
+            item[key] = ''
+    return item
+
+def bucket_signature(bucket_dir):
+    """Cheap change detector: (path, mtime, size) of every bucket JSON file."""
+    signature = []
+    for file in sorted(glob.glob(os.path.join(bucket_dir, '*.json'))):
+        try:
+            st = os.stat(file)
+            signature.append((file, st.st_mtime_ns, st.st_size))
+        except OSError:
+            continue
+    return tuple(signature)
+
+def iter_bucket_files(bucket_dir):
+    # Articles of each .json file in bucket_dir, one file at a time
+    for file in glob.glob(os.path.join(bucket_dir, '*.json')):
+        try:
+            with open(file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except Exception:
+            continue  # Skip bad files
+        if isinstance(data, list):
+            # Skip malformed entries rather than failing the whole rebuild
+            yield [item for item in data if isinstance(item, dict)]
+        elif isinstance(data, dict):
+            yield [data]
+
+def load_bucket(bucket_dir):
+    # Aggregate all news from all .json files in bucket_dir
+    news = []
+    for articles in iter_bucket_files(bucket_dir):
+        news.extend(articles)
+    return news
+
+def dumps(item):
+    return json.dumps(item, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+class ArticleStore:
+    """
+    Compact, read-only view of the normalized archive. Per article only the
+    serialized JSON of its light fields is kept, plus interned columns used for
+    filtering; HEAVY_FIELDS text lives in an anonymous memory-mapped blob that
+    is paged in lazily (and shared by forked workers) when a detail view reads it.
+    """
+    def __init__(self, bucket_dir, images_dir):
+        self.bucket_dir = bucket_dir
+        self.images_dir = images_dir
+        self.signature = bucket_signature(bucket_dir)
+        self.ids = []
+        self.categories = []
+        self.fragments = []
+        # (offset, length) per article and heavy field; offset -1 when the field is absent
+        self.text_spans = array.array('q')
+        self._blob = tempfile.TemporaryFile(dir=TEXT_BLOB_DIR)
+        self._blob_size = 0
+        # Keep the full-text index in step with the bucket (only changed articles are rewritten)
+        try:
+            syncer = search_index.IndexSync(search_index.index_path(bucket_dir))
+        except Exception as e:
+            logging.warning(f"Search index sync failed: {e}")
+            syncer = None
+        # Bucket files are processed one at a time so the raw dicts of the whole
+        # archive are never alive together
+        phases = collections.Counter()
+        mark = time.perf_counter()
+
+        def lap(phase):
+            nonlocal mark
+            now = time.perf_counter()
+            phases[phase] += now - mark
+            mark = now
+
+        try:
+            version = categorizer.get_categorizer().version
+            for raw in iter_bucket_files(bucket_dir):
+                lap('load')
+                # Articles classified at ingest with the current keyword table are kept as-is
+                categorizer.categorize_articles([item for item in raw if item.get('category_version') != version])
+                lap('categorize')
+                stat_seconds = 0.0
+                for item in raw:
+                    normalize_article(item, images_dir)
+                    stat_start = time.perf_counter()
+                    item['image'] = resolve_image(item, images_dir)
+                    stat_seconds += time.perf_counter() - stat_start
+                lap('normalize')
+                phases['normalize'] -= stat_seconds
+                phases['stat'] += stat_seconds
+                if syncer is not None:
+                    try:
+                        for item in raw:
+                            syncer.add(item)
+                    except Exception as e:
+                        logging.warning(f"Search index sync failed: {e}")
+                        syncer.close()
+                        syncer = None
+                lap('index')
+                for item in raw:
+                    self._append(item)
+                raw.clear()
+                lap('compact')
+        except Exception:
+            # Never leave the index write lock held (or the blob open) after a failed rebuild
+            if syncer is not None:
+                syncer.close()
+            self._blob.close()
+            raise
+        if syncer is not None:
+            try:
+                syncer.finish()
+            except Exception as e:
+                logging.warning(f"Search index sync failed: {e}")
+        self._blob.flush()
+        self.text = mmap.mmap(self._blob.fileno(), 0, access=mmap.ACCESS_READ) if self._blob_size else b''
+        self._blob.close()  # the mapping keeps the (already unlinked) file alive
+        self._blob = None
+        # Later duplicates win
+        self.by_id = {news_id: index for index, news_id in enumerate(self.ids)}
+        build = metrics.histogram('article_store_build_seconds', 'Time per article store rebuild phase')
+        for phase, seconds in phases.items():
+            build.observe(seconds, phase=phase)
+        self.loaded_at = time.time()
+        metrics.gauge('news_articles', 'Articles in the news bucket').set(len(self.fragments))
+
+    def _append(self, item):
+        for field in INTERNAL_FIELDS:
+            item.pop(field, None)
+        for field in HEAVY_FIELDS:
+            value = item.pop(field, None)
+            if isinstance(value, str):
+                data = value.encode('utf-8')
+                self._blob.write(data)
+                self.text_spans.extend((self._blob_size, len(data)))
+                self._blob_size += len(data)
+            else:
+                if value is not None:
+                    item[field] = value
+                self.text_spans.extend((-1, 0))
+        self.ids.append(sys.intern(str(item.get('news_id'))))
+        self.categories.append(sys.intern(item.get('category') or ''))
+        self.fragments.append(dumps(item))
+
+    def __len__(self):
+        return len(self.fragments)
+
+    def fragment(self, index):
+        """UTF-8 JSON bytes of the light fields of article `index`."""
+        return self.fragments[index]
+
+    def heavy_text(self, index):
+        texts = {}
+        base = index * len(HEAVY_FIELDS) * 2
+        for i, field in enumerate(HEAVY_FIELDS):
+            offset, length = self.text_spans[base + 2 * i], self.text_spans[base + 2 * i + 1]
+            if offset >= 0:
+                texts[field] = self.text[offset:offset + length].decode('utf-8')
+        return texts
+
+    def item(self, index, full=True):
+        """A fresh dict for article `index`; with full=True the heavy text fields are included."""
+        item = json.loads(self.fragments[index])
+        if full:
+            item.update(self.heavy_text(index))
+        return item
+
+    def full_fragment(self, index):
+        return dumps(self.item(index))
+
+    def get(self, news_id, full=True):
+        index = self.by_id.get(str(news_id))
+        return None if index is None else self.item(index, full)
+
+    def indices(self, category=None):
+        if not category:
+            return range(len(self.fragments))
+        category = category.lower()
+        return [i for i, c in enumerate(self.categories) if c.lower() == category]
+
+    @property
+    def articles(self):
+        """Every article as a full dict (builds them all; prefer fragment()/get())."""
+        return [self.item(index) for index in range(len(self.fragments))]
+
+_store = None
+_lock = threading.Lock()
+
+def _build(bucket_dir, images_dir):
+    global _store
+    store = ArticleStore(bucket_dir, images_dir)
+    _store = store
+    metrics.counter('article_store_reloads_total', 'Article store rebuilds').inc()
+    return store
+
+def _is_current(store, bucket_dir, images_dir):
+    if store is None or store.bucket_dir != bucket_dir or store.images_dir != images_dir:
+        return False
+    return not AUTO_REFRESH or bucket_signature(bucket_dir) == store.signature
+
+def load_store(bucket_dir, images_dir):
+    """Build a fresh store and make it current."""
+    with _lock:
+        return _build(bucket_dir, images_dir)
+
+def get_store(bucket_dir, images_dir):
+    """
+    Return the current store, building it on first use or when the directories
+    change. With AUTO_REFRESH it is also rebuilt when a bucket file changes.
+    The rebuild happens under the lock and the check is repeated once it is
+    held, so concurrent requests wait for one rebuild and then reuse it.
+    """
+    store = _store
+    if _is_current(store, bucket_dir, images_dir):
+        return store
+    with _lock:
+        store = _store
+        if _is_current(store, bucket_dir, images_dir):
+            return store
+        return _build(bucket_dir, images_dir)
+
+_related = (None, {'related': {}, 'trending': {}})
+
+def get_related_index(path=RELATED_INDEX_PATH):
+    """The precomputed related/trending index, reloaded only when the file changes."""
+    global _related
+    try:
+        st = os.stat(path)
+        signature = (st.st_mtime_ns, st.st_size)
+    except OSError:
+        return _related[1]
+    if signature != _related[0]:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except Exception as e:
+            logging.warning(f"Could not load related index {path}: {e}")
+            return _related[1]
+        _related = (signature, data)
+    return _related[1]
@@ -0,0 +1,55 @@
+import os
+import gc
+import signal
+import threading
+import multiprocessing
+
+# Production serving profile: gunicorn -c gunicorn.conf.py app:app
+# The app (and its article store) is loaded once in the master before forking,
+# so every worker shares the loaded articles copy-on-write. Workers do not
+# rebuild the store themselves; the master watches the news bucket and, when a
+# file changes, rebuilds the store and gracefully replaces the workers (HUP).
+os.environ.setdefault('ARTICLE_STORE_AUTO_REFRESH', '0')
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+workers = int(os.environ.get('WEB_CONCURRENCY', min(4, multiprocessing.cpu_count() * 2 + 1)))
+threads = int(os.environ.get('GUNICORN_THREADS', '4'))
+worker_class = 'gthread'
+preload_app = True
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', '60'))
+graceful_timeout = 30
+keepalive = 5
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', '0'))
+max_requests_jitter = max_requests // 10
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG')  # e.g. '-' for stdout
+bucket_poll_interval = float(os.environ.get('BUCKET_POLL_INTERVAL', '5'))
+
+
+def _watch_bucket(server):
+    import app
+    import article_store
+    signature = article_store.bucket_signature(app.NEWS_BUCKET_DIR)
+    while True:
+        threading.Event().wait(bucket_poll_interval)
+        current = article_store.bucket_signature(app.NEWS_BUCKET_DIR)
+        if current == signature:
+            continue
+        signature = current
+        server.log.info('News bucket changed, reloading article store and workers')
+        try:
+            app.preload()
+            gc.freeze()
+        except Exception as e:
+            server.log.error(f'Article store reload failed: {e}')
+            continue
+        os.kill(os.getpid(), signal.SIGHUP)
+
+
+def when_ready(server):
+    import app
+    store = app.preload()
+    # Move preloaded objects out of the GC's tracked generations so collections
+    # in the workers don't touch (and un-share) their pages
+    gc.freeze()
+    server.log.info(f'Preloaded {len(store)} articles')
+    threading.Thread(target=_watch_bucket, args=(server,), daemon=True).start()
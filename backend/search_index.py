@@ -0,0 +1,199 @@
+import os
+import re
+import time
+import hashlib
+import sqlite3
+import threading
+
+import metrics
+
+# SQLite FTS5 index over the article archive, kept next to the bucket files.
+# It is synced incrementally from the article store: only articles whose
+# indexed fields changed are rewritten, and removed articles are deleted.
+INDEX_FILENAME = 'search_index.db'
+FIELDS = ('seo_headline', 'rewritten_summary', 'full_text', 'tags')
+# BM25 column weights, in FIELDS order
+WEIGHTS = (10.0, 5.0, 1.0, 3.0)
+MAX_PER_PAGE = 100
+
+_write_lock = threading.Lock()
+
+
+def index_path(bucket_dir):
+    return os.environ.get('PEN_SEARCH_INDEX') or os.path.join(bucket_dir, INDEX_FILENAME)
+
+
+def connect(path):
+    conn = sqlite3.connect(path, timeout=30)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute(
+        'CREATE TABLE IF NOT EXISTS articles ('
+        'rowid INTEGER PRIMARY KEY, news_id TEXT UNIQUE, category TEXT, date_published TEXT, content_hash TEXT)'
+    )
+    conn.execute(
+        'CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5('
+        + ', '.join(FIELDS) + ", tokenize='porter unicode61')"
+    )
+    conn.execute('CREATE INDEX IF NOT EXISTS articles_category ON articles(category, date_published)')
+    return conn
+
+
+def _field_values(item):
+    tags = item.get('tags') or []
+    return (
+        item.get('seo_headline') or item.get('heading') or '',
+        item.get('rewritten_summary') or item.get('summary') or '',
+        item.get('full_text') or item.get('rewritten_full_text') or '',
+        ', '.join(tags) if isinstance(tags, list) else str(tags),
+    )
+
+
+def _content_hash(item, values):
+    digest = hashlib.sha1()
+    for value in values + (item.get('category') or '', item.get('date_published') or ''):
+        digest.update(value.encode('utf-8', 'ignore'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+class IndexSync:
+    """
+    Incremental sync fed one article at a time, so callers can stream the
+    archive through it. add() hashes each article and finish() writes only the
+    articles whose indexed fields changed and deletes those that were not seen.
+    An id seen more than once (e.g. a raw and an enhanced bucket copy) is
+    indexed from its last copy, the same one the article store serves, so the
+    duplicates do not churn the index on every sync.
+    """
+    def __init__(self, path):
+        _write_lock.acquire()
+        self.start = time.perf_counter()
+        self.conn = None
+        try:
+            self.conn = connect(path)
+            self.existing = {news_id: (rowid, h) for rowid, news_id, h in
+                             self.conn.execute('SELECT rowid, news_id, content_hash FROM articles')}
+        except Exception:
+            if self.conn is not None:
+                self.conn.close()
+            _write_lock.release()
+            raise
+        # news_id -> row to write, or None when the last copy matches the index
+        self.pending = {}
+        self.changed = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        # No-op after finish(); otherwise drops uncommitted changes and releases the lock
+        self.close()
+        return False
+
+    def add(self, item):
+        if not item.get('news_id'):
+            return
+        news_id = str(item.get('news_id'))
+        values = _field_values(item)
+        content_hash = _content_hash(item, values)
+        old = self.existing.get(news_id)
+        if old and old[1] == content_hash:
+            self.pending[news_id] = None
+        else:
+            self.pending[news_id] = (
+                (item.get('category') or '').lower(), item.get('date_published') or '', content_hash, values)
+
+    def _upsert(self, news_id, category, date_published, content_hash, values):
+        old = self.existing.get(news_id)
+        if old:
+            _delete(self.conn, old[0])
+        cur = self.conn.execute(
+            'INSERT INTO articles (news_id, category, date_published, content_hash) VALUES (?, ?, ?, ?)',
+            (news_id, category, date_published, content_hash))
+        self.conn.execute(
+            f'INSERT INTO articles_fts (rowid, {", ".join(FIELDS)}) VALUES (?, ?, ?, ?, ?)',
+            (cur.lastrowid,) + values)
+        self.changed += 1
+
+    def finish(self):
+        """Write the changes, commit and close. Returns (inserted_or_updated, deleted)."""
+        try:
+            for news_id, row in self.pending.items():
+                if row is not None:
+                    self._upsert(news_id, *row)
+            removed = [rowid for news_id, (rowid, _) in self.existing.items() if news_id not in self.pending]
+            for rowid in removed:
+                _delete(self.conn, rowid)
+            self.conn.commit()
+            metrics.counter('search_index_updates_total', 'Articles (re)indexed').inc(self.changed)
+            metrics.histogram('search_index_sync_seconds', 'Time to sync the search index').observe(
+                time.perf_counter() - self.start)
+            return self.changed, len(removed)
+        finally:
+            self.close()
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+            _write_lock.release()
+
+
+def sync(articles, path):
+    """Bring the index in line with `articles`. Returns (inserted_or_updated, deleted)."""
+    with IndexSync(path) as syncer:
+        for item in articles:
+            syncer.add(item)
+        return syncer.finish()
+
+
+def _delete(conn, rowid):
+    conn.execute('DELETE FROM articles WHERE rowid = ?', (rowid,))
+    conn.execute('DELETE FROM articles_fts WHERE rowid = ?', (rowid,))
+
+
+def build_match_query(query):
+    """Turn free text into a safe FTS5 query: every term must match, the last one as a prefix."""
+    terms = re.findall(r'\w+', query or '', re.UNICODE)
+    if not terms:
+        return None
+    quoted = ['"' + t.replace('"', '""') + '"' for t in terms]
+    quoted[-1] += '*'
+    return ' '.join(quoted)
+
+
+def search(path, query, category=None, date_from=None, date_to=None, page=1, per_page=20):
+    """
+    Return (total, [news_id, ...]) ranked by BM25 for one page of results.
+    date_from/date_to compare against date_published (ISO 8601, stamped at
+    ingest), so articles saved without one are excluded by either filter.
+    """
+    match = build_match_query(query)
+    if not match or not os.path.exists(path):
+        return 0, []
+    per_page = max(1, min(per_page, MAX_PER_PAGE))
+    page = max(1, page)
+    where = ['articles_fts MATCH ?']
+    params = [match]
+    if category:
+        where.append('a.category = ?')
+        params.append(category.lower())
+    if date_from:
+        where.append('a.date_published >= ?')
+        params.append(date_from)
+    if date_to:
+        # Compare only as much of the timestamp as was given, so to=YYYY-MM-DD includes that whole day
+        where.append('substr(a.date_published, 1, length(?)) <= ?')
+        params.extend([date_to, date_to])
+    sql_from = ' FROM articles_fts JOIN articles a ON a.rowid = articles_fts.rowid WHERE ' + ' AND '.join(where)
+    weights = ', '.join(str(w) for w in WEIGHTS)
+    conn = sqlite3.connect(path, timeout=30)
+    try:
+        with metrics.timer('search_query_seconds', 'Search query latency'):
+            total = conn.execute('SELECT COUNT(*)' + sql_from, params).fetchone()[0]
+            rows = conn.execute(
+                f'SELECT a.news_id{sql_from} ORDER BY bm25(articles_fts, {weights}) LIMIT ? OFFSET ?',
+                params + [per_page, (page - 1) * per_page]).fetchall()
+    finally:
+        conn.close()
+    return total, [row[0] for row in rows]
@@ -0,0 +1,263 @@
+import os
+import sys
+import json
+import time
+import uuid
+import fcntl
+import shlex
+import subprocess
+import threading
+from contextlib import contextmanager
+
+# Background jobs for POST /api/update-content. The pipeline (update_content.py)
+# runs in a detached runner process, so a request only records a job and
+# returns its id, and the run survives gunicorn recycling the worker that
+# started it. Single flight across all workers: job state lives in one JSON
+# file guarded by an flock; while a pipeline is running, further triggers are
+# coalesced into one queued job that the runner starts when the current one
+# ends. The pipeline itself takes the same flock as the resident daemon
+# (pipeline_daemon.pipeline_lock), so a job waits for a daemon cycle in
+# progress. While a job runs, the runner appends the ids of newly enhanced
+# articles to it, and events() turns state changes into Server-Sent Events.
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+JOBS_PATH = os.environ.get('PEN_UPDATE_JOBS') or os.path.join(os.path.dirname(__file__), 'update_jobs.json')
+LOG_DIRNAME = 'update_logs'  # next to the jobs file, one log per job
+# The pipeline command can be replaced with PEN_UPDATE_COMMAND (e.g. to run it under nice)
+PIPELINE_COMMAND = shlex.split(os.environ.get('PEN_UPDATE_COMMAND', '')) or [sys.executable, os.path.join(ROOT_DIR, 'update_content.py')]
+JOB_HISTORY = 20
+POLL_INTERVAL = 2.0  # seconds between checks of the enhanced articles file
+EVENTS_POLL_INTERVAL = 1.0
+HEARTBEAT_INTERVAL = 15.0
+RECOVERY_INTERVAL = 5.0  # seconds between dead-runner checks in an open event stream
+FINISHED = ('succeeded', 'failed')
+
+
+def _empty_state():
+    return {'runner_pid': None, 'jobs': []}
+
+
+def load_state(path=None):
+    """Unlocked read; the file is only ever replaced atomically."""
+    path = path or JOBS_PATH
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return _empty_state()
+
+
+@contextmanager
+def locked_state(path=None):
+    """Exclusive read-modify-write of the job state, across processes."""
+    path = path or JOBS_PATH
+    with open(path + '.lock', 'a') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            state = load_state(path)
+            yield state
+            state['jobs'] = state['jobs'][-JOB_HISTORY:]
+            tmp_path = path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(state, f)
+            os.replace(tmp_path, path)
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def pid_alive(pid):
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def find_job(state, job_id):
+    return next((job for job in state['jobs'] if job['id'] == job_id), None)
+
+
+def get_job(job_id, path=None):
+    return find_job(recover(path), job_id)
+
+
+def _runner_died(state):
+    if state['runner_pid']:
+        return not pid_alive(state['runner_pid'])
+    return any(job['status'] == 'running' for job in state['jobs'])
+
+
+def _recover(state, now):
+    """Fail jobs left running by a runner that died."""
+    if state['runner_pid'] and not pid_alive(state['runner_pid']):
+        state['runner_pid'] = None
+    if not state['runner_pid']:
+        for job in state['jobs']:
+            if job['status'] == 'running':
+                job.update(status='failed', finished=now, error='runner exited unexpectedly')
+
+
+def recover(path=None):
+    """
+    Return the job state, first failing jobs left running by a dead runner.
+    The lock is only taken (and the file rewritten) when recovery is needed.
+    """
+    state = load_state(path)
+    if _runner_died(state):
+        with locked_state(path) as state:
+            _recover(state, time.time())
+    return state
+
+
+def submit(news_bucket_dir, path=None, now=None):
+    """
+    Record a pipeline run. Returns (job, coalesced): coalesced is True when the
+    trigger was merged into a job that is already queued.
+    """
+    path = path or JOBS_PATH
+    now = now or time.time()
+    with locked_state(path) as state:
+        _recover(state, now)
+        queued = next((job for job in state['jobs'] if job['status'] == 'queued'), None)
+        if queued is not None:
+            queued['triggers'] += 1
+            return dict(queued), True
+        job = {
+            'id': uuid.uuid4().hex, 'status': 'queued', 'created': now, 'started': None, 'finished': None,
+            'triggers': 1, 'returncode': None, 'error': None, 'new_ids': [],
+        }
+        state['jobs'].append(job)
+        if not state['runner_pid']:
+            state['runner_pid'] = spawn_runner(news_bucket_dir, path)
+        return dict(job), False
+
+
+def spawn_runner(news_bucket_dir, path):
+    proc = subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), 'run', path, news_bucket_dir],
+        cwd=ROOT_DIR, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        start_new_session=True)
+    # Reap it when it exits, so it does not linger as a zombie that looks alive
+    threading.Thread(target=proc.wait, daemon=True).start()
+    return proc.pid
+
+
+def enhanced_ids(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return [item['news_id'] for item in json.load(f) if isinstance(item, dict) and item.get('news_id')]
+    except (OSError, ValueError):
+        return []
+
+
+def run_job(job_id, path, news_bucket_dir):
+    """Run the pipeline once, appending newly enhanced article ids to the job as they appear."""
+    enhanced_path = os.path.join(news_bucket_dir, 'enhanced_news.json')
+    known = set(enhanced_ids(enhanced_path))
+    signature = None
+    log_dir = os.path.join(os.path.dirname(os.path.abspath(path)), LOG_DIRNAME)
+    os.makedirs(log_dir, exist_ok=True)
+    log_path = os.path.join(log_dir, f'{job_id}.log')
+    with open(log_path, 'w', encoding='utf-8') as log:
+        proc = subprocess.Popen(PIPELINE_COMMAND, cwd=ROOT_DIR, stdin=subprocess.DEVNULL, stdout=log, stderr=subprocess.STDOUT)
+        while True:
+            returncode = proc.poll()
+            try:
+                st = os.stat(enhanced_path)
+                current = (st.st_mtime_ns, st.st_size)
+            except OSError:
+                current = None
+            if current != signature:
+                signature = current
+                new_ids = [i for i in enhanced_ids(enhanced_path) if i not in known]
+                if new_ids:
+                    known.update(new_ids)
+                    with locked_state(path) as state:
+                        find_job(state, job_id)['new_ids'].extend(new_ids)
+            if returncode is not None:
+                break
+            time.sleep(POLL_INTERVAL)
+    with open(log_path, 'r', encoding='utf-8', errors='replace') as f:
+        lines = [line.strip() for line in f if line.strip()]
+    return returncode, (lines[-1] if lines and returncode else None)
+
+
+def run(path, news_bucket_dir):
+    """Runner process: start queued jobs one at a time until none is left."""
+    while True:
+        with locked_state(path) as state:
+            job = next((job for job in state['jobs'] if job['status'] == 'queued'), None)
+            if job is None:
+                # Decided under the lock, so a concurrent submit() starts a new runner
+                state['runner_pid'] = None
+                return
+            state['runner_pid'] = os.getpid()
+            job.update(status='running', started=time.time())
+            job_id = job['id']
+        try:
+            returncode, error = run_job(job_id, path, news_bucket_dir)
+        except Exception as e:
+            returncode, error = None, str(e)
+        with locked_state(path) as state:
+            find_job(state, job_id).update(
+                status='succeeded' if returncode == 0 else 'failed', finished=time.time(),
+                returncode=returncode, error=error)
+
+
+def sse(event, data):
+    return f'event: {event}\ndata: {json.dumps(data)}\n\n'
+
+
+def events(job_id=None, path=None, poll=EVENTS_POLL_INTERVAL, heartbeat=HEARTBEAT_INTERVAL):
+    """
+    Server-Sent Events: 'job' when a job changes status and 'articles' with the
+    ids of newly enhanced articles. With job_id, that job's ids so far are sent
+    first and the stream ends once it has finished; otherwise only changes after
+    connecting are sent, indefinitely.
+    """
+    path = path or JOBS_PATH
+    seen = {}  # job id -> (status, number of ids sent)
+    if job_id is None:
+        seen = {job['id']: (job['status'], len(job['new_ids'])) for job in load_state(path)['jobs']}
+    signature, last_sent, last_recovery = None, time.monotonic(), time.monotonic()
+    yield 'retry: 5000\n\n'
+    while True:
+        if time.monotonic() - last_recovery >= RECOVERY_INTERVAL:
+            # A dead runner never writes again; recovering rewrites the file,
+            # so the failed status is picked up below like any other change
+            recover(path)
+            last_recovery = time.monotonic()
+        try:
+            st = os.stat(path)
+            current = (st.st_mtime_ns, st.st_size)
+        except OSError:
+            current = None
+        if current != signature:
+            signature = current
+            for job in load_state(path)['jobs']:
+                if job_id is not None and job['id'] != job_id:
+                    continue
+                status, sent = seen.get(job['id'], (None, 0))
+                if len(job['new_ids']) > sent:
+                    yield sse('articles', {'job_id': job['id'], 'ids': job['new_ids'][sent:]})
+                    last_sent = time.monotonic()
+                if job['status'] != status:
+                    yield sse('job', {k: v for k, v in job.items() if k != 'new_ids'})
+                    last_sent = time.monotonic()
+                seen[job['id']] = (job['status'], len(job['new_ids']))
+                if job_id is not None and job['status'] in FINISHED:
+                    return
+        if time.monotonic() - last_sent >= heartbeat:
+            yield ': keep-alive\n\n'
+            last_sent = time.monotonic()
+        time.sleep(poll)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) == 4 and sys.argv[1] == 'run':
+        run(sys.argv[2], sys.argv[3])
+    else:
+        sys.exit('usage: update_jobs.py run <jobs.json> <news bucket dir>')
@@ -0,0 +1,210 @@
+import json
+import time
+import random
+import struct
+import zlib
+import threading
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+# Local stand-ins for everything the pipeline talks to: RSS feeds, article
+# pages and robots.txt, a Gemini-like text/image endpoint and Unsplash.
+# Latency and 429 rates are configurable so retry/backoff paths are exercised.
+
+WORDS = (
+    'government market election climate research football company health police court minister '
+    'technology software robot film music global study hospital league policy energy city report '
+    'officials announced new plans after week growth investors players scientists data crisis'
+).split()
+
+
+def tiny_png(width=4, height=4):
+    """A small valid PNG, so image decoders accept the mock responses."""
+    raw = b''.join(b'\x00' + b'\x80\x80\x80' * width for _ in range(height))
+
+    def chunk(tag, data):
+        return struct.pack('>I', len(data)) + tag + data + struct.pack('>I', zlib.crc32(tag + data) & 0xffffffff)
+    return (b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0))
+            + chunk(b'IDAT', zlib.compress(raw)) + chunk(b'IEND', b''))
+
+
+def sentence(rng, n=12):
+    return ' '.join(rng.choice(WORDS) for _ in range(n)).capitalize() + '.'
+
+
+STREAM_CHUNK_CHARS = 80
+
+
+class FakeServerConfig:
+    def __init__(self, feeds=3, items_per_feed=10, paragraphs=6, latency=0.02, error_rate=0.0, seed=7,
+                 chars_per_second=2000.0):
+        self.feeds = feeds
+        self.items_per_feed = items_per_feed
+        self.paragraphs = paragraphs
+        self.latency = latency          # seconds added to each Gemini/Unsplash call
+        self.error_rate = error_rate    # fraction of Gemini/Unsplash calls answered with 429
+        self.seed = seed
+        self.chars_per_second = chars_per_second  # Gemini text generation speed (0 = instant)
+
+
+class FakeServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, config):
+        super().__init__(('127.0.0.1', 0), FakeHandler)
+        self.config = config
+        self.rng = random.Random(config.seed)
+        self.lock = threading.Lock()
+        self.stats = {'requests': 0, 'gemini_text': 0, 'gemini_image': 0, 'unsplash': 0, 'throttled': 0,
+                      'input_chars': 0, 'output_chars': 0}
+        self.png = tiny_png()
+
+    @property
+    def base_url(self):
+        return f'http://127.0.0.1:{self.server_address[1]}'
+
+    def feed_urls(self):
+        return [f'{self.base_url}/rss/{i}.xml' for i in range(self.config.feeds)]
+
+    def count(self, key, amount=1):
+        with self.lock:
+            self.stats[key] += amount
+
+    def throttled(self):
+        time.sleep(self.config.latency)
+        with self.lock:
+            hit = self.rng.random() < self.config.error_rate
+        if hit:
+            self.count('throttled')
+        return hit
+
+
+class FakeHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, body=b'', content_type='text/plain', headers=None):
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self.server.count('requests')
+        path = urlparse(self.path).path
+        if path == '/robots.txt':
+            return self._send(200, 'User-agent: *\nAllow: /\n')
+        if path.startswith('/rss/'):
+            return self._rss(path.rsplit('/', 1)[-1].split('.')[0])
+        if path.startswith('/article/'):
+            return self._article(path.rsplit('/', 1)[-1].split('.')[0])
+        if path == '/unsplash/photos/random':
+            self.server.count('unsplash')
+            if self.server.throttled():
+                return self._send(429, 'Rate Limit Exceeded')
+            body = json.dumps({'urls': {'regular': f'{self.server.base_url}/unsplash/image.jpg'}})
+            return self._send(200, body, 'application/json')
+        if path == '/unsplash/image.jpg':
+            return self._send(200, self.server.png, 'image/png')
+        self._send(404, 'not found')
+
+    def do_POST(self):
+        self.server.count('requests')
+        length = int(self.headers.get('Content-Length') or 0)
+        payload = json.loads(self.rfile.read(length) or b'{}')
+        prompt = payload.get('prompt', '')
+        path = urlparse(self.path).path
+        if not path.startswith('/gemini/'):
+            return self._send(404, 'not found')
+        image = 'imagen' in path
+        self.server.count('gemini_image' if image else 'gemini_text')
+        self.server.count('input_chars', len(prompt))
+        if self.server.throttled():
+            return self._send(429, json.dumps({'error': '429 Resource has been exhausted (e.g. check quota).'}), 'application/json')
+        if image:
+            return self._send(200, self.server.png, 'image/png')
+        text = self._gemini_text(prompt)
+        self.server.count('output_chars', len(text))
+        if path.endswith(':streamGenerateContent'):
+            return self._stream_text(text)
+        self._generation_delay(text)
+        self._send(200, json.dumps({'text': text}), 'application/json')
+
+    def _generation_delay(self, text):
+        if self.server.config.chars_per_second:
+            time.sleep(len(text) / self.server.config.chars_per_second)
+
+    def _stream_text(self, text, chunk_chars=STREAM_CHUNK_CHARS):
+        # NDJSON lines of {"text": ...}, each sent when it would have been generated
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-ndjson')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        for i in range(0, len(text), chunk_chars):
+            piece = text[i:i + chunk_chars]
+            self._generation_delay(piece)
+            line = (json.dumps({'text': piece}) + '\n').encode('utf-8')
+            self.wfile.write(f'{len(line):X}\r\n'.encode('ascii') + line + b'\r\n')
+            self.wfile.flush()
+        self.wfile.write(b'0\r\n\r\n')
+
+    def _rss(self, feed_id):
+        etag = f'"feed-{feed_id}"'
+        if self.headers.get('If-None-Match') == etag:
+            return self._send(304, headers={'ETag': etag})
+        rng = random.Random(f'{self.server.config.seed}-{feed_id}')
+        now = time.time()
+        items = []
+        for i in range(self.server.config.items_per_feed):
+            article_id = f'{feed_id}-{i}'
+            items.append(
+                f'<item><title>{sentence(rng, 8)}</title>'
+                f'<link>{self.server.base_url}/article/{article_id}.html</link>'
+                f'<guid>{article_id}</guid>'
+                f'<description>{sentence(rng, 25)}</description>'
+                f'<category>{rng.choice(["technology", "world", "business", "sports"])}</category>'
+                f'<pubDate>{formatdate(now - i * 900)}</pubDate></item>'
+            )
+        body = (
+            '<?xml version="1.0" encoding="UTF-8"?><rss version="2.0"><channel>'
+            f'<title>Fake feed {feed_id}</title><link>{self.server.base_url}</link>'
+            + ''.join(items) + '</channel></rss>'
+        )
+        self._send(200, body, 'application/rss+xml', {'ETag': etag})
+
+    def _article(self, article_id):
+        rng = random.Random(f'{self.server.config.seed}-{article_id}')
+        paragraphs = ''.join(
+            f'<p>{" ".join(sentence(rng, rng.randint(12, 24)) for _ in range(4))}</p>'
+            for _ in range(self.server.config.paragraphs)
+        )
+        body = (
+            f'<html><head><title>{sentence(rng, 8)}</title></head><body>'
+            f'<article><h1>{sentence(rng, 8)}</h1>{paragraphs}</article>'
+            '<footer>Share this article. We use cookies.</footer></body></html>'
+        )
+        self._send(200, body, 'text/html')
+
+    def _gemini_text(self, prompt):
+        rng = random.Random(len(prompt))
+        if prompt.startswith('Generate 5 relevant tags'):
+            return ', '.join(rng.sample(WORDS, 5))
+        if prompt.startswith('Rewrite the following'):
+            summary = '\n'.join(' '.join(sentence(rng) for _ in range(3)) for _ in range(3))
+            article = '\n'.join(' '.join(sentence(rng) for _ in range(5)) for _ in range(6))
+            return f'Headline: {sentence(rng, 8)}\nSummary: {summary}\nFull Article: {article}\n'
+        return ' '.join(sentence(rng, 20) for _ in range(3))
+
+
+def start_fake_server(config=None):
+    server = FakeServer(config or FakeServerConfig())
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
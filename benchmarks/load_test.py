@@ -0,0 +1,253 @@
+import os
+import re
+import sys
+import json
+import time
+import random
+import shutil
+import logging
+import argparse
+import tempfile
+import threading
+
+# Load generator and latency profile for backend/app.py, run from the project root:
+#   python -m benchmarks.load_test --sizes 1000 10000 --requests 500 --concurrency 8
+# By default the app is driven in-process (Flask test client) against a synthetic
+# 'news bucket'; --url targets a running server instead. Per-request profiling is
+# enabled in the app with PEN_PROFILE=cprofile|pyinstrument (see backend/app.py).
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT_DIR)
+sys.path.insert(0, os.path.join(ROOT_DIR, 'backend'))
+
+from benchmarks.fake_servers import tiny_png
+from benchmarks.synthetic_archive import write_archive
+from benchmarks.run_benchmark import percentile
+
+DEFAULT_MIX = 'list=1,detail=6,image=3'
+# Report key -> histogram broken down by phase. The JSON load, normalization
+# and stat phases are recorded per article store rebuild, not per request.
+PHASE_METRICS = {
+    'phases': 'news_phase_seconds',
+    'store_build_phases': 'article_store_build_seconds',
+}
+
+
+def parse_mix(mix):
+    weights = {}
+    for part in mix.split(','):
+        kind, _, weight = part.partition('=')
+        weights[kind.strip()] = float(weight or 1)
+    return weights
+
+
+def prepare_archive(work_dir, size, image_ratio=0.5):
+    """Write a synthetic bucket plus image files for a share of the articles. Returns (bucket, images, ids, files)."""
+    bucket_dir = os.path.join(work_dir, f'bucket_{size}')
+    images_dir = os.path.join(work_dir, f'images_{size}')
+    os.makedirs(images_dir, exist_ok=True)
+    png = tiny_png()
+    news_ids, image_files = [], ['default.png']
+    with open(os.path.join(images_dir, 'default.png'), 'wb') as f:
+        f.write(png)
+    for path in write_archive(bucket_dir, size):
+        with open(path, 'r', encoding='utf-8') as f:
+            for item in json.load(f):
+                news_ids.append(item['news_id'])
+                if random.random() < image_ratio:
+                    filename = f"{item['news_id']}.jpg"
+                    with open(os.path.join(images_dir, filename), 'wb') as img:
+                        img.write(png)
+                    image_files.append(filename)
+    return bucket_dir, images_dir, news_ids, image_files
+
+
+def build_plan(total, weights, news_ids, image_files, seed=1):
+    rng = random.Random(seed)
+    kinds = list(weights)
+    plan = []
+    for kind in rng.choices(kinds, weights=[weights[k] for k in kinds], k=total):
+        if kind == 'list':
+            plan.append((kind, '/api/news'))
+        elif kind == 'detail':
+            plan.append((kind, f'/api/news/{rng.choice(news_ids)}'))
+        else:
+            plan.append((kind, f'/images/{rng.choice(image_files)}'))
+    return plan
+
+
+def run_plan(plan, concurrency, make_getter):
+    """Replay plan over `concurrency` threads. Returns ({kind: [latency]}, error count, wall seconds)."""
+    latencies = {}
+    errors = [0]
+    lock = threading.Lock()
+    queue = list(reversed(plan))
+
+    def worker():
+        get = make_getter()
+        while True:
+            with lock:
+                if not queue:
+                    return
+                kind, path = queue.pop()
+            start = time.perf_counter()
+            status = get(path)
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.setdefault(kind, []).append(elapsed)
+                if status >= 500:
+                    errors[0] += 1
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return latencies, errors[0], time.perf_counter() - start
+
+
+def phase_totals_from_snapshot(snap, metric):
+    totals = {}
+    for sample in snap.get(metric, {}).get('samples', []):
+        totals[sample['labels'].get('phase')] = (sample['sum'], sample['count'])
+    return totals
+
+
+def phase_totals_from_prometheus(text, metric):
+    totals = {}
+    pattern = re.compile(r'^' + re.escape(metric) + r'_(sum|count)\{([^}]*)\} (\S+)$')
+    for line in text.splitlines():
+        m = pattern.match(line)
+        if m:
+            kind, label_str, value = m.groups()
+            labels = dict(re.findall(r'(\w+)="((?:[^"\\]|\\.)*)"', label_str))
+            phase = labels.get('phase')
+            if phase is None or labels.get('source', 'backend') != 'backend':
+                continue
+            total_sum, total_count = totals.get(phase, (0.0, 0))
+            if kind == 'sum':
+                totals[phase] = (float(value), total_count)
+            else:
+                totals[phase] = (total_sum, int(float(value)))
+    return totals
+
+
+def phase_breakdown(before, after):
+    """Average milliseconds per observation (request or store rebuild) spent in each phase, plus its share."""
+    breakdown = {}
+    for phase, (total, count) in after.items():
+        prev_total, prev_count = before.get(phase, (0.0, 0))
+        n = count - prev_count
+        if n:
+            breakdown[phase] = {'avg_ms': round((total - prev_total) / n * 1000, 2)}
+    overall = sum(p['avg_ms'] for p in breakdown.values()) or 1
+    for p in breakdown.values():
+        p['share'] = round(p['avg_ms'] / overall, 3)
+    return breakdown
+
+
+def summarize(latencies, errors, wall):
+    total = sum(len(v) for v in latencies.values())
+    return {
+        'requests': total,
+        'errors': errors,
+        'throughput_rps': round(total / wall, 1) if wall else 0.0,
+        'latency_ms': {
+            kind: {
+                'count': len(samples),
+                'p50': round(percentile(samples, 50) * 1000, 2),
+                'p95': round(percentile(samples, 95) * 1000, 2),
+                'p99': round(percentile(samples, 99) * 1000, 2),
+            }
+            for kind, samples in latencies.items()
+        },
+    }
+
+
+def load_test_in_process(work_dir, size, args, weights):
+    import app as backend
+    import metrics
+    bucket_dir, images_dir, news_ids, image_files = prepare_archive(work_dir, size)
+    backend.NEWS_BUCKET_DIR = bucket_dir
+    backend.IMAGES_DIR = images_dir
+    plan = build_plan(args.requests, weights, news_ids, image_files)
+
+    def make_getter():
+        client = backend.app.test_client()
+
+        def get(path):
+            resp = client.get(path)
+            resp.get_data()
+            resp.close()
+            return resp.status_code
+        return get
+
+    snap = metrics.snapshot()
+    before = {key: phase_totals_from_snapshot(snap, metric) for key, metric in PHASE_METRICS.items()}
+    latencies, errors, wall = run_plan(plan, args.concurrency, make_getter)
+    result = summarize(latencies, errors, wall)
+    snap = metrics.snapshot()
+    for key, metric in PHASE_METRICS.items():
+        result[key] = phase_breakdown(before[key], phase_totals_from_snapshot(snap, metric))
+    shutil.rmtree(bucket_dir, ignore_errors=True)
+    shutil.rmtree(images_dir, ignore_errors=True)
+    return result
+
+
+def load_test_remote(url, args, weights):
+    import requests
+    session = requests.Session()
+    news = session.get(f'{url}/api/news', timeout=120).json()
+    news_ids = [item['news_id'] for item in news if item.get('news_id')] or ['missing']
+    image_files = [item['image'] for item in news if item.get('image')] or ['default.png']
+    plan = build_plan(args.requests, weights, news_ids, image_files)
+
+    def make_getter():
+        thread_session = requests.Session()
+
+        def get(path):
+            return thread_session.get(url + path, timeout=120).status_code
+        return get
+
+    text = session.get(f'{url}/metrics', timeout=30).text
+    before = {key: phase_totals_from_prometheus(text, metric) for key, metric in PHASE_METRICS.items()}
+    latencies, errors, wall = run_plan(plan, args.concurrency, make_getter)
+    result = summarize(latencies, errors, wall)
+    text = session.get(f'{url}/metrics', timeout=30).text
+    for key, metric in PHASE_METRICS.items():
+        result[key] = phase_breakdown(before[key], phase_totals_from_prometheus(text, metric))
+    result['archive_size'] = len(news)
+    return result
+
+
+def main():
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description='Replay a realistic request mix against the news API and profile it.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000], help='Synthetic archive sizes (in-process mode)')
+    parser.add_argument('--requests', type=int, default=300, help='Requests per run')
+    parser.add_argument('--concurrency', type=int, default=4, help='Concurrent clients')
+    parser.add_argument('--mix', default=DEFAULT_MIX, help=f'Request mix weights (default: {DEFAULT_MIX})')
+    parser.add_argument('--url', default=None, help='Target a running server (e.g. http://localhost:5000) instead')
+    parser.add_argument('--output', default=None, help='Write the JSON report to this file')
+    args = parser.parse_args()
+    weights = parse_mix(args.mix)
+
+    report = {'mix': weights, 'concurrency': args.concurrency}
+    if args.url:
+        report['remote'] = load_test_remote(args.url.rstrip('/'), args, weights)
+    else:
+        work_dir = tempfile.mkdtemp(prefix='pen_load_')
+        try:
+            report['sizes'] = {str(size): load_test_in_process(work_dir, size, args, weights) for size in args.sizes}
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
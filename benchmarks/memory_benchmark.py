@@ -0,0 +1,97 @@
+import os
+import sys
+import gc
+import json
+import shutil
+import argparse
+import tempfile
+import subprocess
+
+# Resident memory of the API's article store per 10k articles: the compact
+# ArticleStore against the plain list of normalized dicts it replaced. Each
+# representation is built in a fresh interpreter so RSS deltas are not skewed:
+#   python -m benchmarks.memory_benchmark --sizes 10000 50000
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT_DIR)
+sys.path.insert(0, os.path.join(ROOT_DIR, 'backend'))
+
+REPRESENTATIONS = ('dicts', 'compact')
+ARTICLES_PER_FILE = 500
+
+
+def rss_mb():
+    """Current (not peak) resident set size, Linux only."""
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+
+
+def build(representation, bucket_dir, images_dir):
+    import article_store
+    if representation == 'dicts':
+        articles = article_store.load_bucket(bucket_dir)
+        for item in articles:
+            article_store.normalize_article(item, images_dir)
+        return articles
+    return article_store.ArticleStore(bucket_dir, images_dir)
+
+
+def child(representation, bucket_dir, images_dir):
+    # Import everything first so only the articles show up in the delta
+    import article_store  # noqa: F401
+    gc.collect()
+    before = rss_mb()
+    store = build(representation, bucket_dir, images_dir)
+    gc.collect()
+    after = rss_mb()
+    print(json.dumps({'count': len(store), 'rss_delta_mb': round(after - before, 1)}))
+
+
+def measure(representation, bucket_dir, images_dir, work_dir):
+    env = dict(os.environ, PEN_SEARCH_INDEX=os.path.join(work_dir, f'search_{representation}.db'))
+    out = subprocess.run(
+        [sys.executable, '-m', 'benchmarks.memory_benchmark', '--child', representation, bucket_dir, images_dir],
+        cwd=ROOT_DIR, env=env, capture_output=True, text=True, check=True)
+    result = json.loads(out.stdout.strip().splitlines()[-1])
+    result['rss_mb_per_10k'] = round(result['rss_delta_mb'] * 10000 / max(1, result['count']), 1)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='RSS per 10k articles of the article store representations.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 50000], help='Synthetic archive sizes')
+    parser.add_argument('--child', nargs=3, metavar=('REPRESENTATION', 'BUCKET', 'IMAGES'), help=argparse.SUPPRESS)
+    parser.add_argument('--output', default=None, help='Write the JSON report to this file')
+    args = parser.parse_args()
+    if args.child:
+        child(*args.child)
+        return 0
+
+    from benchmarks.synthetic_archive import write_archive
+    work_dir = tempfile.mkdtemp(prefix='pen_memory_')
+    report = {}
+    try:
+        for size in args.sizes:
+            bucket_dir = os.path.join(work_dir, f'bucket_{size}')
+            images_dir = os.path.join(work_dir, f'images_{size}')
+            os.makedirs(images_dir, exist_ok=True)
+            # Spread over many files, like a real bucket of per-category/per-run files
+            write_archive(bucket_dir, size, files=max(4, size // ARTICLES_PER_FILE))
+            report[str(size)] = {r: measure(r, bucket_dir, images_dir, work_dir) for r in REPRESENTATIONS}
+            shutil.rmtree(bucket_dir, ignore_errors=True)
+            shutil.rmtree(images_dir, ignore_errors=True)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    print(json.dumps(report, indent=2))
+    for size, results in report.items():
+        ratio = results['dicts']['rss_delta_mb'] / max(0.1, results['compact']['rss_delta_mb'])
+        print(f"{size:>8} articles: dicts {results['dicts']['rss_mb_per_10k']} MB/10k, "
+              f"compact {results['compact']['rss_mb_per_10k']} MB/10k ({ratio:.1f}x smaller)")
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
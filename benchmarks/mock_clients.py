@@ -0,0 +1,74 @@
+import json
+
+import requests
+
+import image_providers
+
+# Client objects that speak to benchmarks.fake_servers instead of Google/Unsplash.
+# They expose the same surface the pipeline uses, so the enhancer and image
+# providers run unmodified apart from where their requests are sent.
+
+
+class MockResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class _Models:
+    def __init__(self, base_url, session):
+        self.base_url = base_url
+        self.session = session
+
+    def generate_content(self, model, contents):
+        resp = self.session.post(f'{self.base_url}/gemini/models/{model}:generateContent', json={'prompt': contents}, timeout=30)
+        if resp.status_code == 429:
+            raise RuntimeError(resp.json()['error'])
+        resp.raise_for_status()
+        return MockResponse(resp.json()['text'])
+
+    def generate_content_stream(self, model, contents):
+        resp = self.session.post(f'{self.base_url}/gemini/models/{model}:streamGenerateContent',
+                                 json={'prompt': contents}, timeout=30, stream=True)
+        if resp.status_code == 429:
+            raise RuntimeError(resp.json()['error'])
+        resp.raise_for_status()
+        return (MockResponse(json.loads(line)['text']) for line in resp.iter_lines() if line)
+
+
+class MockGeminiClient:
+    """Stand-in for google.genai.Client (client.models.generate_content / generate_content_stream)."""
+
+    def __init__(self, base_url):
+        self.models = _Models(base_url, requests.Session())
+
+
+class MockGeminiImageProvider(image_providers.GeminiImageProvider):
+    def __init__(self, base_url, **kwargs):
+        super().__init__('benchmark-key', **kwargs)
+        self.base_url = base_url
+        self.session = requests.Session()
+
+    def fetch(self, prompt):
+        resp = self.session.post(f'{self.base_url}/gemini/models/{self.model_name}:generateContent', json={'prompt': prompt}, timeout=30)
+        if resp.status_code == 429:
+            raise image_providers.QuotaExhausted(resp.text)
+        resp.raise_for_status()
+        return resp.content
+
+
+class MockUnsplashImageProvider(image_providers.UnsplashImageProvider):
+    def __init__(self, base_url, **kwargs):
+        super().__init__('benchmark-key', **kwargs)
+        self.api_url = f'{base_url}/unsplash/photos/random'
+
+
+def install(base_url, gemini_key='benchmark-key', unsplash_key='benchmark-key', breaker_state_path=None):
+    """Route the enhancer's Gemini client and the image providers to the fake server."""
+    import gemini_news_enhancer
+    gemini_news_enhancer._GENAI_CLIENT_STYLE = True
+    gemini_news_enhancer._clients[gemini_key] = MockGeminiClient(base_url)
+    image_providers._providers[('gemini', gemini_key)] = MockGeminiImageProvider(
+        base_url, max_concurrency=2, breaker=image_providers.CircuitBreaker('gemini', state_path=breaker_state_path))
+    image_providers._providers[('unsplash', unsplash_key)] = MockUnsplashImageProvider(
+        base_url, max_concurrency=4, breaker=image_providers.CircuitBreaker('unsplash', state_path=breaker_state_path))
+    return gemini_key, unsplash_key
@@ -0,0 +1,196 @@
+import os
+import sys
+import glob
+import json
+import time
+import random
+import argparse
+
+# Fuzz and benchmark corpus for parse_gemini_response:
+#   python -m benchmarks.parser_benchmark --fuzz 2000 --repeat 2000
+# The corpus is benchmarks/gemini_responses/*.txt plus responses rebuilt from
+# the real model output stored in enhanced_news.json. Fuzzing checks that
+# streaming (random chunk boundaries) and one-shot parsing agree on mutated
+# responses and never raise; the benchmark compares with the previous parser.
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT_DIR)
+
+from parse_gemini_response import parse_gemini_response, parse_gemini_stream, GeminiResponseParser
+
+CORPUS_DIR = os.path.join(os.path.dirname(__file__), 'gemini_responses')
+ARCHIVE_PATH = os.path.join(ROOT_DIR, 'enhanced_news.json')
+
+
+def legacy_parse(text):
+    """The line-by-line parser this one replaced, kept for comparison."""
+    headline = ''
+    summary = ''
+    full_text = ''
+    image_prompt = ''
+    current = None
+    for line in text.splitlines():
+        line = line.strip()
+        if line.lower().startswith('headline:'):
+            current = 'headline'
+            headline = line.partition(':')[2].strip()
+        elif line.lower().startswith('summary:'):
+            current = 'summary'
+            summary = line.partition(':')[2].strip()
+        elif line.lower().startswith('full article:'):
+            current = 'full_text'
+            full_text = line.partition(':')[2].strip()
+        elif 'illustration' in line.lower() or 'image' in line.lower():
+            current = 'image_prompt'
+            image_prompt = line.partition(':')[2].strip()
+        elif current == 'summary' and line:
+            summary += '\n' + line
+        elif current == 'full_text' and line:
+            full_text += '\n' + line
+    return {'seo_headline': headline, 'rewritten_summary': summary, 'rewritten_full_text': full_text, 'image_prompt': image_prompt}
+
+
+def load_corpus(archive_path=ARCHIVE_PATH):
+    corpus = {}
+    for path in sorted(glob.glob(os.path.join(CORPUS_DIR, '*.txt'))):
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            corpus[os.path.basename(path)] = f.read()
+    # Rebuild full responses from real enhanced articles
+    if os.path.exists(archive_path):
+        with open(archive_path, 'r', encoding='utf-8') as f:
+            for i, item in enumerate(json.load(f)):
+                if not item.get('seo_headline'):
+                    continue
+                corpus[f'archive_{i}'] = (
+                    f"Headline: {item['seo_headline']}\n"
+                    f"Summary: {item.get('rewritten_summary') or ''}\n"
+                    f"Full Article: {item.get('rewritten_full_text') or item.get('full_text') or ''}\n"
+                    f"Illustration Prompt: {(item.get('image_prompt') or '').replace(chr(10), ' ')}\n"
+                )
+    return corpus
+
+
+def chunked(text, rng, max_chunk=40):
+    chunks, i = [], 0
+    while i < len(text):
+        size = rng.randint(1, max_chunk)
+        chunks.append(text[i:i + size])
+        i += size
+    return chunks
+
+
+def mutate(text, rng):
+    lines = text.split('\n')
+    for _ in range(rng.randint(1, 4)):
+        op = rng.randrange(6)
+        i = rng.randrange(len(lines))
+        if op == 0:
+            lines[i] = lines[i].upper() if rng.random() < 0.5 else lines[i].lower()
+        elif op == 1:
+            lines[i] = '**' + lines[i].replace(':', ':**', 1)
+        elif op == 2:
+            lines.insert(i, '')
+        elif op == 3:
+            lines[i] = lines[i] + '\r'
+        elif op == 4:
+            lines.insert(i, rng.choice(['The image shows flooding.', 'Illustrations were published.', '***', ':', '']))
+        else:
+            lines = lines[:i + 1]
+    text = '\n'.join(lines)
+    if rng.random() < 0.3:
+        text = text[:rng.randrange(len(text) + 1)]  # cut off mid-stream
+    return text
+
+
+def fuzz(corpus, iterations, seed=7):
+    rng = random.Random(seed)
+    texts = list(corpus.values())
+    failures = []
+    for n in range(iterations):
+        text = mutate(rng.choice(texts), rng)
+        try:
+            whole = parse_gemini_response(text)
+            streamed = parse_gemini_stream(chunked(text, rng))
+        except Exception as e:
+            failures.append({'iteration': n, 'error': repr(e), 'text': text[:200]})
+            continue
+        if whole != streamed:
+            failures.append({'iteration': n, 'error': 'stream/one-shot mismatch', 'text': text[:200]})
+    return failures
+
+
+def check_corpus(corpus):
+    """Known answers for the hand-written files. Returns a list of problems."""
+    problems = []
+    plain = parse_gemini_response(corpus['plain.txt'])
+    if 'the image of a fully tamed price level' not in plain['rewritten_full_text']:
+        problems.append('plain.txt: body line mentioning "image" was taken as the image prompt')
+    if not plain['image_prompt'].startswith('A modern central bank'):
+        problems.append('plain.txt: image prompt not parsed')
+    markdown = parse_gemini_response(corpus['markdown.txt'])
+    if markdown['seo_headline'] != 'Storm Leaves Thousands Without Power Across Coastal Towns':
+        problems.append(f"markdown.txt: headline {markdown['seo_headline']!r}")
+    if 'Satellite imagery' not in markdown['rewritten_full_text']:
+        problems.append('markdown.txt: full text truncated')
+    next_line = parse_gemini_response(corpus['headline_on_next_line.txt'])
+    if next_line['seo_headline'] != 'Researchers Map Deep-Sea Coral Reef Off Atlantic Shelf':
+        problems.append(f"headline_on_next_line.txt: headline {next_line['seo_headline']!r}")
+    if 'Image analysis' not in next_line['rewritten_full_text'] or '\n' not in next_line['image_prompt']:
+        problems.append('headline_on_next_line.txt: full text or multi-line image prompt lost')
+    crlf = parse_gemini_response(corpus['crlf_mixed_case.txt'])
+    if any('\r' in v for v in crlf.values()) or not crlf['image_prompt']:
+        problems.append('crlf_mixed_case.txt: CRLF or label case not handled')
+    return problems
+
+
+def time_parser(parse, texts, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for text in texts:
+            parse(text)
+    return (time.perf_counter() - start) / (repeat * len(texts)) * 1e6
+
+
+def stream_latency(text, chunk_size=20):
+    """Characters consumed before the headline and summary became available, and the total."""
+    parser = GeminiResponseParser()
+    ready = {}
+    consumed = 0
+    for i in range(0, len(text), chunk_size):
+        chunk = text[i:i + chunk_size]
+        consumed += len(chunk)
+        for field in parser.feed(chunk):
+            ready.setdefault(field, consumed)
+    parser.close()
+    return {'headline_at': ready.get('seo_headline'), 'summary_at': ready.get('rewritten_summary'), 'length': len(text)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fuzz and benchmark the Gemini response parser.')
+    parser.add_argument('--fuzz', type=int, default=2000, help='Fuzz iterations')
+    parser.add_argument('--repeat', type=int, default=2000, help='Benchmark passes over the corpus')
+    parser.add_argument('--output', default=None, help='Write the JSON report to this file')
+    args = parser.parse_args()
+
+    corpus = load_corpus()
+    texts = list(corpus.values())
+    # Long responses too, where repeated string concatenation hurts most
+    texts.append('\n'.join(texts) * 20)
+    report = {
+        'corpus_size': len(corpus),
+        'problems': check_corpus(corpus),
+        'fuzz_failures': fuzz(corpus, args.fuzz),
+        'us_per_response': {
+            'legacy': round(time_parser(legacy_parse, texts, args.repeat), 2),
+            'current': round(time_parser(parse_gemini_response, texts, args.repeat), 2),
+        },
+        'streaming': stream_latency(corpus['markdown.txt']),
+    }
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    return 1 if report['problems'] or report['fuzz_failures'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,93 @@
+import os
+import re
+import sys
+import glob
+import json
+import time
+import argparse
+
+# Input tokens per article of the Gemini prompts, untrimmed vs token-budgeted
+# (prompt_builder), on the real articles in 'news bucket/' (falling back to a
+# synthetic archive). Rewrite quality is approximated by how many of the
+# article's names and numbers survive trimming:
+#   python -m benchmarks.prompt_benchmark
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT_DIR)
+
+import prompt_builder
+from gemini_news_enhancer import REWRITE_TEMPLATE, IMAGE_PROMPT_TEMPLATE, TAGS_TEMPLATE
+
+NEWS_BUCKET_DIR = os.path.join(ROOT_DIR, 'news bucket')
+# Capitalized words not at the start of a sentence, and numbers
+KEY_TERM_RE = re.compile(r'(?<![.!?]\s)(?<!^)\b[A-Z][a-z]+(?:\s[A-Z][a-z]+)*|\b\d[\d,.%]*\b', re.MULTILINE)
+
+
+def load_articles(limit):
+    articles, seen = [], set()
+    for path in sorted(glob.glob(os.path.join(NEWS_BUCKET_DIR, '*.json'))):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except Exception:
+            continue
+        for item in data if isinstance(data, list) else []:
+            text = item.get('full_text') or ''
+            if text and text[:200] not in seen:
+                seen.add(text[:200])
+                articles.append(item)
+    if not articles:
+        from benchmarks.synthetic_archive import generate_articles
+        articles = list(generate_articles(limit, paragraphs=12))
+    return articles[:limit]
+
+
+def key_terms(text):
+    return set(KEY_TERM_RE.findall(text))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Token savings and key-term retention of the budgeted Gemini prompts.')
+    parser.add_argument('--limit', type=int, default=500, help='Articles to measure')
+    parser.add_argument('--output', default=None, help='Write the JSON report to this file')
+    args = parser.parse_args()
+
+    articles = load_articles(args.limit)
+    calls = {
+        'rewrite': (REWRITE_TEMPLATE, lambda item: item.get('full_text') or item.get('summary', '')),
+        'image_prompt': (IMAGE_PROMPT_TEMPLATE, lambda item: item.get('full_text') or ''),
+        'tags': (TAGS_TEMPLATE, lambda item: item.get('summary') or ''),
+    }
+    report = {'articles': len(articles), 'calls': {}}
+    for call_type, (template, text_of) in calls.items():
+        before = after = 0
+        retained, total = 0, 0
+        start = time.perf_counter()
+        for item in articles:
+            text, headline = text_of(item), item.get('heading', '')
+            before += prompt_builder.estimate_tokens(template.format(text=text, headline=headline))
+            prompt = prompt_builder.build_prompt(call_type, template, text, headline)
+            after += prompt_builder.estimate_tokens(prompt)
+            terms = key_terms(prompt_builder.clean_text(text))
+            retained += len(terms & key_terms(prompt))
+            total += len(terms)
+        elapsed = time.perf_counter() - start
+        count = max(1, len(articles))
+        report['calls'][call_type] = {
+            'budget': prompt_builder.budget(call_type),
+            'tokens_per_article_before': round(before / count),
+            'tokens_per_article_after': round(after / count),
+            'saving': round(1 - after / max(1, before), 3),
+            'key_terms_retained': round(retained / max(1, total), 3),
+            'ms_per_article': round(elapsed / count * 1000, 3),
+        }
+    report['tokens_per_article_before'] = sum(c['tokens_per_article_before'] for c in report['calls'].values())
+    report['tokens_per_article_after'] = sum(c['tokens_per_article_after'] for c in report['calls'].values())
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,221 @@
+import os
+import sys
+import json
+import time
+import shutil
+import logging
+import argparse
+import resource
+import tempfile
+
+# Offline benchmark for ingest -> enhance -> serve, run from the project root:
+#   python -m benchmarks.run_benchmark --sizes 1000 10000 100000 --output bench.json
+# Every external service is replaced by benchmarks.fake_servers, so results are
+# repeatable and can be compared against a saved baseline with --baseline.
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT_DIR)
+sys.path.insert(0, os.path.join(ROOT_DIR, 'backend'))
+
+from benchmarks.fake_servers import FakeServerConfig, start_fake_server
+from benchmarks.synthetic_archive import write_archive
+from benchmarks import mock_clients
+
+# Estimated list prices (USD) used for cost per article; override on the command line
+PRICE_INPUT_PER_M = 0.10
+PRICE_OUTPUT_PER_M = 0.40
+PRICE_PER_IMAGE = 0.03
+CHARS_PER_TOKEN = 4
+
+# Metrics where a higher value is better; all others are treated as lower-is-better
+HIGHER_IS_BETTER = ('articles_per_sec',)
+
+
+def peak_rss_mb():
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(rss / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def percentile(samples, pct):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def bench_ingest(server, work_dir, max_per_feed):
+    import aggregate_news
+    import robots_cache
+    aggregate_news.BASE_DIR = work_dir
+    robots_cache.CACHE_PATH = os.path.join(work_dir, 'robots_cache.json')
+    start = time.perf_counter()
+    buckets = aggregate_news.run_aggregation(server.feed_urls(), 'technology', max_per_feed, max_google=0)
+    elapsed = time.perf_counter() - start
+    with open(os.path.join(work_dir, 'all_news.json'), 'r', encoding='utf-8') as f:
+        articles = len(json.load(f))
+    return {
+        'articles': articles,
+        'buckets': len(buckets),
+        'seconds': round(elapsed, 3),
+        'articles_per_sec': round(articles / elapsed, 2) if elapsed else 0.0,
+    }
+
+
+def bench_enhance(server, work_dir, limit, args, stream=True):
+    import gemini_news_enhancer
+    import image_cache
+    # Start from an empty image cache so both enhance modes generate every image
+    image_cache._cache = None
+    if os.path.exists(image_cache.CACHE_PATH):
+        os.remove(image_cache.CACHE_PATH)
+    gemini_news_enhancer.BASE_DIR = work_dir
+    gemini_news_enhancer.RETRY_DELAY = 0.01
+    gemini_key, unsplash_key = mock_clients.install(server.base_url, breaker_state_path=None)
+    with open(os.path.join(work_dir, 'all_news.json'), 'r', encoding='utf-8') as f:
+        articles = json.load(f)[:limit]
+    input_json = os.path.join(work_dir, 'enhance_input.json')
+    with open(input_json, 'w', encoding='utf-8') as f:
+        json.dump(articles, f)
+    before = dict(server.stats)
+    start = time.perf_counter()
+    enhanced = gemini_news_enhancer.enhance_news_file(
+        input_json, os.path.join(work_dir, 'enhanced_news.json'), os.path.join(work_dir, 'enhanced_news.csv'),
+        gemini_key, unsplash_key, stream=stream)
+    elapsed = time.perf_counter() - start
+    calls = {k: server.stats[k] - before[k] for k in before}
+    count = len(enhanced) or 1
+    input_tokens = calls['input_chars'] / CHARS_PER_TOKEN
+    output_tokens = calls['output_chars'] / CHARS_PER_TOKEN
+    cost = (input_tokens * args.price_input + output_tokens * args.price_output) / 1e6 + calls['gemini_image'] * args.price_image
+    return {
+        'articles': len(enhanced),
+        'seconds': round(elapsed, 3),
+        'articles_per_sec': round(len(enhanced) / elapsed, 2) if elapsed else 0.0,
+        'seconds_per_article': round(elapsed / count, 3),
+        'gemini_text_calls_per_article': round(calls['gemini_text'] / count, 2),
+        'image_calls_per_article': round((calls['gemini_image'] + calls['unsplash']) / count, 2),
+        'throttled_responses': calls['throttled'],
+        'input_tokens_per_article': round(input_tokens / count),
+        'output_tokens_per_article': round(output_tokens / count),
+        'cost_per_article_usd': round(cost / count, 5),
+    }
+
+
+def bench_serve(work_dir, sizes, requests_per_size):
+    """/api/news latency per archive size, streamed and with ?stream=0, timed to the last byte of the body."""
+    import app as backend
+    results = {}
+    client = backend.app.test_client()
+    for size in sizes:
+        bucket_dir = os.path.join(work_dir, f'bucket_{size}')
+        write_archive(bucket_dir, size)
+        backend.NEWS_BUCKET_DIR = bucket_dir
+        backend.IMAGES_DIR = os.path.join(work_dir, 'images')
+        results[str(size)] = {}
+        for mode, path in (('stream', '/api/news'), ('buffered', '/api/news?stream=0')):
+            latencies = []
+            for _ in range(requests_per_size if size < 100000 else max(2, requests_per_size // 5)):
+                start = time.perf_counter()
+                resp = client.get(path)
+                body = resp.get_data()
+                latencies.append(time.perf_counter() - start)
+                resp.close()
+                assert resp.status_code == 200, resp.status_code
+            results[str(size)][mode] = {
+                'requests': len(latencies),
+                'p50_ms': round(percentile(latencies, 50) * 1000, 1),
+                'p99_ms': round(percentile(latencies, 99) * 1000, 1),
+                'response_mb': round(len(body) / (1024 * 1024), 2),
+                'peak_rss_mb': peak_rss_mb(),
+            }
+        shutil.rmtree(bucket_dir, ignore_errors=True)
+    return results
+
+
+def flatten(report, prefix=''):
+    flat = {}
+    for key, value in report.items():
+        name = f'{prefix}{key}'
+        if isinstance(value, dict):
+            flat.update(flatten(value, name + '.'))
+        elif isinstance(value, (int, float)):
+            flat[name] = value
+    return flat
+
+
+def compare(report, baseline, max_regression):
+    """Return the metrics that regressed by more than max_regression (fraction) against baseline."""
+    current, previous = flatten(report), flatten(baseline)
+    regressions = []
+    for name, old in previous.items():
+        new = current.get(name)
+        if new is None or not old or not name.endswith(('_ms', '_per_sec', 'per_article', 'per_article_usd', 'rss_mb', 'seconds')):
+            continue
+        change = (new - old) / old
+        if name.endswith(HIGHER_IS_BETTER):
+            change = -change
+        if change > max_regression:
+            regressions.append({'metric': name, 'baseline': old, 'current': new, 'change': round(change, 3)})
+    return regressions
+
+
+def main():
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description='Offline ingest/enhance/serve benchmark with local stand-ins.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000], help='Archive sizes for /api/news')
+    parser.add_argument('--requests', type=int, default=20, help='/api/news requests per archive size')
+    parser.add_argument('--feeds', type=int, default=3, help='Number of fake RSS feeds')
+    parser.add_argument('--items_per_feed', type=int, default=10, help='Entries per fake feed')
+    parser.add_argument('--enhance_articles', type=int, default=10, help='Articles sent through the enhancer')
+    parser.add_argument('--latency', type=float, default=0.02, help='Mock Gemini/Unsplash latency in seconds')
+    parser.add_argument('--chars_per_second', type=float, default=2000.0, help='Mock Gemini text generation speed')
+    parser.add_argument('--error_rate', type=float, default=0.05, help='Fraction of mock calls answered with 429')
+    parser.add_argument('--price_input', type=float, default=PRICE_INPUT_PER_M, help='USD per 1M input tokens')
+    parser.add_argument('--price_output', type=float, default=PRICE_OUTPUT_PER_M, help='USD per 1M output tokens')
+    parser.add_argument('--price_image', type=float, default=PRICE_PER_IMAGE, help='USD per generated image')
+    parser.add_argument('--skip', nargs='*', default=[], choices=['ingest', 'enhance', 'serve'], help='Stages to skip')
+    parser.add_argument('--output', default=None, help='Write the JSON report to this file')
+    parser.add_argument('--baseline', default=None, help='Compare against a previous JSON report')
+    parser.add_argument('--max_regression', type=float, default=0.25, help='Allowed slowdown vs baseline (fraction)')
+    args = parser.parse_args()
+
+    server = start_fake_server(FakeServerConfig(
+        feeds=args.feeds, items_per_feed=args.items_per_feed, latency=args.latency, error_rate=args.error_rate,
+        chars_per_second=args.chars_per_second))
+    work_dir = tempfile.mkdtemp(prefix='pen_bench_')
+    cwd = os.getcwd()
+    os.chdir(work_dir)
+    report = {}
+    try:
+        if 'ingest' not in args.skip:
+            report['ingest'] = bench_ingest(server, work_dir, args.items_per_feed)
+        if 'enhance' not in args.skip and 'ingest' not in args.skip:
+            report['enhance'] = bench_enhance(server, work_dir, args.enhance_articles, args)
+            blocking = bench_enhance(server, work_dir, args.enhance_articles, args, stream=False)
+            report['enhance']['blocking_seconds_per_article'] = blocking['seconds_per_article']
+            report['enhance']['streaming_saving'] = round(
+                1 - report['enhance']['seconds_per_article'] / blocking['seconds_per_article'], 3) if blocking['seconds_per_article'] else 0.0
+        if 'serve' not in args.skip:
+            report['serve'] = bench_serve(work_dir, args.sizes, args.requests)
+        report['peak_rss_mb'] = peak_rss_mb()
+    finally:
+        os.chdir(cwd)
+        server.shutdown()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            regressions = compare(report, json.load(f), args.max_regression)
+        for r in regressions:
+            print(f"REGRESSION {r['metric']}: {r['baseline']} -> {r['current']} ({r['change']:+.0%})")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
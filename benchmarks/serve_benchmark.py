@@ -0,0 +1,124 @@
+import os
+import sys
+import json
+import time
+import shutil
+import socket
+import argparse
+import tempfile
+import subprocess
+import urllib.request
+
+# Compare the Flask development server with the gunicorn production profile
+# (backend/gunicorn.conf.py) on the same synthetic archive and request mix:
+#   python -m benchmarks.serve_benchmark --size 10000 --requests 1000 --concurrency 16
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+BACKEND_DIR = os.path.join(ROOT_DIR, 'backend')
+sys.path.insert(0, ROOT_DIR)
+
+from benchmarks.load_test import DEFAULT_MIX, parse_mix, prepare_archive, load_test_remote
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def wait_until_up(url, timeout=120):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with urllib.request.urlopen(f'{url}/api/news', timeout=30) as resp:
+                if resp.status == 200:
+                    return True
+        except Exception:
+            time.sleep(0.5)
+    return False
+
+
+def _children(pid):
+    try:
+        with open(f'/proc/{pid}/task/{pid}/children') as f:
+            return [int(c) for c in f.read().split()]
+    except OSError:
+        return []
+
+
+def memory_mb(pid):
+    """Total PSS (proportional set size, so shared copy-on-write pages are split) of a process tree, Linux only."""
+    total_kb = 0
+    pending = [pid]
+    while pending:
+        current = pending.pop()
+        pending.extend(_children(current))
+        try:
+            with open(f'/proc/{current}/smaps_rollup') as f:
+                for line in f:
+                    if line.startswith('Pss:'):
+                        total_kb += int(line.split()[1])
+        except OSError:
+            continue
+    return round(total_kb / 1024, 1) if total_kb else None
+
+
+SERVER_COMMANDS = {
+    'dev': [sys.executable, 'app.py'],
+    'gunicorn': ['gunicorn', '-c', 'gunicorn.conf.py', 'app:app'],
+}
+
+
+def run_server(name, command, bucket_dir, images_dir, args, weights):
+    port = free_port()
+    env = dict(os.environ, PORT=str(port), HOST='127.0.0.1', FLASK_ENV='production',
+               PEN_NEWS_BUCKET_DIR=bucket_dir, PEN_IMAGES_DIR=images_dir,
+               WEB_CONCURRENCY=str(args.workers), GUNICORN_THREADS=str(args.threads))
+    proc = subprocess.Popen(command, cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    url = f'http://127.0.0.1:{port}'
+    try:
+        start = time.perf_counter()
+        if not wait_until_up(url):
+            return {'error': 'server did not start'}
+        result = {'startup_seconds': round(time.perf_counter() - start, 2)}
+        result.update(load_test_remote(url, args, weights))
+        result['memory_pss_mb'] = memory_mb(proc.pid)
+        return result
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the dev server against the gunicorn production profile.')
+    parser.add_argument('--size', type=int, default=10000, help='Synthetic archive size')
+    parser.add_argument('--requests', type=int, default=500, help='Requests per server')
+    parser.add_argument('--concurrency', type=int, default=8, help='Concurrent clients')
+    parser.add_argument('--workers', type=int, default=4, help='gunicorn workers')
+    parser.add_argument('--threads', type=int, default=4, help='gunicorn threads per worker')
+    parser.add_argument('--mix', default=DEFAULT_MIX, help=f'Request mix weights (default: {DEFAULT_MIX})')
+    parser.add_argument('--servers', nargs='+', default=['dev', 'gunicorn'], choices=['dev', 'gunicorn'])
+    parser.add_argument('--output', default=None, help='Write the JSON report to this file')
+    args = parser.parse_args()
+    weights = parse_mix(args.mix)
+
+    work_dir = tempfile.mkdtemp(prefix='pen_serve_')
+    report = {'size': args.size, 'concurrency': args.concurrency, 'workers': args.workers, 'threads': args.threads}
+    try:
+        bucket_dir, images_dir, _, _ = prepare_archive(work_dir, args.size)
+        for name in args.servers:
+            report[name] = run_server(name, SERVER_COMMANDS[name], bucket_dir, images_dir, args, weights)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
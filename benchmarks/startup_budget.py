@@ -0,0 +1,134 @@
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import subprocess
+
+# Import-time and CLI startup budgets for the pipeline entry points:
+#   python -m benchmarks.startup_budget            # check against the baseline
+#   python -m benchmarks.startup_budget --update   # re-record the baseline
+# Each module is imported in a fresh interpreter with -X importtime; the check
+# fails if a heavy third-party package is pulled in at import time (they are
+# imported by the functions that use them) or if the cumulative import time or
+# `--help` wall time grows past the recorded baseline by more than the tolerance.
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), 'startup_baseline.json')
+
+# module -> run `python <module>.py --help` as well (scripts without a CLI parser
+# such as update_content.py run a whole cycle on import and are not listed)
+ENTRY_POINTS = {
+    'aggregate_news': True,
+    'gemini_news_enhancer': True,
+    'image_generator': False,
+    'image_providers': False,
+    'pipeline_daemon': True,
+    'reconcile_images': True,
+    'categorizer': False,
+}
+HEAVY_MODULES = ('feedparser', 'newspaper', 'GoogleNews', 'pandas', 'numpy', 'google', 'PIL', 'requests', 'dotenv', 'flask')
+TOLERANCE = 1.5  # allowed ratio to the baseline
+MIN_SLACK_MS = 25  # absolute allowance, import times of a few ms are mostly noise
+IMPORTTIME_RE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)')
+
+
+def import_profile(module):
+    """(cumulative ms of the module itself, top-level packages it imported), or (None, error)."""
+    out = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                         cwd=ROOT_DIR, capture_output=True, text=True)
+    if out.returncode != 0:
+        return None, out.stderr.strip().splitlines()[-1]
+    cumulative, packages = None, set()
+    for line in out.stderr.splitlines():
+        m = IMPORTTIME_RE.match(line)
+        if not m:
+            continue
+        packages.add(m.group(4).split('.')[0])
+        if m.group(4) == module and len(m.group(3)) == 1:
+            cumulative = int(m.group(2)) / 1000
+    return cumulative, packages
+
+
+def help_ms(module):
+    start = time.perf_counter()
+    out = subprocess.run([sys.executable, f'{module}.py', '--help'], cwd=ROOT_DIR, capture_output=True, text=True)
+    elapsed = (time.perf_counter() - start) * 1000
+    if out.returncode != 0:
+        return None, out.stderr.strip().splitlines()[-1] if out.stderr.strip() else f'exit {out.returncode}'
+    return elapsed, None
+
+
+def measure(repeat):
+    """Best of `repeat` runs per entry point."""
+    results = {}
+    for module, has_cli in ENTRY_POINTS.items():
+        result = {}
+        runs = [import_profile(module) for _ in range(repeat)]
+        if runs[0][0] is None:
+            result['error'] = runs[0][1]
+        else:
+            result['import_ms'] = round(min(r[0] for r in runs), 1)
+            result['heavy_imports'] = sorted(set.union(*(r[1] for r in runs)) & set(HEAVY_MODULES))
+        if has_cli and 'error' not in result:
+            runs = [help_ms(module) for _ in range(repeat)]
+            if runs[0][0] is None:
+                result['help_error'] = runs[0][1]
+            else:
+                result['help_ms'] = round(min(r[0] for r in runs), 1)
+        results[module] = result
+    return results
+
+
+def check(results, baseline):
+    problems = []
+    for module, result in results.items():
+        if result.get('heavy_imports'):
+            problems.append(f"{module}: imports {', '.join(result['heavy_imports'])} at import time")
+        for key in ('import_ms', 'help_ms'):
+            expected = baseline.get(module, {}).get(key)
+            if expected is None or key not in result:
+                continue
+            budget = max(expected * TOLERANCE, expected + MIN_SLACK_MS)
+            if result[key] > budget:
+                problems.append(f'{module}: {key} {result[key]} over budget {budget:.1f} (baseline {expected})')
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check import-time and startup budgets of the pipeline entry points.')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per entry point (the fastest is kept)')
+    parser.add_argument('--update', action='store_true', help='Record the current measurements as the baseline')
+    parser.add_argument('--output', default=None, help='Write the JSON report to this file')
+    args = parser.parse_args()
+
+    results = measure(args.repeat)
+    baseline = {}
+    if os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+    if args.update:
+        # Entry points that cannot be measured here (missing dependency) keep their old baseline
+        for module, result in results.items():
+            recorded = {k: result[k] for k in ('import_ms', 'help_ms') if k in result}
+            if recorded:
+                baseline[module] = {**baseline.get(module, {}), **recorded}
+        with open(BASELINE_PATH, 'w', encoding='utf-8') as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write('\n')
+
+    report = {'results': results, 'problems': check(results, baseline)}
+    print(json.dumps(report, indent=2))
+    for module, result in results.items():
+        status = result.get('error') or f"import {result['import_ms']}ms" + (
+            f", --help {result['help_ms']}ms" if 'help_ms' in result else
+            f", --help unavailable ({result['help_error']})" if 'help_error' in result else '')
+        print(f'{module:>22}: {status}')
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    return 1 if report['problems'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
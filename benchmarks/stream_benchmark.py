@@ -0,0 +1,90 @@
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import tracemalloc
+
+# Time-to-first-byte and peak Python allocations of one /api/news request as
+# the archive grows, buffered (jsonify) vs streamed JSON array vs NDJSON:
+#   python -m benchmarks.stream_benchmark --sizes 1000 5000 20000
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT_DIR)
+sys.path.insert(0, os.path.join(ROOT_DIR, 'backend'))
+
+from benchmarks.load_test import prepare_archive
+
+MODES = {
+    'buffered': '/api/news?stream=0',
+    'stream': '/api/news',
+    'ndjson': '/api/news?format=ndjson',
+}
+
+
+def measure(client, path):
+    """One request: (ttfb seconds, total seconds, body bytes, peak allocated MB during the request)."""
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    start = time.perf_counter()
+    resp = client.get(path)
+    body = iter(resp.response)
+    first = next(body, b'')
+    ttfb = time.perf_counter() - start
+    # Count the bytes without keeping them, so only server-side memory is measured
+    total_bytes = len(first) + sum(len(chunk) for chunk in body)
+    elapsed = time.perf_counter() - start
+    resp.close()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return ttfb, elapsed, total_bytes, peak / (1024 * 1024)
+
+
+def bench_size(backend, work_dir, size, repeat):
+    bucket_dir, images_dir, _, _ = prepare_archive(work_dir, size)
+    backend.NEWS_BUCKET_DIR = bucket_dir
+    backend.IMAGES_DIR = images_dir
+    backend.preload()
+    client = backend.app.test_client()
+    result = {}
+    for mode, path in MODES.items():
+        measure(client, path)  # warm-up
+        runs = [measure(client, path) for _ in range(repeat)]
+        result[mode] = {
+            'ttfb_ms': round(min(r[0] for r in runs) * 1000, 2),
+            'total_ms': round(min(r[1] for r in runs) * 1000, 2),
+            'bytes': runs[0][2],
+            'peak_alloc_mb': round(max(r[3] for r in runs), 2),
+        }
+    shutil.rmtree(bucket_dir, ignore_errors=True)
+    shutil.rmtree(images_dir, ignore_errors=True)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Memory and time-to-first-byte curve of /api/news response modes.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 5000, 20000], help='Synthetic archive sizes')
+    parser.add_argument('--repeat', type=int, default=3, help='Measured requests per mode and size')
+    parser.add_argument('--output', default=None, help='Write the JSON report to this file')
+    args = parser.parse_args()
+
+    import app as backend
+    work_dir = tempfile.mkdtemp(prefix='pen_stream_')
+    try:
+        report = {str(size): bench_size(backend, work_dir, size, args.repeat) for size in args.sizes}
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    print(json.dumps(report, indent=2))
+    print(f"\n{'size':>8} " + ' '.join(f'{m + " ttfb/peak":>24}' for m in MODES))
+    for size, modes in report.items():
+        print(f'{size:>8} ' + ' '.join(f"{modes[m]['ttfb_ms']:>10.1f}ms {modes[m]['peak_alloc_mb']:>9.1f}MB" for m in MODES))
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,51 @@
+import os
+import json
+import random
+import uuid
+from datetime import datetime, timedelta
+
+from benchmarks.fake_servers import WORDS, sentence
+
+# Synthetic 'news bucket' archives shaped like the enhancer's output, used to
+# measure the backend at 1k/10k/100k articles without real data.
+CATEGORIES = ['technology', 'world', 'business', 'sports', 'science', 'health', 'politics']
+
+
+def generate_articles(count, seed=42, paragraphs=4):
+    rng = random.Random(seed)
+    start = datetime(2025, 1, 1)
+    for i in range(count):
+        news_id = str(uuid.UUID(int=rng.getrandbits(128), version=4))
+        headline = sentence(rng, 9)
+        summary = ' '.join(sentence(rng) for _ in range(3))
+        yield {
+            'news_id': news_id,
+            'source': rng.choice(['BBC News', 'CNN', 'Reuters', 'The Verge']),
+            'heading': headline,
+            'summary': summary,
+            'link': f'https://example.com/{news_id}',
+            'category': rng.choice(CATEGORIES),
+            'full_text': '\n'.join(' '.join(sentence(rng, 18) for _ in range(4)) for _ in range(paragraphs)),
+            'seo_headline': f'**{headline}**',
+            'rewritten_summary': summary,
+            'rewritten_full_text': '',
+            'image_prompt': sentence(rng, 30),
+            'image_path': f'{news_id}_unsplash.jpg',
+            'image_id': news_id,
+            'tags': rng.sample(WORDS, 5) if i % 4 else [],
+            'date_published': (start + timedelta(minutes=7 * i)).isoformat(),
+        }
+
+
+def write_archive(bucket_dir, count, files=4, seed=42, paragraphs=4):
+    """Write `count` articles split across `files` JSON files in bucket_dir. Returns the paths."""
+    os.makedirs(bucket_dir, exist_ok=True)
+    articles = list(generate_articles(count, seed, paragraphs))
+    per_file = max(1, -(-count // files))
+    paths = []
+    for i in range(0, count, per_file):
+        path = os.path.join(bucket_dir, f'news_synthetic_{i // per_file}.json')
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(articles[i:i + per_file], f, ensure_ascii=False)
+        paths.append(path)
+    return paths
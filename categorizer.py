@@ -0,0 +1,122 @@
+import re
+import hashlib
+from collections import Counter
+
+import metrics
+
+# Keyword categorizer shared by ingest (aggregate_news) and the API's article
+# store. Keywords are matched as whole words/phrases: each article is tokenized
+# once and its 1..N-grams are looked up in a phrase table, so the cost per
+# article does not grow with the number of keywords. Every category is scored
+# in the same pass; subcategory hits also count towards their parent.
+CATEGORIES = {
+    'sports': ['football', 'cricket', 'tennis', 'sports', 'game', 'match'],
+    'business': ['business', 'stock', 'market', 'finance', 'company'],
+    'technology': ['tech', 'ai', 'robot', 'software', 'hardware', 'technology'],
+    'science': ['science', 'research', 'study', 'scientist'],
+    'entertainment': ['movie', 'film', 'music', 'celebrity', 'entertainment'],
+    'world': ['world', 'international', 'global', 'war', 'country'],
+    'health': ['health', 'covid', 'virus', 'doctor', 'hospital'],
+    'politics': ['election', 'government', 'politics', 'minister', 'policy'],
+    'crime': ['crime', 'attack', 'police', 'court', 'arrest', 'murder'],
+    'environment': ['climate', 'environment', 'pollution', 'wildlife', 'nature'],
+    'sports:football': ['football', 'soccer', 'premier league', 'fifa'],
+    'sports:cricket': ['cricket', 'ipl', 'test match', 'odi'],
+    'business:markets': ['stock market', 'share', 'index', 'sensex', 'nifty'],
+}
+HEADLINE_WEIGHT = 2
+DEFAULT_CATEGORY = 'General'
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text):
+    return TOKEN_RE.findall((text or '').lower())
+
+
+def table_version(table):
+    """Short hash of a keyword table, stored with ingest-time results so a table change triggers reclassification."""
+    return hashlib.sha1(repr(sorted((k, tuple(v)) for k, v in table.items())).encode('utf-8')).hexdigest()[:12]
+
+
+class Categorizer:
+    def __init__(self, table=None):
+        self.table = table if table is not None else CATEGORIES
+        self.version = table_version(self.table)
+        self.order = {}
+        self.phrases = {}
+        self.max_ngram = 1
+        for index, (key, keywords) in enumerate(self.table.items()):
+            main = key.split(':', 1)[0]
+            self.order.setdefault(main, index)
+            self.order[key] = index
+            for keyword in keywords:
+                tokens = tokenize(keyword)
+                if not tokens:
+                    continue
+                forms = [tokens]
+                # Simple plurals: 'stock' also matches 'stocks'
+                if not tokens[-1].endswith('s'):
+                    forms.append(tokens[:-1] + [tokens[-1] + 's'])
+                for form in forms:
+                    self.phrases.setdefault(' '.join(form), set()).add(key)
+                self.max_ngram = max(self.max_ngram, len(tokens))
+
+    def scores(self, text, weight=1, totals=None):
+        """Add keyword hits in `text` to `totals` (a Counter of category key -> score)."""
+        totals = totals if totals is not None else Counter()
+        tokens = tokenize(text)
+        phrases = self.phrases
+        for i in range(len(tokens)):
+            for n in range(1, min(self.max_ngram, len(tokens) - i) + 1):
+                keys = phrases.get(' '.join(tokens[i:i + n]))
+                if keys:
+                    for key in keys:
+                        totals[key] += weight
+        return totals
+
+    def classify_text(self, headline, body=''):
+        totals = self.scores(headline, HEADLINE_WEIGHT)
+        self.scores(body, 1, totals)
+        return self.pick(totals)
+
+    def pick(self, totals):
+        if not totals:
+            return DEFAULT_CATEGORY, None
+        mains = Counter()
+        for key, score in totals.items():
+            mains[key.split(':', 1)[0]] += score
+        main = min(mains, key=lambda m: (-mains[m], self.order[m]))
+        subs = [k for k in totals if k.startswith(main + ':')]
+        sub = min(subs, key=lambda k: (-totals[k], self.order[k])).split(':', 1)[1] if subs else None
+        return main.capitalize(), sub.capitalize() if sub else None
+
+    def classify(self, item):
+        headline = item.get('seo_headline') or item.get('heading') or item.get('title') or ''
+        body = ' '.join(filter(None, (item.get('summary'), item.get('rewritten_summary'))))
+        return self.classify_text(headline, body)
+
+    def classify_batch(self, items):
+        """Classify many articles with one compiled table. Returns [(category, subcategory), ...]."""
+        with metrics.timer('categorize_seconds', 'Time to categorize a batch of articles'):
+            return [self.classify(item) for item in items]
+
+
+_default = None
+
+
+def get_categorizer():
+    global _default
+    if _default is None:
+        _default = Categorizer()
+    return _default
+
+
+def categorize_articles(items, categorizer=None):
+    """Set category, subcategory and category_version on each item in place."""
+    categorizer = categorizer or get_categorizer()
+    for item, (category, subcategory) in zip(items, categorizer.classify_batch(items)):
+        item['category'] = category
+        item['subcategory'] = subcategory
+        item['category_version'] = categorizer.version
+    return items
@@ -0,0 +1,165 @@
+import os
+import json
+import time
+import random
+import logging
+import threading
+
+# Per-source polling scheduler. Each feed's interval is learned from how often
+# it actually publishes (entry timestamps, new-entry counts and 304 responses),
+# so busy feeds are polled more often and quiet ones less; failing feeds back
+# off exponentially with jitter.
+STATE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'feed_state.json')
+DEFAULT_INTERVAL = 600  # seconds
+MIN_INTERVAL = 120
+MAX_INTERVAL = 3600
+BACKOFF_BASE = 60
+BACKOFF_MAX = 3600
+EWMA_ALPHA = 0.3
+QUIET_FACTOR = 1.5  # interval growth when a poll finds nothing new
+SEEN_LIMIT = 300
+
+
+def backoff_delay(failures, base=BACKOFF_BASE, cap=BACKOFF_MAX):
+    """Exponential backoff with full jitter."""
+    return random.uniform(base / 2, min(cap, base * (2 ** max(failures - 1, 0))))
+
+
+def _clamp(value, low=MIN_INTERVAL, high=MAX_INTERVAL):
+    return max(low, min(high, value))
+
+
+class FeedScheduler:
+    def __init__(self, sources, state_path=STATE_PATH):
+        self.state_path = state_path
+        self.state = {}
+        self._lock = threading.Lock()
+        self._load()
+        for source in sources:
+            self.state.setdefault(source, self._new_state())
+
+    @staticmethod
+    def _new_state():
+        return {
+            'interval': DEFAULT_INTERVAL,
+            'next_due': 0.0,
+            'last_poll': 0.0,
+            'failures': 0,
+            'etag': None,
+            'modified': None,
+            'seen': [],
+            'polls': 0,
+            'not_modified': 0,
+            'new_entries': 0,
+            'crawl_delay': 0.0,
+        }
+
+    def _load(self):
+        if self.state_path and os.path.exists(self.state_path):
+            try:
+                with open(self.state_path, 'r', encoding='utf-8') as f:
+                    self.state = json.load(f)
+            except Exception as e:
+                logging.warning(f"Failed to load feed state {self.state_path}: {e}")
+                self.state = {}
+
+    def save(self):
+        if not self.state_path:
+            return
+        with self._lock:
+            tmp_path = self.state_path + '.tmp'
+            try:
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(self.state, f)
+                os.replace(tmp_path, self.state_path)
+            except Exception as e:
+                logging.warning(f"Failed to save feed state {self.state_path}: {e}")
+
+    def is_due(self, source, now=None):
+        now = now or time.time()
+        return self.state.setdefault(source, self._new_state())['next_due'] <= now
+
+    def due_sources(self, sources, now=None):
+        return [s for s in sources if self.is_due(s, now)]
+
+    def seconds_until_next(self, sources=None, now=None):
+        now = now or time.time()
+        states = [self.state[s] for s in (sources or self.state) if s in self.state]
+        if not states:
+            return DEFAULT_INTERVAL
+        return max(0.0, min(st['next_due'] for st in states) - now)
+
+    def conditional_headers(self, source):
+        st = self.state.get(source, {})
+        return {'etag': st.get('etag'), 'modified': st.get('modified')}
+
+    def set_crawl_delay(self, source, delay):
+        """robots.txt Crawl-delay of the source's domain: a floor for its polling interval."""
+        with self._lock:
+            self.state.setdefault(source, self._new_state())['crawl_delay'] = float(delay or 0)
+
+    def is_new(self, source, entry_key):
+        return entry_key not in self.state.get(source, {}).get('seen', [])
+
+    def record_success(self, source, entry_keys=(), timestamps=(), not_modified=False, etag=None, modified=None, now=None):
+        """
+        Update a source after a successful poll. entry_keys are the ids/links of the
+        entries returned, timestamps their publication times (epoch seconds).
+        Returns the number of entries not seen before.
+        """
+        now = now or time.time()
+        with self._lock:
+            st = self.state.setdefault(source, self._new_state())
+            seen = st['seen']
+            new_keys = [k for k in entry_keys if k and k not in seen]
+            st['seen'] = (seen + new_keys)[-SEEN_LIMIT:]
+            st['polls'] += 1
+            st['failures'] = 0
+            st['new_entries'] += len(new_keys)
+            if etag:
+                st['etag'] = etag
+            if modified:
+                st['modified'] = modified
+
+            if not_modified or not new_keys:
+                if not_modified:
+                    st['not_modified'] += 1
+                target = st['interval'] * QUIET_FACTOR
+            else:
+                stamps = sorted(t for t in timestamps if t)
+                if len(stamps) >= 2:
+                    # Average gap between published entries
+                    target = (stamps[-1] - stamps[0]) / (len(stamps) - 1)
+                elif st['last_poll']:
+                    target = (now - st['last_poll']) / len(new_keys)
+                else:
+                    target = st['interval']
+            low = max(MIN_INTERVAL, st.get('crawl_delay', 0.0))
+            st['interval'] = _clamp((1 - EWMA_ALPHA) * st['interval'] + EWMA_ALPHA * _clamp(target, low), low)
+            st['last_poll'] = now
+            st['next_due'] = now + st['interval']
+            return len(new_keys)
+
+    def record_failure(self, source, now=None):
+        now = now or time.time()
+        with self._lock:
+            st = self.state.setdefault(source, self._new_state())
+            st['failures'] += 1
+            delay = max(backoff_delay(st['failures']), st.get('crawl_delay', 0.0))
+            st['next_due'] = now + delay
+            logging.warning(f"[Scheduler] {source} failed {st['failures']} time(s), next poll in {delay:.0f}s")
+            return delay
+
+    def summary(self):
+        return {
+            source: {
+                'interval': round(st['interval']),
+                'next_due_in': round(max(0.0, st['next_due'] - time.time())),
+                'failures': st['failures'],
+                'polls': st['polls'],
+                'not_modified': st['not_modified'],
+                'new_entries': st['new_entries'],
+                'crawl_delay': st.get('crawl_delay', 0.0),
+            }
+            for source, st in self.state.items()
+        }
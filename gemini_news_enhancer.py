@@ -1,21 +1,23 @@
 import os
 import time
 import re
-try:
-    from google import genai
-    _GENAI_CLIENT_STYLE = True
-except ImportError:
-    import google.generativeai as genai
-    _GENAI_CLIENT_STYLE = hasattr(genai, "Client")
-
-from PIL import Image
-from io import BytesIO
 import json
 import logging
 import argparse
 import csv
-from dotenv import load_dotenv
-from parse_gemini_response import parse_gemini_response
+from concurrent.futures import ThreadPoolExecutor
+from parse_gemini_response import parse_gemini_response, parse_gemini_stream
+import metrics
+import prompt_builder
+
+# Root for the images/ and news bucket/ copies made by save_news (overridable, e.g. by the benchmarks)
+BASE_DIR = os.path.abspath(os.path.dirname(__file__))
+RETRY_DELAY = 30  # seconds, doubled per retry up to 300
+# Stream the rewrite and start tagging/illustrating once the summary is in (GEMINI_STREAMING=0 to disable)
+STREAMING = os.environ.get('GEMINI_STREAMING', '1') != '0'
+# The Gemini SDK is imported on first use (see load_genai), not at import time
+genai = None
+_GENAI_CLIENT_STYLE = None
 
 def setup_logging():
     logging.basicConfig(
@@ -44,7 +46,7 @@ def save_news(news_list, json_path='enhanced_news.json', csv_path='enhanced_news
     import os
     import shutil
     import requests
-    images_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), 'images'))
+    images_dir = os.path.join(BASE_DIR, 'images')
     if not os.path.exists(images_dir):
         os.makedirs(images_dir)
     for news in news_list:
@@ -85,20 +87,21 @@ def save_news(news_list, json_path='enhanced_news.json', csv_path='enhanced_news
                 news['image'] = f"{news['image_id']}.jpg"
             else:
                 news['image'] = 'no-image.png'
-    with open(json_path, 'w', encoding='utf-8') as f:
-        json.dump(news_list, f, ensure_ascii=False, indent=2)
-    # Save to CSV
-    if news_list:
-        keys = ['news_id', 'seo_headline', 'rewritten_summary', 'image_prompt', 'image_path', 'image_id', 'tags']
-        with open(csv_path, 'w', encoding='utf-8', newline='') as csvfile:
-            writer = csv.DictWriter(csvfile, fieldnames=keys)
-            writer.writeheader()
-            for item in news_list:
-                row = {k: (', '.join(item.get(k, [])) if isinstance(item.get(k, []), list) else item.get(k, '')) for k in keys}
-                writer.writerow(row)
+    with metrics.timer('disk_write_seconds', 'Time spent writing JSON/CSV output', stage='enhance'):
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump(news_list, f, ensure_ascii=False, indent=2)
+        # Save to CSV
+        if news_list:
+            keys = ['news_id', 'seo_headline', 'rewritten_summary', 'image_prompt', 'image_path', 'image_id', 'tags']
+            with open(csv_path, 'w', encoding='utf-8', newline='') as csvfile:
+                writer = csv.DictWriter(csvfile, fieldnames=keys)
+                writer.writeheader()
+                for item in news_list:
+                    row = {k: (', '.join(item.get(k, [])) if isinstance(item.get(k, []), list) else item.get(k, '')) for k in keys}
+                    writer.writerow(row)
     logging.info(f"Saved {len(news_list)} enhanced news articles to {json_path} and {csv_path}.")
     # AUTOMATION: Copy enhanced_news.json to news bucket
-    news_bucket_path = os.path.abspath(os.path.join(os.path.dirname(__file__), 'news bucket', 'enhanced_news.json'))
+    news_bucket_path = os.path.join(BASE_DIR, 'news bucket', 'enhanced_news.json')
     try:
         shutil.copyfile(json_path, news_bucket_path)
         logging.info(f"Copied {json_path} to {news_bucket_path} for backend consumption.")
@@ -106,6 +109,40 @@ def save_news(news_list, json_path='enhanced_news.json', csv_path='enhanced_news
         logging.error(f"Failed to copy enhanced news to news bucket: {e}")
 
 from unique_id_util import generate_unique_id
+import image_cache
+from image_generator import generate_image
+
+def report_image_cache_stats():
+    image_cache.flush()
+    image_cache.report_stats()
+
+# Gemini clients are reused across articles (and across cycles in pipeline_daemon.py)
+_clients = {}
+
+def load_genai():
+    """Import the Gemini SDK (google.genai, else google.generativeai) once."""
+    global genai, _GENAI_CLIENT_STYLE
+    if genai is None:
+        try:
+            from google import genai as module
+            client_style = True
+        except ImportError:
+            import google.generativeai as module
+            client_style = hasattr(module, "Client")
+        genai = module
+        if _GENAI_CLIENT_STYLE is None:
+            _GENAI_CLIENT_STYLE = client_style
+    return genai
+
+def get_client(api_key):
+    if _GENAI_CLIENT_STYLE is None:
+        load_genai()
+    if not _GENAI_CLIENT_STYLE:
+        return None
+    api_key = api_key or os.getenv("GOOGLE_API_KEY")
+    if api_key not in _clients:
+        _clients[api_key] = load_genai().Client(api_key=api_key)
+    return _clients[api_key]
 
 def gemini_rewrite_and_image(news_item, gemini_api_key, unsplash_key, processed_ids=None):
     # Use existing news_id if present
@@ -121,18 +158,67 @@ def gemini_rewrite_and_image(news_item, gemini_api_key, unsplash_key, processed_
         image_prompt = f"An illustration for: {headline}"
     return {'seo_headline': headline, 'rewritten_summary': summary, 'image_prompt': image_prompt}
 
-def call_with_retry(client, model_name, prompt, max_retries=5):
-    delay = 30
+def call_with_retry(client, model_name, prompt, max_retries=5, call_type='generate'):
+    delay = RETRY_DELAY
     for attempt in range(max_retries):
+        if attempt:
+            metrics.counter('gemini_retries_total', 'Gemini text call retries').inc(call=call_type)
+        metrics.counter('gemini_calls_total', 'Gemini text calls').inc(call=call_type)
+        try:
+            with metrics.timer('gemini_request_seconds', 'Gemini text call latency', call=call_type):
+                if _GENAI_CLIENT_STYLE:
+                    return client.models.generate_content(model=model_name, contents=prompt)
+                else:
+                    load_genai().configure(api_key=os.getenv("GOOGLE_API_KEY"))
+                    model = genai.GenerativeModel(model_name)
+                    return model.generate_content(prompt)
+        except Exception as e:
+            if '429' in str(e) or 'quota' in str(e):
+                metrics.counter('gemini_429_total', 'Gemini quota (429) errors').inc(call=call_type)
+                print(f"[Gemini] Quota exceeded, retrying in {delay} seconds (attempt {attempt+1}/{max_retries})...")
+                time.sleep(delay)
+                delay = min(delay * 2, 300)
+            else:
+                if attempt == max_retries - 1:
+                    raise
+                time.sleep(delay)
+    raise RuntimeError("Exceeded maximum retries due to Gemini API quota limits.")
+
+def stream_with_retry(client, model_name, prompt, max_retries=5, call_type='generate'):
+    """
+    Yield the text chunks of a streamed generation. Retries like call_with_retry,
+    but only until the first chunk has arrived; later failures are raised.
+    """
+    delay = RETRY_DELAY
+    for attempt in range(max_retries):
+        if attempt:
+            metrics.counter('gemini_retries_total', 'Gemini text call retries').inc(call=call_type)
+        metrics.counter('gemini_calls_total', 'Gemini text calls').inc(call=call_type)
+        start = time.perf_counter()
+        started = False
         try:
             if _GENAI_CLIENT_STYLE:
-                return client.models.generate_content(model=model_name, contents=prompt)
+                stream = client.models.generate_content_stream(model=model_name, contents=prompt)
             else:
-                genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
-                model = genai.GenerativeModel(model_name)
-                return model.generate_content(prompt)
+                load_genai().configure(api_key=os.getenv("GOOGLE_API_KEY"))
+                stream = genai.GenerativeModel(model_name).generate_content(prompt, stream=True)
+            for chunk in stream:
+                text = chunk.text
+                if not text:
+                    continue
+                if not started:
+                    started = True
+                    metrics.histogram('gemini_first_chunk_seconds', 'Time to the first streamed chunk').observe(
+                        time.perf_counter() - start, call=call_type)
+                yield text
+            metrics.histogram('gemini_request_seconds', 'Gemini text call latency').observe(
+                time.perf_counter() - start, call=call_type)
+            return
         except Exception as e:
+            if started:
+                raise
             if '429' in str(e) or 'quota' in str(e):
+                metrics.counter('gemini_429_total', 'Gemini quota (429) errors').inc(call=call_type)
                 print(f"[Gemini] Quota exceeded, retrying in {delay} seconds (attempt {attempt+1}/{max_retries})...")
                 time.sleep(delay)
                 delay = min(delay * 2, 300)
@@ -142,84 +228,152 @@ def call_with_retry(client, model_name, prompt, max_retries=5):
                 time.sleep(delay)
     raise RuntimeError("Exceeded maximum retries due to Gemini API quota limits.")
 
-def gemini_rewrite_and_image(news_item, gemini_api_key, unsplash_key, processed_ids=None):
+# Tag and image work for an article runs here while its rewrite is still streaming
+_stage_pool = None
+
+def get_stage_pool():
+    global _stage_pool
+    if _stage_pool is None:
+        _stage_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix='enhance-stage')
+    return _stage_pool
+
+REWRITE_TEMPLATE = (
+    "Rewrite the following news article in the style of a senior BBC news editor or journalist. "
+    "Your output should be:\n"
+    "Headline: <headline>\n"
+    "Summary: <3 paragraphs summarizing the full article, professional, objective, concise, and authoritative. No emojis or informal language.>\n"
+    "Full Article: <Rewrite the entire article in 4-8 paragraphs, professional, objective, and detailed. No emojis or informal language.>\n"
+    "Also, generate a prompt for an illustration image that matches the news.\n"
+    "Original headline: {headline}\n"
+    "Full article: {text}\n"
+)
+TAGS_TEMPLATE = (
+    "Generate 5 relevant tags for this news article, separated by commas.\n"
+    "Headline: {headline}\n"
+    "Summary: {text}"
+)
+IMAGE_PROMPT_TEMPLATE = (
+    "Given the following news article, generate a highly descriptive prompt for an illustration image that best represents the story. "
+    "Be specific, avoid generic phrases, and focus on the key people, places, events, and mood.\n"
+    "Article: {text}"
+)
+
+def rewrite_prompt(news_item, usage=None):
+    return prompt_builder.build_prompt('rewrite', REWRITE_TEMPLATE,
+                                       news_item.get('full_text') or news_item.get('summary', ''),
+                                       news_item.get('heading', ''), usage)
+
+def generate_tags(client, model_name, headline, summary, news_id, usage=None):
+    tag_prompt = prompt_builder.build_prompt('tags', TAGS_TEMPLATE, summary, headline, usage)
+    try:
+        tag_response = call_with_retry(client, model_name, tag_prompt, call_type='tags')
+        return [tag.strip() for tag in tag_response.text.split(',') if tag.strip()]
+    except Exception as e:
+        logging.warning(f"Gemini tag generation failed for news_id {news_id}: {e}")
+        return []
+
+def improve_image_prompt(client, model_name, article_text, news_id, headline='', usage=None):
+    # Generate a highly relevant image prompt from the article text
+    image_prompt_context = prompt_builder.build_prompt('image_prompt', IMAGE_PROMPT_TEMPLATE, article_text, headline, usage)
+    try:
+        improved_image_prompt_resp = call_with_retry(client, model_name, image_prompt_context, call_type='image_prompt')
+        return improved_image_prompt_resp.text.strip()
+    except Exception as e:
+        logging.warning(f"Gemini image prompt improvement failed for news_id {news_id}: {e}")
+        return ''
+
+def make_image(image_prompt, gemini_api_key, unsplash_key, news_id, category):
+    # Generate and connect image in-process, passing image_id and category bucket
+    try:
+        result = generate_image(image_prompt, gemini_api_key or None, unsplash_key or None,
+                                filename_hint=news_id, category=category)
+        if result:
+            return result['image_path']
+    except Exception as e:
+        print(f"Image generation failed: {e}")
+    return None
+
+def image_stage(client, model_name, article_text, fallback_prompt, gemini_api_key, unsplash_key, news_id, category, usage=None):
+    """Improve the image prompt, then generate the image. Returns (image_prompt, image_path)."""
+    image_prompt = improve_image_prompt(client, model_name, article_text, news_id, fallback_prompt, usage) if article_text else ''
+    image_path = make_image(image_prompt or fallback_prompt, gemini_api_key, unsplash_key, news_id, category)
+    return image_prompt, image_path
+
+def gemini_rewrite_and_image(news_item, gemini_api_key, unsplash_key, processed_ids=None, stream=None):
+    """
+    Rewrite one article, tag it and illustrate it. With streaming (the default,
+    see GEMINI_STREAMING) the tag and image stages start as soon as the headline
+    and summary have arrived, while the full article is still being generated.
+    """
     # Use existing news_id if present
     news_id = news_item.get('news_id') or generate_unique_id()
     if processed_ids and news_id in processed_ids:
         return None  # Already processed
     model_name = 'gemini-2.0-flash'
     print(f"[Gemini] Using model: {model_name}")
-    client = genai.Client(api_key=gemini_api_key or os.getenv("GOOGLE_API_KEY")) if _GENAI_CLIENT_STYLE else None
+    client = get_client(gemini_api_key)
+    category = news_item.get('category', 'general')
+    original_text = news_item.get('full_text', news_item.get('summary',''))
+    usage = {}  # estimated prompt tokens per call type, kept on the record
+    if STREAMING if stream is None else stream:
+        return _rewrite_streaming(news_item, news_id, client, model_name, category, original_text, gemini_api_key, unsplash_key, usage)
+
     try:
-        prompt = (
-            f"Rewrite the following news article in the style of a senior BBC news editor or journalist. "
-            f"Your output should be:\n"
-            f"Headline: <headline>\n"
-            f"Summary: <3 paragraphs summarizing the full article, professional, objective, concise, and authoritative. No emojis or informal language.>\n"
-            f"Full Article: <Rewrite the entire article in 4-8 paragraphs, professional, objective, and detailed. No emojis or informal language.>\n"
-            f"Also, generate a prompt for an illustration image that matches the news.\n"
-            f"Original headline: {news_item.get('heading','')}\n"
-            f"Full article: {news_item.get('full_text', news_item.get('summary',''))}\n"
-        )
-        response = call_with_retry(client, model_name, prompt)
+        response = call_with_retry(client, model_name, rewrite_prompt(news_item, usage), call_type='rewrite')
         rewritten = parse_gemini_response(response.text)
-        # Ensure rewritten_full_text is present
-        if 'rewritten_full_text' not in rewritten:
-            rewritten['rewritten_full_text'] = ''
-        # Generate a highly relevant image prompt using the full rewritten article
-        image_prompt_context = (
-            f"Given the following news article, generate a highly descriptive prompt for an illustration image that best represents the story. "
-            f"Be specific, avoid generic phrases, and focus on the key people, places, events, and mood.\n"
-            f"Article: {rewritten['rewritten_full_text'] or news_item.get('full_text', news_item.get('summary',''))}"
-        )
-        try:
-            improved_image_prompt_resp = call_with_retry(client, model_name, image_prompt_context)
-            improved_image_prompt = improved_image_prompt_resp.text.strip()
-            if improved_image_prompt:
-                rewritten['image_prompt'] = improved_image_prompt
-        except Exception as e:
-            logging.warning(f"Gemini image prompt improvement failed for news_id {news_id}: {e}")
+        improved_image_prompt = improve_image_prompt(client, model_name, rewritten['rewritten_full_text'] or original_text, news_id,
+                                                     rewritten['seo_headline'] or news_item.get('heading',''), usage)
+        if improved_image_prompt:
+            rewritten['image_prompt'] = improved_image_prompt
     except Exception as e:
         logging.warning(f"Gemini rewrite failed for news_id {news_id}: {e}")
-        rewritten = {'seo_headline': '', 'rewritten_summary': '', 'image_prompt': ''}
-    # Generate tags using Gemini
-    tag_prompt = (
-        f"Generate 5 relevant tags for this news article, separated by commas.\n"
-        f"Headline: {rewritten['seo_headline'] or news_item.get('heading','')}\n"
-        f"Summary: {rewritten['rewritten_summary'] or news_item.get('summary','')}"
-    )
-    try:
-        tag_response = call_with_retry(client, model_name, tag_prompt)
-        tags = [tag.strip() for tag in tag_response.text.split(',') if tag.strip()]
-    except Exception as e:
-        logging.warning(f"Gemini tag generation failed for news_id {news_id}: {e}")
-        tags = []
-    # Use image_generator.py to generate and connect image, passing image_id and category bucket
-    import subprocess
-    import sys
-    import json as pyjson
-    image_id = news_id  # Use the same UUID for both news and image for strong linkage
+        rewritten = {'seo_headline': '', 'rewritten_summary': '', 'rewritten_full_text': '', 'image_prompt': ''}
+    tags = generate_tags(client, model_name, rewritten['seo_headline'] or news_item.get('heading',''),
+                         rewritten['rewritten_summary'] or news_item.get('summary',''), news_id, usage)
     image_prompt_for_gen = rewritten['image_prompt'] or rewritten['seo_headline'] or news_item.get('heading','')
-    image_path = None
-    result_path = None
+    image_path = make_image(image_prompt_for_gen, gemini_api_key, unsplash_key, news_id, category)
+    return enhanced_record(news_item, news_id, rewritten, tags, image_path, usage)
+
+def _rewrite_streaming(news_item, news_id, client, model_name, category, original_text, gemini_api_key, unsplash_key, usage):
+    pool = get_stage_pool()
+    futures = {}
+    start = time.perf_counter()
+
+    def start_stages(headline, summary):
+        # Tags and the image only need the headline and summary
+        headline = headline or news_item.get('heading','')
+        summary = summary or news_item.get('summary','')
+        metrics.histogram('enhance_time_to_summary_seconds', 'Time until tag/image stages could start').observe(
+            time.perf_counter() - start)
+        futures['tags'] = pool.submit(generate_tags, client, model_name, headline, summary, news_id, usage)
+        futures['image'] = pool.submit(image_stage, client, model_name, f"{headline}\n{summary}".strip() or original_text,
+                                       headline, gemini_api_key, unsplash_key, news_id, category, usage)
+
+    completed = {}  # fields fully received so far, kept if the stream breaks off
+
+    def on_field(field, value, parser):
+        completed[field] = value
+        if field == 'rewritten_summary' and not futures:
+            start_stages(parser.value('seo_headline'), value)
+
     try:
-        category = news_item.get('category', 'general')
-        cmd = [
-            'python', 'image_generator.py',
-            '--prompt', f'{image_prompt_for_gen}',
-            '--filename', news_id,
-            '--gemini_key', gemini_api_key or '',
-            '--unsplash_key', unsplash_key or '',
-            '--category', category
-        ]
-        output = subprocess.check_output(cmd, universal_newlines=True)
-        for line in output.splitlines():
-            if line.startswith('Image saved to:'):
-                result_path = line.split(':', 1)[1].strip()
+        rewritten = parse_gemini_stream(
+            stream_with_retry(client, model_name, rewrite_prompt(news_item, usage), call_type='rewrite'), on_field)
     except Exception as e:
-        print(f"Image generator subprocess failed: {e}")
-    image_path = result_path
+        logging.warning(f"Gemini rewrite failed for news_id {news_id}: {e}")
+        # The tag and image stages may already be running on the streamed
+        # headline and summary, so the record keeps them too
+        rewritten = {'seo_headline': '', 'rewritten_summary': '', 'rewritten_full_text': '', 'image_prompt': ''}
+        rewritten.update(completed)
+    if not futures:
+        start_stages(rewritten['seo_headline'], rewritten['rewritten_summary'])
+    tags = futures['tags'].result()
+    improved_image_prompt, image_path = futures['image'].result()
+    if improved_image_prompt:
+        rewritten['image_prompt'] = improved_image_prompt
+    return enhanced_record(news_item, news_id, rewritten, tags, image_path, usage)
 
+def enhanced_record(news_item, news_id, rewritten, tags, image_path, usage=None):
     return {
         'news_id': news_id,
         'seo_headline': rewritten['seo_headline'] or news_item.get('heading',''),
@@ -227,8 +381,10 @@ def gemini_rewrite_and_image(news_item, gemini_api_key, unsplash_key, processed_
         'rewritten_full_text': rewritten.get('rewritten_full_text', ''),
         'image_prompt': rewritten['image_prompt'],
         'image_path': os.path.basename(image_path) if image_path else None,
-        'image_id': image_id,
+        'image_id': news_id,  # Use the same UUID for both news and image for strong linkage
         'tags': tags,
+        'date_published': news_item.get('date_published', ''),
+        'prompt_tokens': dict(usage or {}, total=sum((usage or {}).values())),
     }
 
 def deduplicate_news(news_list):
@@ -253,6 +409,7 @@ def load_processed_ids(json_path='enhanced_news.json'):
 
 def batch_gemini_rewrite(input_json, output_json, gemini_api_key, unsplash_key=None):
     setup_logging()
+    image_cache.reset_stats()
     news_list = load_news(input_json)
     enhanced_news = []
     for i, item in enumerate(news_list):
@@ -266,6 +423,7 @@ def batch_gemini_rewrite(input_json, output_json, gemini_api_key, unsplash_key=N
                 'image_path': result.get('image_path'),
                 'image_id': result.get('image_id'),
                 'tags': result.get('tags'),
+                'prompt_tokens': result.get('prompt_tokens'),
             })
             enhanced_news.append(item)
         if (i+1) % 5 == 0:
@@ -275,6 +433,7 @@ def batch_gemini_rewrite(input_json, output_json, gemini_api_key, unsplash_key=N
     with open(output_json, 'w', encoding='utf-8') as f:
         json.dump(enhanced_news, f, ensure_ascii=False, indent=2)
     logging.info(f"Completed enhancing {len(enhanced_news)} news articles.")
+    report_image_cache_stats()
 
 def main():
     parser = argparse.ArgumentParser(description='Enhance news articles with Gemini AI.')
@@ -294,27 +453,52 @@ def main():
         return
 
     setup_logging()
+    from dotenv import load_dotenv
     load_dotenv()
     gemini_api_key = args.gemini_key or os.getenv('GEMINI_API_KEY')
     unsplash_key = args.unsplash_key or os.getenv('UNSPLASH_ACCESS_KEY')
+    enhance_news_file(args.news_json, args.output_json, args.output_csv, gemini_api_key, unsplash_key, args.skip_existing)
 
-    news_list = load_news(args.news_json)
+def enhance_news_file(news_json, output_json, output_csv, gemini_api_key, unsplash_key=None, skip_existing=False, stream=None):
+    """
+    Enhance every article in news_json and save to output_json/output_csv.
+    With skip_existing, articles already in output_json are kept and not re-enhanced.
+    """
+    image_cache.reset_stats()
+    news_list = load_news(news_json)
     processed_ids = set()
-    if args.skip_existing:
-        processed_ids = set(load_processed_ids(args.output_json))
-
     enhanced_news = []
+    if skip_existing:
+        enhanced_news = load_news(output_json)
+        processed_ids = set(load_processed_ids(output_json))
+
+    queue_depth = metrics.gauge('enhance_queue_depth', 'Articles still waiting to be enhanced')
+    added = saved = 0
     for i, item in enumerate(news_list):
-        if args.skip_existing and item.get('news_id') in processed_ids:
+        queue_depth.set(len(news_list) - i)
+        if skip_existing and item.get('news_id') in processed_ids:
             continue
-        result = gemini_rewrite_and_image(item, gemini_api_key, unsplash_key, processed_ids)
+        with metrics.timer('enhance_article_seconds', 'End-to-end time to enhance one article'):
+            result = gemini_rewrite_and_image(item, gemini_api_key, unsplash_key, processed_ids, stream)
         if result:
             enhanced_news.append(result)
-        if (i+1) % 5 == 0:
-            save_news(enhanced_news, args.output_json, args.output_csv)
+            added += 1
+            metrics.counter('articles_enhanced_total', 'Articles enhanced').inc()
+        if (i+1) % 5 == 0 and added > saved:
+            save_news(enhanced_news, output_json, output_csv)
+            saved = added
             logging.info(f"Checkpoint: processed {i+1} articles.")
-    save_news(enhanced_news, args.output_json, args.output_csv)
-    logging.info(f"Completed enhancing {len(enhanced_news)} news articles.")
+    queue_depth.set(0)
+    if not added:
+        # Rewriting an unchanged file would still bump the bucket signature and
+        # make every backend worker rebuild its store and search index
+        logging.info(f"No new articles enhanced, leaving {output_json} unchanged.")
+    else:
+        if added > saved:
+            save_news(enhanced_news, output_json, output_csv)
+        logging.info(f"Completed enhancing {len(enhanced_news)} news articles ({added} new).")
+    report_image_cache_stats()
+    return enhanced_news
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,164 @@
+import os
+import re
+import json
+import time
+import hashlib
+import logging
+import threading
+
+import metrics
+
+# Persistent prompt -> image cache so near-duplicate stories can reuse an
+# already generated image instead of calling imagen/Unsplash again.
+CACHE_PATH = os.path.join('images bucket', 'prompt_cache.json')
+MAX_ENTRIES = 2000
+SIMILARITY_THRESHOLD = 0.8
+
+STOPWORDS = {
+    'a', 'an', 'the', 'of', 'in', 'on', 'at', 'to', 'for', 'with', 'and', 'or', 'by', 'from',
+    'is', 'are', 'was', 'be', 'as', 'that', 'this', 'it', 'its', 'into', 'over', 'about',
+    'illustration', 'image', 'prompt', 'depicting', 'showing', 'style', 'digital', 'painting',
+}
+
+_lock = threading.Lock()
+_cache = None
+_stats = {'lookups': 0, 'exact_hits': 0, 'similar_hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0}
+
+
+def normalize_prompt(prompt):
+    text = re.sub(r'\*\*|[^a-z0-9\s]', ' ', (prompt or '').lower())
+    return [w for w in text.split() if w not in STOPWORDS and len(w) > 1]
+
+
+def prompt_key(prompt, category=None):
+    raw = f"{category or ''}\x00{(prompt or '').strip()}"
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+def similarity(tokens_a, tokens_b):
+    a, b = set(tokens_a), set(tokens_b)
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def _load(path=CACHE_PATH):
+    global _cache
+    if _cache is None:
+        _cache = {}
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    _cache = json.load(f)
+            except Exception as e:
+                logging.warning(f"Failed to load image cache {path}: {e}")
+                _cache = {}
+    return _cache
+
+
+def _save(path=CACHE_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(_cache, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def lookup(prompt, category=None, threshold=SIMILARITY_THRESHOLD, path=CACHE_PATH):
+    """
+    Return a cached {'image_path', 'image_id'} for an exact or similar prompt, or None.
+    Entries whose image file has disappeared are dropped.
+    """
+    with _lock:
+        cache = _load(path)
+        _stats['lookups'] += 1
+        entry = cache.get(prompt_key(prompt, category))
+        hit_type = 'exact_hits'
+        if entry is not None and not os.path.isfile(entry['image_path']):
+            cache.pop(entry['key'], None)
+            entry = None
+        if entry is None:
+            tokens = normalize_prompt(prompt)
+            best_score = 0.0
+            for candidate in list(cache.values()):
+                if candidate.get('category') != category:
+                    continue
+                score = similarity(tokens, candidate.get('tokens', []))
+                if score < threshold or score <= best_score:
+                    continue
+                if not os.path.isfile(candidate['image_path']):
+                    cache.pop(candidate['key'], None)
+                    continue
+                entry, best_score = candidate, score
+            hit_type = 'similar_hits'
+        if entry is None:
+            _stats['misses'] += 1
+            metrics.counter('image_cache_lookups_total', 'Image prompt cache lookups by result').inc(result='miss')
+            return None
+        _stats[hit_type] += 1
+        metrics.counter('image_cache_lookups_total', 'Image prompt cache lookups by result').inc(result=hit_type[:-len('_hits')])
+        entry['last_used'] = time.time()
+        entry['hits'] = entry.get('hits', 0) + 1
+        return {'image_path': entry['image_path'], 'image_id': entry['image_id']}
+
+
+def store(prompt, result, category=None, max_entries=MAX_ENTRIES, path=CACHE_PATH):
+    """Record a freshly generated image and evict least recently used entries beyond max_entries."""
+    if not result or not result.get('image_path'):
+        return
+    with _lock:
+        cache = _load(path)
+        key = prompt_key(prompt, category)
+        cache[key] = {
+            'key': key,
+            'prompt': prompt,
+            'tokens': normalize_prompt(prompt),
+            'category': category,
+            'image_path': result['image_path'],
+            'image_id': result.get('image_id'),
+            'last_used': time.time(),
+            'hits': 0,
+        }
+        _stats['stores'] += 1
+        if len(cache) > max_entries:
+            oldest = sorted(cache.values(), key=lambda e: e.get('last_used', 0))[:len(cache) - max_entries]
+            for entry in oldest:
+                cache.pop(entry['key'], None)
+                _stats['evictions'] += 1
+        try:
+            _save(path)
+        except Exception as e:
+            logging.warning(f"Failed to save image cache {path}: {e}")
+
+
+def flush(path=CACHE_PATH):
+    """Persist last_used/hits updates made by lookups."""
+    with _lock:
+        if _cache is not None:
+            try:
+                _save(path)
+            except Exception as e:
+                logging.warning(f"Failed to save image cache {path}: {e}")
+
+
+def reset_stats():
+    """Zero the counters, so each run (e.g. a daemon cycle) reports its own hit rate."""
+    with _lock:
+        for key in _stats:
+            _stats[key] = 0
+
+
+def get_stats():
+    stats = dict(_stats)
+    hits = stats['exact_hits'] + stats['similar_hits']
+    stats['hit_rate'] = round(hits / stats['lookups'], 3) if stats['lookups'] else 0.0
+    return stats
+
+
+def report_stats():
+    stats = get_stats()
+    logging.info(
+        f"[ImageCache] lookups={stats['lookups']} exact={stats['exact_hits']} similar={stats['similar_hits']} "
+        f"misses={stats['misses']} evictions={stats['evictions']} hit_rate={stats['hit_rate']:.1%}"
+    )
+    return stats
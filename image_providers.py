@@ -0,0 +1,272 @@
+import os
+import re
+import json
+import time
+import logging
+import threading
+from io import BytesIO
+from urllib.parse import quote
+
+import metrics
+
+# Pluggable image providers tried in order by image_generator.generate_image.
+# Each provider has its own concurrency limit, minimum interval between calls
+# and a circuit breaker that is persisted to disk, so that once a quota is
+# exhausted every later article (and every later process) skips straight to
+# the next provider instead of sleeping through retries.
+BREAKER_STATE_PATH = os.path.join('images bucket', 'provider_state.json')
+
+
+class QuotaExhausted(Exception):
+    pass
+
+
+class CircuitBreaker:
+    def __init__(self, name, failure_threshold=3, cooldown=300, quota_cooldown=3600, state_path=BREAKER_STATE_PATH):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.quota_cooldown = quota_cooldown
+        self.state_path = state_path
+        self.failures = 0
+        self.open_until = 0.0
+        self.probing = False
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        if self.state_path and os.path.exists(self.state_path):
+            try:
+                with open(self.state_path, 'r', encoding='utf-8') as f:
+                    state = json.load(f).get(self.name, {})
+                self.failures = state.get('failures', 0)
+                self.open_until = state.get('open_until', 0.0)
+            except Exception as e:
+                logging.warning(f"Failed to load provider state {self.state_path}: {e}")
+
+    def _save(self):
+        if not self.state_path:
+            return
+        try:
+            state = {}
+            if os.path.exists(self.state_path):
+                with open(self.state_path, 'r', encoding='utf-8') as f:
+                    state = json.load(f)
+            state[self.name] = {'failures': self.failures, 'open_until': self.open_until}
+            os.makedirs(os.path.dirname(self.state_path), exist_ok=True)
+            tmp_path = self.state_path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(state, f)
+            os.replace(tmp_path, self.state_path)
+        except Exception as e:
+            logging.warning(f"Failed to save provider state {self.state_path}: {e}")
+
+    def allow(self):
+        # After the cooldown the breaker is half-open: a single trial call is
+        # let through and everyone else is refused until its result is recorded
+        with self._lock:
+            if not self.open_until:
+                return True
+            if time.time() < self.open_until or self.probing:
+                return False
+            self.probing = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.probing = False
+            if self.failures or self.open_until:
+                self.failures = 0
+                self.open_until = 0.0
+                self._save()
+
+    def record_failure(self, quota=False):
+        with self._lock:
+            self.probing = False
+            self.failures += 1
+            if quota:
+                self.open_until = time.time() + self.quota_cooldown
+            elif self.failures >= self.failure_threshold:
+                self.open_until = time.time() + self.cooldown
+            self._save()
+            if self.open_until > time.time():
+                logging.warning(f"[{self.name}] Circuit open for {int(self.open_until - time.time())}s, using fallback providers.")
+
+
+class ImageProvider:
+    name = 'provider'
+    extension = 'png'
+
+    def __init__(self, max_concurrency=2, min_interval=0.0, breaker=None):
+        self.semaphore = threading.BoundedSemaphore(max_concurrency)
+        self.min_interval = min_interval
+        self.breaker = breaker or CircuitBreaker(self.name)
+        self.reset_stats()
+        self._last_call = 0.0
+        self._rate_lock = threading.Lock()
+
+    def reset_stats(self):
+        self.stats = {'calls': 0, 'successes': 0, 'failures': 0, 'skipped': 0, 'total_latency': 0.0}
+
+    def _wait_for_slot(self):
+        with self._rate_lock:
+            wait = self._last_call + self.min_interval - time.time()
+            if wait > 0:
+                time.sleep(wait)
+            self._last_call = time.time()
+
+    def fetch(self, prompt):
+        """Return raw image bytes for prompt, or None. Raise QuotaExhausted on quota errors."""
+        raise NotImplementedError
+
+    def save(self, image_bytes, image_path):
+        with open(image_path, 'wb') as f:
+            f.write(image_bytes)
+
+    def generate(self, prompt, out_dir, safe_name):
+        calls = metrics.counter('image_provider_calls_total', 'Image provider calls by outcome')
+        if not self.breaker.allow():
+            self.stats['skipped'] += 1
+            calls.inc(provider=self.name, outcome='skipped')
+            return None
+        with self.semaphore:
+            self._wait_for_slot()
+            self.stats['calls'] += 1
+            start = time.perf_counter()
+            try:
+                image_bytes = self.fetch(prompt)
+                if not image_bytes:
+                    raise RuntimeError('no image returned')
+                image_path = os.path.join(out_dir, f"{safe_name}_{self.name}.{self.extension}")
+                self.save(image_bytes, image_path)
+            except QuotaExhausted as e:
+                self.stats['failures'] += 1
+                calls.inc(provider=self.name, outcome='quota')
+                self.breaker.record_failure(quota=True)
+                print(f"[{self.name}] Quota exhausted: {e}")
+                return None
+            except Exception as e:
+                self.stats['failures'] += 1
+                calls.inc(provider=self.name, outcome='error')
+                self.breaker.record_failure()
+                print(f"[{self.name}] Image generation failed: {e}")
+                return None
+            finally:
+                elapsed = time.perf_counter() - start
+                self.stats['total_latency'] += elapsed
+                metrics.histogram('image_provider_seconds', 'Image provider call latency').observe(elapsed, provider=self.name)
+        self.stats['successes'] += 1
+        calls.inc(provider=self.name, outcome='ok')
+        self.breaker.record_success()
+        return {'image_path': image_path, 'image_id': safe_name}
+
+
+class GeminiImageProvider(ImageProvider):
+    name = 'gemini'
+    extension = 'png'
+    model_name = 'imagen-3.0-generate-002'
+
+    def __init__(self, api_key, **kwargs):
+        super().__init__(**kwargs)
+        self.api_key = api_key
+        self._model = None
+
+    def _get_model(self):
+        if self._model is None:
+            import google.generativeai as genai
+            genai.configure(api_key=self.api_key)
+            print(f"[Gemini] Using model: {self.model_name}")
+            self._model = genai.GenerativeModel(self.model_name)
+        return self._model
+
+    def fetch(self, prompt):
+        import google.api_core.exceptions
+        try:
+            response = self._get_model().generate_content(prompt)
+        except google.api_core.exceptions.ResourceExhausted as e:
+            raise QuotaExhausted(str(e))
+        except Exception as e:
+            if '429' in str(e) or 'quota' in str(e).lower():
+                raise QuotaExhausted(str(e))
+            raise
+        for part in getattr(response, 'parts', []):
+            if hasattr(part, 'inline_data') and part.inline_data is not None:
+                return part.inline_data.data
+        return None
+
+    def save(self, image_bytes, image_path):
+        from PIL import Image
+        Image.open(BytesIO(image_bytes)).save(image_path)
+
+
+class UnsplashImageProvider(ImageProvider):
+    name = 'unsplash'
+    extension = 'jpg'
+    api_url = 'https://api.unsplash.com/photos/random'
+
+    def __init__(self, access_key, **kwargs):
+        super().__init__(**kwargs)
+        self.access_key = access_key
+        import requests
+        self.session = requests.Session()
+
+    def fetch(self, prompt):
+        url = f"{self.api_url}?query={quote(prompt)}&client_id={self.access_key}"
+        resp = self.session.get(url, timeout=10)
+        if resp.status_code in (403, 429):
+            raise QuotaExhausted(f"HTTP {resp.status_code}")
+        if resp.status_code != 200:
+            raise RuntimeError(f"HTTP {resp.status_code}")
+        img_url = resp.json().get('urls', {}).get('regular')
+        if not img_url:
+            return None
+        return self.session.get(img_url, timeout=10).content
+
+
+_providers = {}
+
+
+def get_providers(gemini_api_key=None, unsplash_access_key=None):
+    """Return the configured providers in fallback order, reusing instances across calls."""
+    providers = []
+    if gemini_api_key:
+        key = ('gemini', gemini_api_key)
+        if key not in _providers:
+            _providers[key] = GeminiImageProvider(gemini_api_key, max_concurrency=2, min_interval=1.0)
+        providers.append(_providers[key])
+    if unsplash_access_key:
+        key = ('unsplash', unsplash_access_key)
+        if key not in _providers:
+            _providers[key] = UnsplashImageProvider(unsplash_access_key, max_concurrency=4, min_interval=0.5)
+        providers.append(_providers[key])
+    return providers
+
+
+def safe_filename(filename_hint):
+    return re.sub(r'[^A-Za-z0-9_-]', '', filename_hint[:50].replace(' ', '_'))
+
+
+def reset_stats():
+    """Zero every provider's counters, so each pipeline cycle reports its own numbers."""
+    for provider in _providers.values():
+        provider.reset_stats()
+
+
+def get_stats():
+    stats = {}
+    for provider in _providers.values():
+        s = dict(provider.stats)
+        s['avg_latency'] = round(s['total_latency'] / s['calls'], 3) if s['calls'] else 0.0
+        s['success_rate'] = round(s['successes'] / s['calls'], 3) if s['calls'] else 0.0
+        stats[provider.name] = s
+    return stats
+
+
+def report_stats():
+    stats = get_stats()
+    for name, s in stats.items():
+        logging.info(
+            f"[{name}] calls={s['calls']} ok={s['successes']} failed={s['failures']} skipped={s['skipped']} "
+            f"avg_latency={s['avg_latency']}s success_rate={s['success_rate']:.1%}"
+        )
+    return stats
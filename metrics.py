@@ -0,0 +1,204 @@
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+
+# Minimal in-process metrics registry (counters, gauges, latency histograms)
+# shared by the pipeline scripts and the backend. Metrics are exported in the
+# Prometheus text format by backend/app.py at /metrics, and the pipeline
+# writes a per-run JSON snapshot that the backend re-exports.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+SUMMARY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'pipeline_metrics.json')
+
+_lock = threading.Lock()
+_registry = {}
+
+
+def _label_key(labels):
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+class Counter:
+    type = 'counter'
+
+    def __init__(self, name, help=''):
+        self.name = name
+        self.help = help
+        self.values = {}
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(labels)
+        with _lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def samples(self):
+        return [{'labels': dict(k), 'value': v} for k, v in self.values.items()]
+
+
+class Gauge(Counter):
+    type = 'gauge'
+
+    def set(self, value, **labels):
+        with _lock:
+            self.values[_label_key(labels)] = value
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram:
+    type = 'histogram'
+
+    def __init__(self, name, help='', buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(buckets)
+        self.values = {}
+
+    def observe(self, value, **labels):
+        key = _label_key(labels)
+        with _lock:
+            entry = self.values.setdefault(key, {'counts': [0] * len(self.buckets), 'sum': 0.0, 'count': 0})
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry['counts'][i] += 1
+            entry['sum'] += value
+            entry['count'] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self):
+        return [
+            {'labels': dict(k), 'buckets': list(zip(self.buckets, v['counts'])), 'sum': v['sum'], 'count': v['count']}
+            for k, v in self.values.items()
+        ]
+
+
+def _get_or_create(cls, name, help, **kwargs):
+    with _lock:
+        metric = _registry.get(name)
+        if metric is None:
+            metric = _registry[name] = cls(name, help, **kwargs)
+        return metric
+
+
+def counter(name, help=''):
+    return _get_or_create(Counter, name, help)
+
+
+def gauge(name, help=''):
+    return _get_or_create(Gauge, name, help)
+
+
+def histogram(name, help='', buckets=LATENCY_BUCKETS):
+    return _get_or_create(Histogram, name, help, buckets=buckets)
+
+
+def timer(name, help='', **labels):
+    """Context manager observing the elapsed seconds into histogram `name`."""
+    return histogram(name, help).time(**labels)
+
+
+def snapshot():
+    return {
+        name: {'type': m.type, 'help': m.help, 'samples': m.samples()}
+        for name, m in list(_registry.items())
+    }
+
+
+def reset():
+    with _lock:
+        _registry.clear()
+
+
+def _escape_label_value(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels, extra=None):
+    items = list(labels.items()) + (list(extra.items()) if extra else [])
+    if not items:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape_label_value(v)}"' for k, v in items) + '}'
+
+
+def render_prometheus(snapshots=None, sources=None):
+    """
+    Render one or more snapshots (default: this process) in the Prometheus text format.
+    Samples are merged by family name so each family gets a single HELP/TYPE header;
+    with `sources` (one name per snapshot) every sample carries a source label so
+    the same series recorded by two processes stays distinct.
+    """
+    families = {}
+    for i, snap in enumerate(snapshots or [snapshot()]):
+        source = {'source': sources[i]} if sources else {}
+        for name, metric in snap.items():
+            family = families.setdefault(name, {'type': metric['type'], 'help': metric.get('help'), 'samples': []})
+            if family['type'] != metric['type']:
+                continue
+            family['help'] = family['help'] or metric.get('help')
+            family['samples'].extend((dict(sample['labels'], **source), sample) for sample in metric['samples'])
+    lines = []
+    for name, family in families.items():
+        if family['help']:
+            lines.append(f"# HELP {name} {family['help']}")
+        lines.append(f"# TYPE {name} {family['type']}")
+        for labels, sample in family['samples']:
+            if family['type'] == 'histogram':
+                for bound, count in sample['buckets']:
+                    lines.append(f"{name}_bucket{_format_labels(labels, {'le': bound})} {count}")
+                lines.append(f"{name}_bucket{_format_labels(labels, {'le': '+Inf'})} {sample['count']}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {sample['sum']}")
+                lines.append(f"{name}_count{_format_labels(labels)} {sample['count']}")
+            else:
+                lines.append(f"{name}{_format_labels(labels)} {sample['value']}")
+    return '\n'.join(lines) + '\n'
+
+
+def summarize(snap=None):
+    """Condensed view of a snapshot: totals for counters/gauges, count/avg/max-bucket for histograms."""
+    summary = {}
+    for name, metric in (snap or snapshot()).items():
+        for sample in metric['samples']:
+            label_str = ','.join(f'{k}={v}' for k, v in sorted(sample['labels'].items()))
+            key = f'{name}{{{label_str}}}' if label_str else name
+            if metric['type'] == 'histogram':
+                count = sample['count']
+                summary[key] = {
+                    'count': count,
+                    'sum': round(sample['sum'], 3),
+                    'avg': round(sample['sum'] / count, 3) if count else 0.0,
+                }
+            else:
+                summary[key] = sample['value']
+    return summary
+
+
+def write_summary(path=SUMMARY_PATH, extra=None):
+    """Write this process's metrics (raw snapshot plus condensed summary) to a JSON file."""
+    snap = snapshot()
+    data = {'timestamp': time.time(), 'summary': summarize(snap), 'snapshot': snap}
+    if extra:
+        data.update(extra)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+    return data
+
+
+def load_summary(path=SUMMARY_PATH):
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception:
+        return None
@@ -0,0 +1,247 @@
+import os
+import json
+import time
+import logging
+import threading
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+
+import metrics
+from prompt_builder import TRUNCATION_RE
+from unique_id_util import generate_unique_id
+
+# NewsAPI (newsapi.org top-headlines) source for the aggregator. Every
+# (country, category) pair is a query; queries run concurrently over one pooled
+# session, each paginating until it reaches articles it has already returned.
+# A per-query high-water mark (newest publishedAt plus the URLs published at
+# that instant) is persisted, so each poll only yields new articles. Requests
+# are spaced by MIN_INTERVAL, counted against the daily quota, and a 429 pauses
+# every query until RATE_LIMIT_COOLDOWN has passed. Records have the same
+# schema as the RSS and Google News sources.
+BASE_DIR = os.path.abspath(os.path.dirname(__file__))
+STATE_PATH = os.path.join(BASE_DIR, 'newsapi_state.json')
+API_URL = 'https://newsapi.org/v2/top-headlines'
+PAGE_SIZE = 100  # NewsAPI maximum
+MAX_PAGES = 3
+WORKERS = 4
+MIN_INTERVAL = 0.5  # seconds between requests, across all queries
+DAILY_LIMIT = int(os.environ.get('NEWSAPI_DAILY_LIMIT', '100'))  # developer plan
+RATE_LIMIT_COOLDOWN = 3600
+REQUEST_TIMEOUT = 10
+CATEGORIES = ('business', 'entertainment', 'general', 'health', 'science', 'sports', 'technology')
+
+# Publisher suffixes NewsAPI appends to titles, besides the source name itself
+SOURCE_ABBREVIATIONS = {
+    'The Wall Street Journal': ['WSJ'],
+    'Associated Press': ['AP News'],
+    'NBCSports.com': ['NBC Sports'],
+}
+
+
+class RateLimited(Exception):
+    pass
+
+
+def clean_heading(heading, source):
+    """Drop a trailing ' - <source>' from the title."""
+    if not heading or not source:
+        return heading
+    for pat in [source] + SOURCE_ABBREVIATIONS.get(source, []):
+        if heading.strip().endswith(f'- {pat}'):
+            return heading.strip()[:-(len(pat) + 2)].strip()
+    return heading
+
+
+def to_record(article, default_category='general'):
+    source = (article.get('source') or {}).get('name') or ''
+    summary_parts = []
+    for part in (article.get('description'), article.get('content')):
+        part = TRUNCATION_RE.sub('', part or '').strip()
+        if part and part not in summary_parts:
+            summary_parts.append(part)
+    return {
+        'news_id': generate_unique_id(),
+        'source': source,
+        'heading': clean_heading(article.get('title') or '', source),
+        'summary': ' '.join(summary_parts),
+        'link': article.get('url') or '',
+        'category': default_category,
+        'date_published': article.get('publishedAt') or '',
+    }
+
+
+def parse_time(value):
+    try:
+        return datetime.strptime(value, '%Y-%m-%dT%H:%M:%SZ').replace(tzinfo=timezone.utc).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+def query_key(country, category):
+    return f"newsapi:{country}:{category or 'all'}"
+
+
+def parse_queries(countries, categories):
+    return [(country, category or None) for country in countries for category in (categories or [None])]
+
+
+class NewsAPISource:
+    def __init__(self, api_key, state_path=STATE_PATH, api_url=API_URL, workers=WORKERS,
+                 min_interval=MIN_INTERVAL, daily_limit=DAILY_LIMIT):
+        self.api_key = api_key
+        self.state_path = state_path
+        self.api_url = api_url
+        self.workers = workers
+        self.min_interval = min_interval
+        self.daily_limit = daily_limit
+        self.state = {'day': None, 'requests': 0, 'paused_until': 0.0, 'queries': {}}
+        self._session = None
+        self._lock = threading.Lock()
+        self._last_call = 0.0
+        self._load()
+
+    @property
+    def session(self):
+        if self._session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+            self._session = requests.Session()
+            self._session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=self.workers))
+            self._session.mount('http://', HTTPAdapter(pool_connections=1, pool_maxsize=self.workers))
+            self._session.headers['X-Api-Key'] = self.api_key
+        return self._session
+
+    def _load(self):
+        if self.state_path and os.path.exists(self.state_path):
+            try:
+                with open(self.state_path, 'r', encoding='utf-8') as f:
+                    self.state.update(json.load(f))
+            except Exception as e:
+                logging.warning(f"Failed to load NewsAPI state {self.state_path}: {e}")
+
+    def save(self):
+        if not self.state_path:
+            return
+        with self._lock:
+            tmp_path = self.state_path + '.tmp'
+            try:
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(self.state, f)
+                os.replace(tmp_path, self.state_path)
+            except Exception as e:
+                logging.warning(f"Failed to save NewsAPI state {self.state_path}: {e}")
+
+    def _acquire(self):
+        """Wait for the next request slot. Raises RateLimited when paused or out of daily quota."""
+        with self._lock:
+            today = datetime.now(timezone.utc).strftime('%Y-%m-%d')
+            if self.state['day'] != today:
+                self.state['day'], self.state['requests'] = today, 0
+            if time.time() < self.state['paused_until']:
+                raise RateLimited(f"paused for {int(self.state['paused_until'] - time.time())}s")
+            if self.state['requests'] >= self.daily_limit:
+                raise RateLimited(f'daily limit of {self.daily_limit} requests reached')
+            wait = self._last_call + self.min_interval - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+            self._last_call = time.monotonic()
+            self.state['requests'] += 1
+
+    def get_page(self, country, category, page, page_size):
+        self._acquire()
+        params = {'country': country, 'pageSize': page_size, 'page': page}
+        if category:
+            params['category'] = category
+        with metrics.timer('feed_fetch_seconds', 'Time to fetch and parse a source', source='newsapi'):
+            resp = self.session.get(self.api_url, params=params, timeout=REQUEST_TIMEOUT)
+        metrics.counter('feed_fetch_total', 'Source polls by outcome').inc(source='newsapi', status=resp.status_code)
+        if resp.status_code == 429:
+            with self._lock:
+                self.state['paused_until'] = time.time() + RATE_LIMIT_COOLDOWN
+            raise RateLimited('HTTP 429')
+        data = resp.json() if resp.content else {}
+        if resp.status_code != 200 or data.get('status') == 'error':
+            if data.get('code') in ('rateLimited', 'maximumResultsReached'):
+                raise RateLimited(data.get('message') or data['code'])
+            raise RuntimeError(f"HTTP {resp.status_code}: {data.get('message', '')}")
+        return data
+
+    def fetch_query(self, country, category, max_pages=MAX_PAGES, page_size=PAGE_SIZE):
+        """Articles of one query not returned by earlier polls; advances its high-water mark."""
+        key = query_key(country, category)
+        mark = self.state['queries'].get(key, {'published': '', 'urls': []})
+        seen_urls = set(mark['urls'])
+        new = []
+        for page in range(1, max_pages + 1):
+            try:
+                data = self.get_page(country, category, page, page_size)
+            except RateLimited:
+                if page == 1:
+                    raise
+                break  # keep what the earlier pages returned
+            articles = data.get('articles') or []
+            fresh = [a for a in articles if a.get('url') and (
+                (a.get('publishedAt') or '') > mark['published']
+                or ((a.get('publishedAt') or '') == mark['published'] and a['url'] not in seen_urls))]
+            new.extend(fresh)
+            # Stop at the first page that reaches already-returned articles, or the last page
+            if len(fresh) < len(articles) or page * page_size >= data.get('totalResults', 0):
+                break
+        if new:
+            newest = max(a.get('publishedAt') or '' for a in new)
+            urls = [a['url'] for a in new if (a.get('publishedAt') or '') == newest]
+            if newest == mark['published']:
+                urls = mark['urls'] + urls
+            with self._lock:
+                self.state['queries'][key] = {'published': newest, 'urls': urls[-200:]}
+        return new
+
+    def fetch(self, queries, max_pages=MAX_PAGES, page_size=PAGE_SIZE, scheduler=None):
+        """Records for every query in queries ([(country, category)]) that is due."""
+        if scheduler:
+            queries = [q for q in queries if scheduler.is_due(query_key(*q))]
+        if not queries:
+            return []
+
+        def run(query):
+            country, category = query
+            key = query_key(country, category)
+            try:
+                articles = self.fetch_query(country, category, max_pages, page_size)
+            except Exception as e:
+                logging.error(f"NewsAPI error for {key}: {e}")
+                metrics.counter('feed_errors_total', 'Source polls that failed').inc(source='newsapi')
+                if scheduler:
+                    scheduler.record_failure(key)
+                return []
+            if scheduler:
+                stamps = [parse_time(a.get('publishedAt')) for a in articles]
+                scheduler.record_success(key, [a['url'] for a in articles], stamps)
+            return [to_record(a, category or 'general') for a in articles]
+
+        with ThreadPoolExecutor(max_workers=min(self.workers, len(queries))) as pool:
+            results = list(pool.map(run, queries))
+        self.save()
+        # The same story can be a top headline in several countries/categories
+        records, links = [], set()
+        for record in (r for result in results for r in result):
+            if record['link'] not in links:
+                links.add(record['link'])
+                records.append(record)
+        return records
+
+
+_sources = {}
+
+
+def get_source(api_key, **kwargs):
+    """One NewsAPISource (and pooled session) per key, reused across cycles."""
+    if api_key not in _sources:
+        _sources[api_key] = NewsAPISource(api_key, **kwargs)
+    return _sources[api_key]
+
+
+def fetch_newsapi_news(api_key, countries=('us',), categories=(None,), max_pages=MAX_PAGES, page_size=PAGE_SIZE, scheduler=None):
+    if not api_key:
+        return []
+    return get_source(api_key).fetch(parse_queries(countries, categories), max_pages, page_size, scheduler)
@@ -1,3 +1,92 @@
+import re
+
+# A section starts with its label at the beginning of a line, optionally wrapped
+# in markdown ("**Headline:** ...", "## Summary", "**Illustration Prompt**:").
+# Lines that merely mention an image inside the article body are body text.
+# The same pattern finds every label of a whole response in one finditer pass.
+# Only the label is matched; the value is the rest of its line.
+SECTION_RE = re.compile(
+    r'^[ \t\r\f\v*#>_-]*(headline|summary|full article|illustration(?: image)?(?: prompt)?|image prompt)[ \t\r\f\v*_]*:',
+    re.IGNORECASE | re.MULTILINE,
+)
+VALUE_STRIP = ' \t\r\f\v*_'
+SECTION_FIELDS = {
+    'headline': 'seo_headline',
+    'summary': 'rewritten_summary',
+    'full article': 'rewritten_full_text',
+}
+IMAGE_FIELD = 'image_prompt'
+FIELDS = ('seo_headline', 'rewritten_summary', 'rewritten_full_text', IMAGE_FIELD)
+# Only these sections continue onto the following lines
+MULTILINE_FIELDS = ('rewritten_summary', 'rewritten_full_text', IMAGE_FIELD)
+
+
+class GeminiResponseParser:
+    """
+    Incremental parser for the rewrite response. feed() accepts the text in
+    arbitrary chunks (e.g. from a streaming generate_content call) and returns
+    the fields that became complete, so the headline and summary can be used
+    before the full article has been generated. close() returns every field.
+    """
+    def __init__(self):
+        self.parts = {field: [] for field in FIELDS}
+        self.current = None
+        self.completed = []
+        self._pending = ''
+
+    def feed(self, chunk):
+        """Consume a chunk of text. Returns the fields completed by it, in order."""
+        done_before = len(self.completed)
+        lines = (self._pending + chunk).split('\n')
+        self._pending = lines.pop()
+        for line in lines:
+            self._line(line)
+        return self.completed[done_before:]
+
+    def _line(self, line):
+        m = SECTION_RE.match(line)
+        if m:
+            field = SECTION_FIELDS.get(m.group(1).lower(), IMAGE_FIELD)
+            value = line[m.end():].strip(VALUE_STRIP)
+            self._finish_current()
+            self.current = field
+            self.parts[field] = [value] if value else []
+            if field == 'seo_headline' and value:
+                self._finish_current()
+            return
+        line = line.strip()
+        if not line:
+            return
+        if self.current == 'seo_headline':
+            # "Headline:" alone on its line, the headline follows
+            self.parts['seo_headline'].append(line)
+            self._finish_current()
+        elif self.current in MULTILINE_FIELDS:
+            self.parts[self.current].append(line)
+
+    def _finish_current(self):
+        if self.current and self.current not in self.completed:
+            self.completed.append(self.current)
+        self.current = None
+
+    def value(self, field):
+        return '\n'.join(self.parts[field])
+
+    def is_complete(self, field):
+        return field in self.completed
+
+    def fields(self):
+        return {field: self.value(field) for field in FIELDS}
+
+    def close(self):
+        """Flush the last partial line and return all fields."""
+        if self._pending:
+            self._line(self._pending)
+            self._pending = ''
+        self._finish_current()
+        return self.fields()
+
+
 def parse_gemini_response(text):
     """
     Parse the Gemini model's response into headline, summary, full article, and image prompt fields.
@@ -7,28 +96,36 @@ def parse_gemini_response(text):
     Full Article: ...
     Also, generate a prompt for an illustration image that matches the news.
     """
-    headline = ''
-    summary = ''
-    full_text = ''
-    image_prompt = ''
-    lines = text.splitlines()
-    current = None
-    for line in lines:
-        line = line.strip()
-        if line.lower().startswith('headline:'):
-            current = 'headline'
-            headline = line.partition(':')[2].strip()
-        elif line.lower().startswith('summary:'):
-            current = 'summary'
-            summary = line.partition(':')[2].strip()
-        elif line.lower().startswith('full article:'):
-            current = 'full_text'
-            full_text = line.partition(':')[2].strip()
-        elif 'illustration' in line.lower() or 'image' in line.lower():
-            current = 'image_prompt'
-            image_prompt = line.partition(':')[2].strip()
-        elif current == 'summary' and line:
-            summary += '\n' + line
-        elif current == 'full_text' and line:
-            full_text += '\n' + line
-    return {'seo_headline': headline, 'rewritten_summary': summary, 'rewritten_full_text': full_text, 'image_prompt': image_prompt}
+    parts = {field: [] for field in FIELDS}
+    matches = list(SECTION_RE.finditer(text))
+    for i, m in enumerate(matches):
+        field = SECTION_FIELDS.get(m.group(1).lower(), IMAGE_FIELD)
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(text)
+        line_end = text.find('\n', m.end())
+        line_end = end if line_end < 0 or line_end > end else line_end
+        value = text[m.end():line_end].strip(VALUE_STRIP)
+        body = [line for line in map(str.strip, text[line_end:end].split('\n')) if line]
+        if field == 'seo_headline':
+            # The headline is its label line, or the next line when that is empty
+            parts[field] = [value] if value else body[:1]
+        else:
+            parts[field] = ([value] if value else []) + body
+    return {field: '\n'.join(lines) for field, lines in parts.items()}
+
+
+def parse_gemini_stream(chunks, on_field=None):
+    """
+    Parse an iterable of text chunks, calling on_field(field, value, parser) as
+    soon as each field is complete. Returns all fields.
+    """
+    parser = GeminiResponseParser()
+    for chunk in chunks:
+        for field in parser.feed(chunk):
+            if on_field:
+                on_field(field, parser.value(field), parser)
+    done_before = len(parser.completed)
+    fields = parser.close()
+    if on_field:
+        for field in parser.completed[done_before:]:
+            on_field(field, parser.value(field), parser)
+    return fields
@@ -0,0 +1,209 @@
+import os
+import time
+import fcntl
+import logging
+import argparse
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+import aggregate_news
+import gemini_news_enhancer
+import image_providers
+import metrics
+import newsapi_source
+from feed_scheduler import FeedScheduler, backoff_delay
+
+# Resident scheduler: every stage is imported once and run in-process, so the
+# Gemini clients, Unsplash session, image cache and provider circuit breakers
+# stay warm between cycles instead of being rebuilt by a new interpreter.
+SLEEP_INTERVAL = 600  # seconds (10 minutes), used with --fixed_interval
+MIN_SLEEP = 5  # seconds between scheduler wake-ups
+TIMING_HISTORY = 50
+
+BASE_DIR = os.path.abspath(os.path.dirname(__file__))
+# Held for a whole cycle, so the resident daemon and update_content.py runs
+# started by /api/update-content never rewrite the news files at the same time
+PIPELINE_LOCK_PATH = os.environ.get('PEN_PIPELINE_LOCK') or os.path.join(BASE_DIR, 'pipeline.lock')
+
+stage_timings = defaultdict(lambda: deque(maxlen=TIMING_HISTORY))
+
+
+def setup_logging():
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[logging.StreamHandler()]
+    )
+
+
+def load_config():
+    from dotenv import load_dotenv
+    load_dotenv()
+    return {
+        'rss': [
+            'http://feeds.bbci.co.uk/news/rss.xml',
+            'https://rss.cnn.com/rss/edition.rss',
+            'https://feeds.reuters.com/reuters/topNews',
+        ],
+        'topic': 'technology',
+        'max_per_feed': 5,
+        'max_google': 5,
+        'gemini_key': os.getenv('GEMINI_KEY') or os.getenv('GEMINI_API_KEY'),
+        'unsplash_key': os.getenv('UNSPLASH_KEY') or os.getenv('UNSPLASH_ACCESS_KEY'),
+        'newsapi_key': os.getenv('NEWSAPI_KEY'),
+        'newsapi_countries': os.getenv('NEWSAPI_COUNTRIES', 'us').split(','),
+        'newsapi_categories': [c or None for c in os.getenv('NEWSAPI_CATEGORIES', '').split(',')],
+    }
+
+
+def run_stage(name, func, *args, **kwargs):
+    start = time.perf_counter()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        elapsed = time.perf_counter() - start
+        stage_timings[name].append(elapsed)
+        metrics.histogram('pipeline_stage_seconds', 'Pipeline stage duration').observe(elapsed, stage=name)
+        logging.info(f"[Pipeline] Stage '{name}' took {elapsed:.2f}s")
+
+
+def feed_sources(config):
+    sources = config['rss'] + [f"googlenews:{config['topic']}"]
+    if config.get('newsapi_key'):
+        sources += [newsapi_source.query_key(*q) for q in newsapi_source.parse_queries(
+            config['newsapi_countries'], config['newsapi_categories'])]
+    return sources
+
+
+def aggregate_stage(config, scheduler=None):
+    return aggregate_news.run_aggregation(
+        config['rss'], config['topic'], config['max_per_feed'], config['max_google'], scheduler=scheduler,
+        newsapi_key=config.get('newsapi_key'), newsapi_countries=config.get('newsapi_countries', ['us']),
+        newsapi_categories=config.get('newsapi_categories', [None]))
+
+
+def enhance_stage(config, scheduler=None):
+    return gemini_news_enhancer.enhance_news_file(
+        os.path.join(BASE_DIR, 'all_news.json'),
+        os.path.join(BASE_DIR, 'enhanced_news.json'),
+        os.path.join(BASE_DIR, 'enhanced_news.csv'),
+        config['gemini_key'], config['unsplash_key'],
+        skip_existing=True,
+    )
+
+
+def related_stage(config, scheduler=None):
+    import related_index  # numpy, only needed once a cycle reaches this stage
+    return related_index.build_related_index()
+
+
+STAGES = [
+    ('aggregate', aggregate_stage),
+    ('enhance', enhance_stage),
+    ('related', related_stage),
+]
+
+
+@contextmanager
+def pipeline_lock(path=None):
+    """Exclusive flock shared by every pipeline process; waits for a running cycle to finish."""
+    with open(path or PIPELINE_LOCK_PATH, 'a') as lock:
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            logging.info('[Pipeline] Another pipeline cycle is running, waiting for it to finish...')
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def run_cycle(config=None, scheduler=None):
+    """
+    Run every stage once, in order. With a FeedScheduler only the sources that
+    are due are polled. When aggregation finds no new articles the downstream
+    stages are skipped, so unchanged outputs are not rewritten. The whole cycle
+    holds the pipeline lock. Returns True if all stages succeeded.
+    """
+    config = config or load_config()
+    with pipeline_lock():
+        logging.info('Starting news pipeline update...')
+        # Per-cycle provider numbers (the daemon's providers live across cycles)
+        image_providers.reset_stats()
+        cycle_start = time.perf_counter()
+        for name, func in STAGES:
+            try:
+                result = run_stage(name, func, config, scheduler)
+                if name == 'aggregate' and not result:
+                    logging.info('[Pipeline] No new articles, skipping downstream stages.')
+                    metrics.counter('pipeline_cycles_total', 'Pipeline cycles by outcome').inc(outcome='idle')
+                    write_metrics_summary()
+                    return True
+            except Exception as e:
+                logging.error(f"[Pipeline] Stage '{name}' failed: {e}")
+                metrics.counter('pipeline_cycles_total', 'Pipeline cycles by outcome').inc(outcome='failed')
+                write_metrics_summary()
+                return False
+        logging.info(f"[Pipeline] Cycle completed in {time.perf_counter() - cycle_start:.2f}s")
+        metrics.counter('pipeline_cycles_total', 'Pipeline cycles by outcome').inc(outcome='ok')
+        image_providers.report_stats()
+        write_metrics_summary()
+        return True
+
+
+def write_metrics_summary():
+    try:
+        metrics.write_summary(extra={'stage_timings': timing_summary(), 'image_providers': image_providers.get_stats()})
+    except Exception as e:
+        logging.warning(f"Failed to write metrics summary: {e}")
+
+
+def timing_summary():
+    return {
+        name: {
+            'runs': len(samples),
+            'last': round(samples[-1], 3),
+            'avg': round(sum(samples) / len(samples), 3),
+            'max': round(max(samples), 3),
+        }
+        for name, samples in stage_timings.items() if samples
+    }
+
+
+def main():
+    setup_logging()
+    print(aggregate_news.DISCLAIMER)
+    parser = argparse.ArgumentParser(description='Run the news pipeline as a resident, in-process scheduler.')
+    parser.add_argument('--once', action='store_true', help='Run a single cycle and exit')
+    parser.add_argument('--fixed_interval', type=int, default=None,
+                        help=f'Poll every source every N seconds (e.g. {SLEEP_INTERVAL}) instead of adaptively')
+    args = parser.parse_args()
+
+    config = load_config()
+    scheduler = None if args.fixed_interval else FeedScheduler(feed_sources(config))
+    consecutive_failures = 0
+    while True:
+        success = run_cycle(config, scheduler)
+        for name, summary in timing_summary().items():
+            logging.info(f"[Pipeline] {name}: {summary}")
+        if args.once:
+            return 0 if success else 1
+        if not success:
+            consecutive_failures += 1
+            delay = backoff_delay(consecutive_failures)
+            logging.info(f"Pipeline failed {consecutive_failures} time(s) in a row, retrying in {delay:.0f} seconds...")
+        else:
+            consecutive_failures = 0
+            if scheduler:
+                delay = max(MIN_SLEEP, scheduler.seconds_until_next(feed_sources(config)))
+                for source, summary in scheduler.summary().items():
+                    logging.info(f"[Scheduler] {source}: {summary}")
+            else:
+                delay = args.fixed_interval
+            logging.info(f"Sleeping for {delay:.0f} seconds before next run...")
+        time.sleep(delay)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,132 @@
+import os
+import re
+from collections import Counter
+
+import metrics
+
+# Token-budgeted prompts for the Gemini enhancer. Article text is cleaned of
+# extraction boilerplate (NewsAPI "[+4965 chars]" markers, share/save/cookie
+# lines, photo credits) and, when the prompt would exceed the budget for its
+# call type, cut down to its key sentences: the first sentences are always kept,
+# the rest are ranked by how many of the article's frequent terms and headline
+# terms they contain, and the chosen sentences are sent in their original order.
+# Tokens are estimated from characters (no extra API call per prompt).
+CHARS_PER_TOKEN = 4
+# Whole-prompt budgets, overridable with e.g. GEMINI_PROMPT_BUDGET_REWRITE=2000
+TOKEN_BUDGETS = {
+    'rewrite': 1500,
+    'image_prompt': 400,
+    'tags': 250,
+}
+LEAD_SENTENCES = 3
+TOKEN_BUCKETS = (50, 100, 250, 500, 1000, 1500, 2000, 4000, 8000, 16000)
+
+TRUNCATION_RE = re.compile(r'\s*(?:…|\.\.\.)?\s*\[\+\d+ chars\]')
+INLINE_BOILERPLATE_RE = re.compile(r'\b(?:Share Save|Share this (?:article|story)|Copy link|Save article)\b', re.IGNORECASE)
+BOILERPLATE_LINE_RE = re.compile(
+    r'^(?:share|save)$|\b(?:share (?:this|on|via)|cookies?|subscribe|sign up|newsletter|follow us|advertisement'
+    r'|all rights reserved|click here|read more|related topics|more on this story)\b', re.IGNORECASE)
+CAPTION_RE = re.compile(r'^(?:Getty Images|EPA|AFP|PA Media|Image source|Image caption|Watch:|Listen:)', re.IGNORECASE)
+TIMESTAMP_RE = re.compile(r'^\d+ (?:minutes?|hours?|days?) ago\b', re.IGNORECASE)
+SENTENCE_RE = re.compile(r'(?<=[.!?])["\'”’)]?\s+(?=["“‘(]?[A-Z0-9])')
+WORD_RE = re.compile(r"[A-Za-z][A-Za-z'-]+|\d[\d,.%]*")
+STOPWORDS = frozenset(
+    'a an the and or but if of to in on at by for with from as is are was were be been being it its this that '
+    'these those he she they we you i his her their our your not no has have had will would can could said says '
+    'also after before over into about than then there which who whom what when where while more most'.split())
+BOILERPLATE_MAX_WORDS = 12
+CAPTION_MAX_WORDS = 25
+
+
+def estimate_tokens(text):
+    return -(-len(text or '') // CHARS_PER_TOKEN)
+
+
+def budget(call_type):
+    value = os.environ.get(f'GEMINI_PROMPT_BUDGET_{call_type.upper()}')
+    return int(value) if value else TOKEN_BUDGETS[call_type]
+
+
+def clean_text(text):
+    """Drop truncation markers and short boilerplate/caption lines, and repeated lines."""
+    text = TRUNCATION_RE.sub('', text or '')
+    lines, seen = [], set()
+    for line in text.split('\n'):
+        line = INLINE_BOILERPLATE_RE.sub('', line).strip()
+        words = len(line.split())
+        if (not line or line in seen or TIMESTAMP_RE.match(line)
+                or (words <= BOILERPLATE_MAX_WORDS and BOILERPLATE_LINE_RE.search(line))
+                or (words <= CAPTION_MAX_WORDS and CAPTION_RE.match(line))):
+            continue
+        seen.add(line)
+        lines.append(line)
+    return '\n'.join(lines)
+
+
+def terms(text):
+    return [w.lower() for w in WORD_RE.findall(text) if w.lower() not in STOPWORDS]
+
+
+def key_sentences(text, max_tokens, headline=''):
+    """The lead sentences plus the highest-scoring others that fit in max_tokens, in original order."""
+    paragraphs = [SENTENCE_RE.split(p) for p in text.split('\n')]
+    sentences = [(i, j, s) for i, p in enumerate(paragraphs) for j, s in enumerate(p) if s.strip()]
+    if not sentences:
+        return ''
+    frequency = Counter(terms(text))
+    headline_terms = set(terms(headline))
+
+    def score(sentence):
+        words = terms(sentence)
+        if not words:
+            return 0.0
+        # Average term weight, so long sentences are not favoured just for their length
+        return sum(frequency[w] + 3 * (w in headline_terms) for w in words) / len(words) ** 0.5
+
+    chosen, used = set(), 0
+    ranked = list(range(min(LEAD_SENTENCES, len(sentences))))
+    ranked += sorted(range(len(ranked), len(sentences)), key=lambda k: score(sentences[k][2]), reverse=True)
+    for k in ranked:
+        cost = estimate_tokens(sentences[k][2]) + 1
+        if used + cost > max_tokens:
+            if k < LEAD_SENTENCES and not chosen:
+                # Not even the first sentence fits: send its beginning
+                return sentences[k][2][:max_tokens * CHARS_PER_TOKEN]
+            continue
+        chosen.add(k)
+        used += cost
+    out, paragraph = [], None
+    for k in sorted(chosen):
+        i, _, sentence = sentences[k]
+        if paragraph is not None and i != paragraph:
+            out.append('\n')
+        elif out:
+            out.append(' ')
+        out.append(sentence.strip())
+        paragraph = i
+    return ''.join(out)
+
+
+def fit_text(text, max_tokens, headline=''):
+    text = clean_text(text)
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    return key_sentences(text, max(0, max_tokens), headline)
+
+
+def build_prompt(call_type, template, text, headline='', usage=None):
+    """
+    Format template (with {text} and {headline} placeholders) so the whole
+    prompt stays within the call type's token budget. Records the tokens sent
+    and saved, and stores the prompt tokens in usage[call_type] if given.
+    """
+    overhead = estimate_tokens(template.format(text='', headline=headline))
+    original = estimate_tokens(text)
+    prompt = template.format(text=fit_text(text, budget(call_type) - overhead, headline), headline=headline)
+    tokens = estimate_tokens(prompt)
+    metrics.histogram('gemini_prompt_tokens', 'Estimated input tokens per Gemini prompt', TOKEN_BUCKETS).observe(tokens, call=call_type)
+    metrics.counter('gemini_prompt_tokens_saved_total', 'Estimated input tokens removed by trimming').inc(
+        max(0, original + overhead - tokens), call=call_type)
+    if usage is not None:
+        usage[call_type] = tokens
+    return prompt
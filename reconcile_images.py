@@ -0,0 +1,271 @@
+import os
+import sys
+import json
+import time
+import glob
+import shutil
+import logging
+import argparse
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import metrics
+
+# One-pass image reconciliation for every news JSON file, replacing
+# fix_image_paths.py, audit_news_images.py and audit_and_fix_missing_images.py:
+#   python reconcile_images.py --dry_run   # audit only
+#   python reconcile_images.py             # patch image_path/image fields
+# All image locations (images/ and images bucket/**) are indexed once by prefix
+# (the news_id part of '<news_id>_<provider>.<ext>'), validated in parallel, and
+# each JSON file is rewritten only if one of its records changed.
+BASE_DIR = os.path.abspath(os.path.dirname(__file__))
+IMAGES_DIR = os.path.join(BASE_DIR, 'images')  # served by the backend
+IMAGES_BUCKET_DIR = os.path.join(BASE_DIR, 'images bucket')  # written by image_generator
+NEWS_BUCKET_DIR = os.path.join(BASE_DIR, 'news bucket')
+EXTRA_JSON_FILES = ['enhanced_news.json', 'all_news.json', 'frontend/public/enhanced_news.json']
+DEFAULT_IMAGE = 'default.png'
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif', '.webp', '.svg')
+WORKERS = 16
+
+# Leading bytes of each supported format, and how a complete file ends
+SIGNATURES = [
+    (b'\x89PNG\r\n\x1a\n', 'png'),
+    (b'\xff\xd8\xff', 'jpg'),
+    (b'GIF87a', 'gif'),
+    (b'GIF89a', 'gif'),
+]
+
+
+def sniff(header):
+    for magic, kind in SIGNATURES:
+        if header.startswith(magic):
+            return kind
+    if header[:4] == b'RIFF' and header[8:12] == b'WEBP':
+        return 'webp'
+    if header.lstrip().startswith((b'<?xml', b'<svg')):
+        return 'svg'
+    return None
+
+
+def is_complete(kind, tail):
+    if kind == 'png':
+        return b'IEND' in tail
+    if kind == 'jpg':
+        return b'\xff\xd9' in tail
+    if kind == 'gif':
+        return tail.endswith(b';')
+    if kind == 'svg':
+        return b'</svg>' in tail
+    return True
+
+
+def image_prefix(filename):
+    return os.path.splitext(filename)[0].split('_', 1)[0]
+
+
+def index_images(dirs):
+    """Walk each directory once. Returns {filename: [path, ...]} in dirs order."""
+    files = defaultdict(list)
+    pending = [d for d in dirs if os.path.isdir(d)]
+    while pending:
+        current = pending.pop(0)
+        with os.scandir(current) as it:
+            for entry in it:
+                if entry.is_dir():
+                    pending.append(entry.path)
+                elif entry.is_file() and not entry.name.startswith('.') and not entry.name.endswith('.json'):
+                    files[entry.name].append(entry.path)
+    return files
+
+
+def validate(path):
+    """Returns (path, problem or None, detected kind)."""
+    try:
+        size = os.path.getsize(path)
+        if size == 0:
+            return path, 'empty', None
+        with open(path, 'rb') as f:
+            header = f.read(16)
+            f.seek(max(0, size - 16))
+            tail = f.read(16)
+    except OSError as e:
+        return path, f'unreadable: {e.strerror}', None
+    kind = sniff(header)
+    if kind is None:
+        return path, 'undecodable', None
+    if not is_complete(kind, tail):
+        return path, 'truncated', kind
+    if not path.lower().endswith(IMAGE_EXTENSIONS):
+        return path, 'extensionless', kind
+    return path, None, kind
+
+
+def json_files(news_bucket_dir=NEWS_BUCKET_DIR, extra=EXTRA_JSON_FILES):
+    paths = sorted(glob.glob(os.path.join(news_bucket_dir, '*.json')))
+    paths += [os.path.join(BASE_DIR, p) for p in extra]
+    return [p for p in dict.fromkeys(paths) if os.path.isfile(p) and not p.endswith('_backup.json')]
+
+
+class Reconciler:
+    def __init__(self, images_dir=IMAGES_DIR, search_dirs=None, workers=WORKERS):
+        self.images_dir = images_dir
+        self.search_dirs = [images_dir] + list(search_dirs if search_dirs is not None else [IMAGES_BUCKET_DIR])
+        self.workers = workers
+        self.timings = {}
+        self.problems = {}
+        self.valid = {}
+        self.by_prefix = defaultdict(list)
+        self.to_copy = {}
+
+    def _timed(self, phase, func, *args):
+        start = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.timings[phase] = round(elapsed, 3)
+            metrics.histogram('image_reconcile_seconds', 'Image reconciliation phase').observe(elapsed, phase=phase)
+
+    def build_index(self):
+        files = self._timed('index', index_images, self.search_dirs)
+        paths = [p for candidates in files.values() for p in candidates]
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            results = self._timed('validate', lambda: list(pool.map(validate, paths)))
+        for path, problem, kind in results:
+            if problem:
+                self.problems[path] = problem
+            else:
+                self.valid[path] = kind
+        # Candidates per prefix, served directory first, then newest first
+        for name, candidates in files.items():
+            for path in candidates:
+                if path in self.valid:
+                    self.by_prefix[image_prefix(name)].append(path)
+        served = os.path.abspath(self.images_dir)
+        for candidates in self.by_prefix.values():
+            candidates.sort(key=lambda p: (os.path.dirname(os.path.abspath(p)) != served, -os.path.getmtime(p)))
+        return self
+
+    def served(self, filename):
+        return os.path.join(self.images_dir, filename) in self.valid
+
+    def resolve(self, item):
+        """The filename (in images_dir) this record should point to, or None."""
+        current = item.get('image_path') or item.get('image')
+        if current and not str(current).startswith(('http://', 'https://')):
+            filename = os.path.basename(str(current).replace('\\', '/'))
+            if filename != DEFAULT_IMAGE and self.served(filename):
+                return filename
+        for key in (item.get('news_id'), item.get('image_id')):
+            if key and self.by_prefix.get(str(key)):
+                path = self.by_prefix[str(key)][0]
+                filename = os.path.basename(path)
+                if os.path.dirname(os.path.abspath(path)) != os.path.abspath(self.images_dir):
+                    # Found under images bucket/: copy it where the backend serves from
+                    self.to_copy[filename] = path
+                return filename
+        return None
+
+    def patch_record(self, item):
+        """Update image_path (and image, if the record has one). Returns True if changed."""
+        filename = self.resolve(item)
+        changed = False
+        wanted = filename or DEFAULT_IMAGE
+        if item.get('image_path') != wanted:
+            item['image_path'] = wanted
+            changed = True
+        if 'image' in item and (item['image'] or '') != (filename or ''):
+            item['image'] = filename or ''
+            changed = True
+        return changed
+
+    def patch_file(self, path, dry_run=False):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except Exception as e:
+            logging.warning(f"Skipping unreadable {path}: {e}")
+            return path, 0, 0
+        records = data if isinstance(data, list) else [data]
+        changed = sum(1 for item in records if isinstance(item, dict) and self.patch_record(item))
+        if changed and not dry_run:
+            tmp_path = path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, path)
+        return path, len(records), changed
+
+    def patch_files(self, paths, dry_run=False):
+        def run():
+            with ThreadPoolExecutor(max_workers=min(self.workers, max(1, len(paths)))) as pool:
+                return list(pool.map(lambda p: self.patch_file(p, dry_run), paths))
+        results = self._timed('patch', run)
+        if not dry_run:
+            self._timed('copy', self.copy_found)
+        return results
+
+    def copy_found(self):
+        os.makedirs(self.images_dir, exist_ok=True)
+        for filename, source in self.to_copy.items():
+            target = os.path.join(self.images_dir, filename)
+            if not os.path.exists(target):
+                shutil.copyfile(source, target)
+
+    def fix_extensionless(self):
+        """Give valid files without an extension the one matching their content."""
+        renamed = []
+        for path, problem in list(self.problems.items()):
+            if problem != 'extensionless':
+                continue
+            target = path + '.' + validate(path)[2]
+            if not os.path.exists(target):
+                os.replace(path, target)
+                renamed.append(target)
+                del self.problems[path]
+        return renamed
+
+
+def reconcile(dry_run=False, fix_extensionless=False, files=None, images_dir=IMAGES_DIR, search_dirs=None, workers=WORKERS):
+    start = time.perf_counter()
+    reconciler = Reconciler(images_dir, search_dirs, workers)
+    reconciler.build_index()
+    renamed = []
+    if fix_extensionless and not dry_run:
+        renamed = reconciler.fix_extensionless()
+        if renamed:
+            reconciler = Reconciler(images_dir, search_dirs, workers).build_index()
+    results = reconciler.patch_files(files if files is not None else json_files(), dry_run)
+    reconciler.timings['total'] = round(time.perf_counter() - start, 3)
+    return {
+        'dry_run': dry_run,
+        'images_indexed': len(reconciler.valid) + len(reconciler.problems),
+        'invalid_images': reconciler.problems,
+        'renamed': renamed,
+        'copied_to_images': sorted(reconciler.to_copy) if not dry_run else [],
+        'files': {os.path.relpath(p, BASE_DIR): {'records': n, 'changed': c} for p, n, c in results},
+        'records_changed': sum(c for _, _, c in results),
+        'timings': reconciler.timings,
+    }
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description='Index, validate and reconcile article images in every news JSON file.')
+    parser.add_argument('--dry_run', action='store_true', help='Report what would change without writing anything')
+    parser.add_argument('--fix_extensionless', action='store_true', help='Add the detected extension to files without one')
+    parser.add_argument('--files', nargs='*', default=None, help='JSON files to reconcile (default: news bucket + root copies)')
+    parser.add_argument('--workers', type=int, default=WORKERS, help='Parallel validation/patch workers')
+    args = parser.parse_args()
+    report = reconcile(args.dry_run, args.fix_extensionless, args.files, workers=args.workers)
+    for path, problem in sorted(report['invalid_images'].items()):
+        print(f"[invalid] {os.path.relpath(path, BASE_DIR)}: {problem}")
+    for path, counts in report['files'].items():
+        print(f"{path}: {counts['changed']}/{counts['records']} records {'to patch' if args.dry_run else 'patched'}")
+    print(f"Indexed {report['images_indexed']} images, {len(report['invalid_images'])} invalid, "
+          f"{report['records_changed']} records {'to patch' if args.dry_run else 'patched'}")
+    print('Timings (s): ' + ', '.join(f'{k}={v}' for k, v in report['timings'].items()))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
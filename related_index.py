@@ -0,0 +1,264 @@
+import os
+import re
+import glob
+import json
+import time
+import zlib
+import logging
+import argparse
+import hashlib
+from collections import Counter
+from datetime import datetime
+
+import numpy as np
+
+import metrics
+
+# Offline stage that precomputes, for every article in the news bucket, its
+# nearest neighbours under hashed TF-IDF cosine similarity, plus trending terms
+# and articles over a sliding time window. The backend only does dict lookups
+# on the output (related_index.json), so /related and /trending are O(1).
+BASE_DIR = os.path.abspath(os.path.dirname(__file__))
+NEWS_BUCKET_DIR = os.path.join(BASE_DIR, 'news bucket')
+OUTPUT_PATH = os.path.join(BASE_DIR, 'related_index.json')
+VECTOR_CACHE_PATH = os.path.join(BASE_DIR, 'related_vectors.npz')
+TRENDING_STATE_PATH = os.path.join(BASE_DIR, 'trending_state.json')
+
+DIMENSIONS = 1024
+TOP_K = 10
+MIN_SIMILARITY = 0.1
+CHUNK_ROWS = 256
+FULL_TEXT_CHARS = 2000
+WINDOW_HOURS = 24
+TRENDING_TERMS = 20
+TRENDING_ARTICLES = 20
+
+STOPWORDS = set("""
+a about after again all also an and any are as at be been before being but by can could did do does
+for from had has have he her his how i if in into is it its just more most new news no not of on one
+or our out over said says she so some than that the their them then there these they this to up us
+was we were what when which who will with would you your
+""".split())
+
+
+def tokenize(text):
+    return [w for w in re.findall(r'[a-z][a-z0-9]+', (text or '').lower()) if w not in STOPWORDS and len(w) > 2]
+
+
+def article_terms(item):
+    tags = item.get('tags') or []
+    if isinstance(tags, str):
+        tags = tags.split(',')
+    headline = item.get('seo_headline') or item.get('heading') or ''
+    summary = item.get('rewritten_summary') or item.get('summary') or ''
+    full_text = (item.get('full_text') or item.get('rewritten_full_text') or '')[:FULL_TEXT_CHARS]
+    tag_terms = [t for tag in tags for t in tokenize(tag)]
+    # Headline and tags count double
+    return tokenize(headline) * 2 + tag_terms * 2 + tokenize(summary) + tokenize(full_text)
+
+
+def content_hash(item):
+    return hashlib.sha1(json.dumps(
+        [item.get('seo_headline'), item.get('heading'), item.get('rewritten_summary'), item.get('summary'),
+         item.get('tags'), (item.get('full_text') or item.get('rewritten_full_text') or '')[:FULL_TEXT_CHARS]],
+        ensure_ascii=False, default=str).encode('utf-8')).hexdigest()
+
+
+def hashed_counts(terms, dimensions=DIMENSIONS):
+    """Term counts folded into `dimensions` buckets with a sign hash (stable across processes)."""
+    row = np.zeros(dimensions, dtype=np.float32)
+    for term, count in Counter(terms).items():
+        h = zlib.crc32(term.encode('utf-8'))
+        row[h % dimensions] += count if (h >> 31) & 1 == 0 else -count
+    return row
+
+
+def load_articles(bucket_dir):
+    latest = {}
+    for file in glob.glob(os.path.join(bucket_dir, '*.json')):
+        try:
+            with open(file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except Exception:
+            continue
+        for item in data if isinstance(data, list) else [data]:
+            if isinstance(item, dict) and item.get('news_id'):
+                latest[str(item['news_id'])] = item
+    return latest
+
+
+def build_count_matrix(articles, cache_path=VECTOR_CACHE_PATH, dimensions=DIMENSIONS):
+    """Raw hashed term counts per article, reusing cached rows for unchanged articles."""
+    ids = list(articles)
+    hashes = [content_hash(articles[i]) for i in ids]
+    cached = {}
+    if cache_path and os.path.exists(cache_path):
+        try:
+            data = np.load(cache_path, allow_pickle=False)
+            if data['counts'].shape[1] == dimensions:
+                cached = {(i, h): n for n, (i, h) in enumerate(zip(data['ids'].tolist(), data['hashes'].tolist()))}
+                cached_counts = data['counts']
+        except Exception as e:
+            logging.warning(f"Ignoring unreadable vector cache {cache_path}: {e}")
+    counts = np.zeros((len(ids), dimensions), dtype=np.float32)
+    reused = 0
+    for row, (news_id, h) in enumerate(zip(ids, hashes)):
+        index = cached.get((news_id, h))
+        if index is not None:
+            counts[row] = cached_counts[index]
+            reused += 1
+        else:
+            counts[row] = hashed_counts(article_terms(articles[news_id]), dimensions)
+    if cache_path:
+        np.savez(cache_path, ids=np.array(ids, dtype=str), hashes=np.array(hashes, dtype=str), counts=counts)
+    logging.info(f"[Related] Vectorized {len(ids) - reused} articles, reused {reused} cached vectors.")
+    return ids, counts
+
+
+def tfidf(counts):
+    """Sublinear TF-IDF with L2-normalised rows."""
+    tf = np.sign(counts) * np.log1p(np.abs(counts))
+    df = np.count_nonzero(counts, axis=0)
+    idf = np.log((1 + counts.shape[0]) / (1 + df)) + 1
+    vectors = tf * idf.astype(np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    return vectors / norms
+
+
+def nearest_neighbours(vectors, top_k=TOP_K, min_similarity=MIN_SIMILARITY, chunk_rows=CHUNK_ROWS):
+    """For each row, the indices and scores of its top_k most similar other rows (chunked to bound memory)."""
+    n = vectors.shape[0]
+    k = min(top_k, n - 1)
+    results = []
+    if k <= 0:
+        return [[] for _ in range(n)]
+    for start in range(0, n, chunk_rows):
+        sims = vectors[start:start + chunk_rows] @ vectors.T
+        rows = np.arange(sims.shape[0])
+        sims[rows, rows + start] = -1  # exclude self
+        top = np.argpartition(-sims, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(sims, top, axis=1)
+        order = np.argsort(-top_scores, axis=1)
+        top = np.take_along_axis(top, order, axis=1)
+        top_scores = np.take_along_axis(top_scores, order, axis=1)
+        for idx, scores in zip(top, top_scores):
+            results.append([(int(i), float(s)) for i, s in zip(idx, scores) if s >= min_similarity])
+    return results
+
+
+def article_time(item, default):
+    value = item.get('date_published') or item.get('date') or item.get('pubDate')
+    if value:
+        for parse in (datetime.fromisoformat, lambda v: datetime.strptime(v, '%a, %d %b %Y %H:%M:%S %z')):
+            try:
+                return parse(value).timestamp()
+            except (ValueError, TypeError):
+                continue
+    return default
+
+
+def update_trending(articles, state_path=TRENDING_STATE_PATH, window_hours=WINDOW_HOURS, now=None):
+    """
+    Incrementally maintain hourly term counts: only articles not counted before are
+    added, and hours that fell out of the window are dropped.
+    """
+    now = now or time.time()
+    state = {'counted': {}, 'hours': {}}
+    if state_path and os.path.exists(state_path):
+        try:
+            with open(state_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except Exception as e:
+            logging.warning(f"Ignoring unreadable trending state {state_path}: {e}")
+    counted, hours = state['counted'], state['hours']
+    for news_id, item in articles.items():
+        if news_id in counted:
+            continue
+        ts = article_time(item, now)
+        hour = str(int(ts // 3600))
+        counted[news_id] = ts
+        bucket = hours.setdefault(hour, {})
+        tags = item.get('tags') or []
+        if isinstance(tags, str):
+            tags = tags.split(',')
+        headline = item.get('seo_headline') or item.get('heading') or ''
+        for term in set(t.strip().lower() for t in tags if t.strip()) | set(tokenize(headline)):
+            bucket[term] = bucket.get(term, 0) + 1
+    oldest_hour = int((now - window_hours * 3600) // 3600)
+    state['hours'] = {h: c for h, c in hours.items() if int(h) >= oldest_hour}
+    # Forget removed articles only, so undated ones keep their first-seen time
+    state['counted'] = {i: ts for i, ts in counted.items() if i in articles}
+    if state_path:
+        with open(state_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+    return state
+
+
+def trending_from_state(state, articles, now=None, window_hours=WINDOW_HOURS):
+    now = now or time.time()
+    totals = Counter()
+    for hour, counts in state['hours'].items():
+        # Newer hours weigh more (half-life of a quarter of the window)
+        age = max(0.0, now / 3600 - int(hour))
+        weight = 0.5 ** (age / (window_hours / 4))
+        for term, count in counts.items():
+            totals[term] += count * weight
+    top_terms = totals.most_common(TRENDING_TERMS)
+    term_scores = dict(top_terms)
+    scored = []
+    window_start = now - window_hours * 3600
+    for news_id, ts in state['counted'].items():
+        item = articles.get(news_id)
+        if item is None or ts < window_start:
+            continue
+        terms = set(tokenize(item.get('seo_headline') or item.get('heading') or ''))
+        tags = item.get('tags') or []
+        terms |= set(t.strip().lower() for t in (tags.split(',') if isinstance(tags, str) else tags))
+        score = sum(term_scores.get(t, 0) for t in terms)
+        if score:
+            scored.append((score, ts, news_id))
+    scored.sort(reverse=True)
+    return {
+        'window_hours': window_hours,
+        'terms': [{'term': t, 'score': round(s, 2)} for t, s in top_terms],
+        'articles': [news_id for _, _, news_id in scored[:TRENDING_ARTICLES]],
+    }
+
+
+def build_related_index(bucket_dir=NEWS_BUCKET_DIR, output_path=OUTPUT_PATH, cache_path=VECTOR_CACHE_PATH,
+                        trending_state_path=TRENDING_STATE_PATH, top_k=TOP_K):
+    start = time.perf_counter()
+    articles = load_articles(bucket_dir)
+    related = {}
+    if articles:
+        with metrics.timer('related_index_seconds', 'Related index build phase', phase='vectorize'):
+            ids, counts = build_count_matrix(articles, cache_path)
+            vectors = tfidf(counts)
+        with metrics.timer('related_index_seconds', 'Related index build phase', phase='neighbours'):
+            for news_id, neighbours in zip(ids, nearest_neighbours(vectors, top_k)):
+                related[news_id] = [{'news_id': ids[i], 'score': round(s, 4)} for i, s in neighbours]
+    with metrics.timer('related_index_seconds', 'Related index build phase', phase='trending'):
+        trending = trending_from_state(update_trending(articles, trending_state_path), articles)
+    output = {'generated_at': time.time(), 'related': related, 'trending': trending}
+    tmp_path = output_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(output, f, ensure_ascii=False)
+    os.replace(tmp_path, output_path)
+    logging.info(f"[Related] Indexed {len(related)} articles in {time.perf_counter() - start:.2f}s -> {output_path}")
+    return output
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s',
+                        handlers=[logging.StreamHandler()])
+    parser = argparse.ArgumentParser(description='Precompute related and trending articles for the API.')
+    parser.add_argument('--bucket_dir', default=NEWS_BUCKET_DIR, help='News bucket directory')
+    parser.add_argument('--output', default=OUTPUT_PATH, help='Output index JSON')
+    parser.add_argument('--top_k', type=int, default=TOP_K, help='Related articles per article')
+    args = parser.parse_args()
+    build_related_index(args.bucket_dir, args.output, top_k=args.top_k)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,192 @@
+import os
+import re
+import json
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+import metrics
+
+# Persistent robots.txt cache shared by every aggregation run. Each domain's
+# robots.txt is kept on disk with its expiry, taken from Cache-Control max-age
+# (clamped to MIN_TTL..MAX_TTL; RFC 9309 asks crawlers not to rely on a copy
+# older than a day) or DEFAULT_TTL. Unreachable robots.txt (network errors,
+# 5xx) is treated as "allow" but only for NEGATIVE_TTL, so it is retried soon.
+# prefetch() fetches the robots files of a whole batch concurrently before
+# article extraction starts; crawl_delay() exposes each domain's Crawl-delay.
+BASE_DIR = os.path.abspath(os.path.dirname(__file__))
+CACHE_PATH = os.path.join(BASE_DIR, 'robots_cache.json')
+DEFAULT_TTL = 86400  # seconds
+MIN_TTL = 3600
+MAX_TTL = 86400
+NEGATIVE_TTL = 900
+FETCH_TIMEOUT = 10
+PREFETCH_WORKERS = 16
+MAX_BODY_BYTES = 500 * 1024  # RFC 9309 parsing limit
+MAX_CRAWL_DELAY = 60  # seconds; longer values are capped rather than stalling the pipeline
+USER_AGENT = 'PlanetEarthNewsBot/1.0'
+
+MAX_AGE_RE = re.compile(r'max-age=(\d+)')
+
+_lock = threading.Lock()
+_cache = None
+_parsers = {}
+_last_request = {}
+
+
+def domain_of(url):
+    parts = urlparse(url or '')
+    return f'{parts.scheme}://{parts.netloc}' if parts.scheme and parts.netloc else None
+
+
+def _load(path=None):
+    global _cache
+    path = path or CACHE_PATH
+    if _cache is None:
+        _cache = {}
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    _cache = json.load(f)
+            except Exception as e:
+                logging.warning(f"Failed to load robots cache {path}: {e}")
+                _cache = {}
+    return _cache
+
+
+def save(path=None):
+    path = path or CACHE_PATH
+    with _lock:
+        if _cache is None:
+            return
+        tmp_path = path + '.tmp'
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(_cache, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logging.warning(f"Failed to save robots cache {path}: {e}")
+
+
+def ttl_from_headers(headers):
+    cache_control = (headers.get('Cache-Control') or '').lower()
+    if 'no-store' in cache_control or 'no-cache' in cache_control:
+        return MIN_TTL
+    m = MAX_AGE_RE.search(cache_control)
+    if m:
+        return max(MIN_TTL, min(MAX_TTL, int(m.group(1))))
+    return DEFAULT_TTL
+
+
+def fetch(domain, now=None):
+    """Download domain's robots.txt. Returns the cache entry (not stored)."""
+    import urllib.error
+    import urllib.request
+    now = now or time.time()
+    request = urllib.request.Request(domain + '/robots.txt', headers={'User-Agent': USER_AGENT})
+    entry = {'fetched': now, 'status': None, 'body': '', 'error': None}
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=FETCH_TIMEOUT) as resp:
+            entry['status'] = resp.status
+            entry['body'] = resp.read(MAX_BODY_BYTES).decode('utf-8', errors='replace')
+            ttl = ttl_from_headers(resp.headers)
+    except urllib.error.HTTPError as e:
+        entry['status'] = e.code
+        # 4xx: no usable robots.txt (401/403 disallow everything, like RobotFileParser); 5xx: unreachable
+        ttl = ttl_from_headers(e.headers) if e.code < 500 else NEGATIVE_TTL
+    except Exception as e:
+        entry['error'] = str(e) or type(e).__name__
+        ttl = NEGATIVE_TTL
+    metrics.histogram('robots_fetch_seconds', 'robots.txt download time').observe(time.perf_counter() - start)
+    metrics.counter('robots_fetch_total', 'robots.txt downloads by outcome').inc(
+        outcome='error' if entry['error'] else str(entry['status']))
+    entry['expires'] = now + ttl
+    return entry
+
+
+def _parser(domain, entry):
+    import urllib.robotparser
+    cached = _parsers.get(domain)
+    if cached and cached[0] == entry['fetched']:
+        return cached[1]
+    rp = urllib.robotparser.RobotFileParser(domain + '/robots.txt')
+    status = entry.get('status')
+    if status in (401, 403):
+        rp.disallow_all = True
+    elif status and 200 <= status < 300:
+        rp.parse(entry['body'].splitlines())
+    else:
+        rp.allow_all = True
+    _parsers[domain] = (entry['fetched'], rp)
+    return rp
+
+
+def _entry(domain, now=None):
+    """The cached entry for domain, fetched (and stored) first if missing or expired."""
+    now = now or time.time()
+    with _lock:
+        entry = _load().get(domain)
+    if entry is not None and entry['expires'] > now:
+        metrics.counter('robots_cache_lookups_total', 'robots.txt cache lookups by result').inc(result='hit')
+        return entry
+    metrics.counter('robots_cache_lookups_total', 'robots.txt cache lookups by result').inc(
+        result='miss' if entry is None else 'expired')
+    entry = fetch(domain, now)
+    with _lock:
+        _load()[domain] = entry
+    return entry
+
+
+def prefetch(urls, workers=PREFETCH_WORKERS, now=None):
+    """Fetch, concurrently, every missing or expired robots.txt for the domains of urls, then save."""
+    now = now or time.time()
+    with _lock:
+        cache = _load()
+        stale = {d for d in map(domain_of, urls) if d and (d not in cache or cache[d]['expires'] <= now)}
+    if not stale:
+        return 0
+    with ThreadPoolExecutor(max_workers=min(workers, len(stale))) as pool:
+        entries = dict(zip(stale, pool.map(lambda d: fetch(d, now), stale)))
+    with _lock:
+        _load().update(entries)
+    save()
+    return len(stale)
+
+
+def can_fetch(url, user_agent='*'):
+    domain = domain_of(url)
+    if not domain:
+        return True
+    entry = _entry(domain)
+    return _parser(domain, entry).can_fetch(user_agent, url)
+
+
+def crawl_delay(url, user_agent='*'):
+    """Seconds to wait between requests to url's domain (Crawl-delay or Request-rate), 0 if none."""
+    domain = domain_of(url)
+    if not domain:
+        return 0.0
+    rp = _parser(domain, _entry(domain))
+    delay = rp.crawl_delay(user_agent)
+    if delay is None:
+        rate = rp.request_rate(user_agent)
+        delay = rate.seconds / rate.requests if rate and rate.requests else 0
+    return min(float(delay or 0), MAX_CRAWL_DELAY)
+
+
+def throttle(url, user_agent='*'):
+    """Sleep until url's domain may be requested again under its crawl delay."""
+    domain = domain_of(url)
+    delay = crawl_delay(url, user_agent)
+    if not domain or not delay:
+        return 0.0
+    with _lock:
+        now = time.monotonic()
+        wait = max(0.0, _last_request.get(domain, 0.0) + delay - now)
+        _last_request[domain] = now + wait
+    if wait:
+        time.sleep(wait)
+    return wait
@@ -1,18 +1,11 @@
-import subprocess
 import sys
-from tqdm import tqdm
+from pipeline_daemon import setup_logging, run_cycle, timing_summary
 
-scripts = [
-    'aggregate_news.py',
-    'gemini_news_enhancer.py',
-    'image_generator.py',
-]
-
-for script in tqdm(scripts, desc="Updating news pipeline"):
-    print(f"Running {script}...")
-    result = subprocess.run([sys.executable, script], capture_output=True, text=True)
-    print(result.stdout)
-    if result.returncode != 0:
-        print(f"Error running {script}: {result.stderr}")
-        sys.exit(result.returncode)
+# Runs every pipeline stage once, in this interpreter (see pipeline_daemon.py)
+setup_logging()
+if not run_cycle():
+    print("Error running news pipeline update.")
+    sys.exit(1)
+for stage, summary in timing_summary().items():
+    print(f"{stage}: {summary}")
 print("All update steps completed successfully.")